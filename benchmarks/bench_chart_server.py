@@ -0,0 +1,129 @@
+"""
+Load test: many clients asking a local chart server for charts at once.
+
+Usage:
+    python benchmarks/bench_chart_server.py --clients 16 --requests 400 --workers 4
+    python benchmarks/bench_chart_server.py --csv data/sim.csv --matches 20 --cache-mb 0
+
+Starts src/chart_server.py on a free port and runs one thread per client,
+each on its own keep-alive connection, sending requests back to back. Each
+request is drawn from every (chart, match, team / player, tier) combination
+with a skewed popularity: a few charts are asked for often, most rarely.
+That is what exercises the result cache and request coalescing. Reports
+throughput and latency percentiles, overall and by how each request was
+served (cache hit, fresh render, or waiting on another request's render).
+"""
+import argparse
+import asyncio
+import http.client
+import os
+import sys
+import threading
+import time
+from urllib.parse import urlencode
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from chart_server import ChartServer  # noqa: E402
+from charts import CHARTS  # noqa: E402
+
+SEED = 2024
+
+
+def build_urls(server, tiers, n_matches):
+    """Every chart request the clients may send, most popular first (shuffled)."""
+    matches = server.matches[:n_matches] if len(server.matches) > 1 else [None]
+    urls = []
+    for chart, (_, scope) in CHARTS.items():
+        targets = {'team': server.teams, 'player': server.players}.get(scope, [None])
+        for match_id in matches:
+            for target in targets:
+                for tier in tiers:
+                    query = {'tier': tier}
+                    if match_id is not None:
+                        query['match'] = match_id
+                    if target is not None:
+                        query[scope] = target
+                    urls.append(f"/chart/{chart}?{urlencode(query)}")
+    rng = np.random.default_rng(SEED)
+    rng.shuffle(urls)
+    return urls
+
+
+def run_client(port, urls, weights, n_requests, seed, results):
+    rng = np.random.default_rng(seed)
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=300)
+    for i in rng.choice(len(urls), size=n_requests, p=weights):
+        t0 = time.perf_counter()
+        conn.request('GET', urls[i])
+        response = conn.getresponse()
+        body = response.read()
+        results.append((time.perf_counter() - t0, response.status, response.getheader('X-Cache', 'error'), len(body)))
+    conn.close()
+
+
+def percentiles(secs):
+    ms = np.array(secs) * 1e3
+    return f"p50 {np.percentile(ms, 50):>7.1f} ms   p99 {np.percentile(ms, 99):>7.1f} ms   max {ms.max():>7.1f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--csv', default='data/full_match_data.csv')
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=400, help='Requests in total, split over the clients')
+    parser.add_argument('--workers', type=int, default=None, help='Server render processes (default: CPU count)')
+    parser.add_argument('--cache-mb', type=float, default=256, help='Server result cache (0 = off)')
+    parser.add_argument('--tiers', nargs='+', default=['preview'], help='Tiers the clients ask for')
+    parser.add_argument('--matches', type=int, default=5, help='Matches the clients ask for (multi-match CSVs)')
+    parser.add_argument('--skew', type=float, default=1.1, help='Popularity ~ 1 / rank**skew')
+    args = parser.parse_args()
+
+    server = ChartServer(args.csv, args.workers, args.cache_mb)
+    t0 = time.perf_counter()
+    server.warm_up()
+    print(f"{server.workers} workers loaded {args.csv} in {time.perf_counter() - t0:.1f}s")
+
+    loop = asyncio.new_event_loop()
+    port = loop.run_until_complete(server.start('127.0.0.1', 0))
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+
+    urls = build_urls(server, args.tiers, args.matches)
+    weights = 1 / np.arange(1, len(urls) + 1) ** args.skew
+    weights /= weights.sum()
+
+    results = []
+    per_client = [args.requests // args.clients + (i < args.requests % args.clients) for i in range(args.clients)]
+    threads = [threading.Thread(target=run_client, args=(port, urls, weights, n, SEED + i, results))
+               for i, n in enumerate(per_client)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall_secs = time.perf_counter() - t0
+
+    asyncio.run_coroutine_threadsafe(server.stop(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    stats = server.health()
+    server.close()
+
+    failed = [r for r in results if r[1] != 200]
+    print(f"{args.clients} clients, {len(results)} requests over {len(urls)} distinct charts "
+          f"(tiers: {', '.join(args.tiers)}, cache {args.cache_mb:g} MB)")
+    print(f"Throughput: {len(results) / wall_secs:.1f} requests/s in {wall_secs:.1f}s, "
+          f"{sum(r[3] for r in results) / 2**20:.1f} MB served")
+    print(f"All:        {percentiles([r[0] for r in results])}")
+    for how in ['hit', 'coalesced', 'rendered']:
+        secs = [r[0] for r in results if r[2] == how]
+        if secs:
+            print(f"{how:<11} {percentiles(secs)}   ({len(secs)} requests)")
+    print(f"Server:     {stats['renders']} renders ({stats['render_secs']:.1f}s render time), {stats['hits']} cache hits, "
+          f"{stats['coalesced']} coalesced, {stats['cached']} images / {stats['cache_mb']:.1f} MB cached")
+    if failed:
+        print(f"{len(failed)} requests failed (statuses {sorted({r[1] for r in failed})})")
+
+
+if __name__ == '__main__':
+    main()
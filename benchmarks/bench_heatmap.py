@@ -0,0 +1,66 @@
+"""
+Benchmark: KDE heatmap vs binned histogram heatmap.
+
+Usage:
+    python benchmarks/bench_heatmap.py --events 1000 100000 1000000
+
+Times 02_heatmap.render() with method='kde' and method='hist' on random
+events. KDE is skipped above --kde-max-events because it grows with the
+number of points (pass a larger value to measure it anyway).
+"""
+import argparse
+import importlib
+import os
+import sys
+import tempfile
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+heatmap = importlib.import_module('02_heatmap')
+
+
+def make_points(n_events, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Team': 'Home',
+        'X': np.clip(rng.normal(55, 22, n_events), 0, 100).astype(np.float32),
+        'Y': rng.uniform(0, 100, n_events).astype(np.float32),
+    })
+
+
+def time_render(points, method, out_dir):
+    output_image = os.path.join(out_dir, f"heatmap_{method}.png")
+    t0 = time.perf_counter()
+    fig = heatmap.render(points, 'Home', output_image, method=method)
+    secs = time.perf_counter() - t0
+    plt.close(fig)
+    return secs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--events', type=int, nargs='+', default=[1_000, 100_000, 1_000_000])
+    parser.add_argument('--kde-max-events', type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(f"{'events':>10} {'kde (s)':>10} {'hist (s)':>10} {'speed-up':>10}")
+    with tempfile.TemporaryDirectory() as out_dir:
+        for n_events in args.events:
+            points = make_points(n_events)
+            hist_secs = time_render(points, 'hist', out_dir)
+            if n_events <= args.kde_max_events:
+                kde_secs = time_render(points, 'kde', out_dir)
+                kde_col, ratio = f"{kde_secs:10.2f}", f"{kde_secs / hist_secs:9.1f}x"
+            else:
+                kde_col, ratio = f"{'skipped':>10}", f"{'-':>10}"
+            print(f"{n_events:>10,} {kde_col} {hist_secs:10.2f} {ratio}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Load test: many scouting consoles posting batches to a local ingest server.
+
+Usage:
+    python benchmarks/bench_ingest.py --consoles 50 --events 2000 --batch 20
+
+Starts src/ingest_server.py on a free port with a temporary dataset root,
+runs one thread per console (each with its own keep-alive connection, posting
+batches back to back like a console catching up), resends one batch per
+console to check de-duplication, then compacts and checks that every event
+landed in the dataset exactly once. Reports throughput, request latency
+percentiles and how many fsyncs group commit needed.
+"""
+import argparse
+import http.client
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+import dataset  # noqa: E402
+from ingest_server import IngestServer  # noqa: E402
+
+
+def make_events(match_id, console_idx, n_events):
+    """Console-shaped events (the dicts index.html builds in saveEvent)."""
+    rng = np.random.default_rng(console_idx)
+    team = 'Home' if console_idx % 2 == 0 else 'Away'
+    return [{
+        'matchId': match_id, 'Period': 1 if i < n_events // 2 else 2, 'Team': team,
+        'Player': f"{team[0]}{rng.integers(1, 12)}", 'Event': 'Pass', 'Qualifier': '', 'Prog': '',
+        'Mins': i * 90 // n_events, 'Secs': i % 60,
+        'ScreenX': f"{rng.uniform(0, 100):.1f}", 'ScreenY': f"{rng.uniform(0, 100):.1f}",
+        'NormX': f"{rng.uniform(0, 100):.1f}", 'NormY': f"{rng.uniform(0, 100):.1f}",
+        'timestamp': 1_700_000_000_000 + i,
+    } for i in range(n_events)]
+
+
+def run_console(port, console_idx, match_id, n_events, batch_size, latencies):
+    events = make_events(match_id, console_idx, n_events)
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    console = f"load_{console_idx}"
+
+    def post(seq, batch):
+        body = json.dumps({'console': console, 'seq': seq, 'events': batch})
+        t0 = time.perf_counter()
+        conn.request('POST', '/events', body, {'Content-Type': 'application/json'})
+        reply = json.loads(conn.getresponse().read())
+        latencies.append(time.perf_counter() - t0)
+        return reply
+
+    for seq, start in enumerate(range(0, n_events, batch_size)):
+        post(seq, events[start:start + batch_size])
+
+    # A retry of the last batch (response "lost") must not be stored again
+    last_seq = (n_events - 1) // batch_size
+    assert post(last_seq, events[last_seq * batch_size:])['duplicate'], "retry was stored twice"
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--consoles', type=int, default=50)
+    parser.add_argument('--events', type=int, default=2000, help='Events per console')
+    parser.add_argument('--batch', type=int, default=20, help='Events per request')
+    parser.add_argument('--matches', type=int, default=10, help='Consoles are spread over this many matches')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        server = IngestServer(('127.0.0.1', 0), root, compact_interval=3600)
+        port = server.server_address[1]
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        latencies = []
+        threads = [
+            threading.Thread(target=run_console,
+                             args=(port, i, f"load_match_{i % args.matches}", args.events, args.batch, latencies))
+            for i in range(args.consoles)
+        ]
+        t0 = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        ingest_secs = time.perf_counter() - t0
+
+        stats = dict(server.log.stats)
+        t0 = time.perf_counter()
+        server.shutdown()
+        server.server_close()  # Final compaction into the dataset
+        compact_secs = time.perf_counter() - t0
+
+        total = args.consoles * args.events
+        stored = sum(info['rows'] for info in dataset.read_manifest(root).values())
+        lat_ms = np.array(latencies) * 1e3
+
+        print(f"{args.consoles} consoles x {args.events:,} events in batches of {args.batch}")
+        print(f"Ingest:   {total:,} events in {ingest_secs:.2f}s -> {total / ingest_secs:,.0f} events/s, "
+              f"{stats['batches'] / ingest_secs:,.0f} requests/s")
+        print(f"Latency:  p50 {np.percentile(lat_ms, 50):.1f} ms, p99 {np.percentile(lat_ms, 99):.1f} ms, "
+              f"max {lat_ms.max():.1f} ms")
+        print(f"Durability: {stats['fsyncs']:,} fsyncs for {stats['batches']:,} batches (group commit), "
+              f"{stats['duplicates']} retries de-duplicated")
+        print(f"Compaction: {stats['compactions']} during the run, final one {compact_secs:.2f}s; "
+              f"{stored:,} rows in {len(dataset.read_manifest(root))} partitions")
+        assert stored == total, f"expected {total} rows, found {stored}"
+        print("Every event stored exactly once.")
+
+
+if __name__ == '__main__':
+    main()
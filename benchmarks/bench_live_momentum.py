@@ -0,0 +1,67 @@
+"""
+Benchmark: appending events one at a time to the live momentum engine.
+
+Usage:
+    python benchmarks/bench_live_momentum.py --events 10000
+
+Compares LiveMomentum.append() + curve() per event against recomputing the
+whole timeline with 03_momentum.prepare() after every event (timed on the
+first --baseline-events events and extrapolated), and checks that both give
+the same final curve.
+"""
+import argparse
+import importlib
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+import simulator  # noqa: E402
+from live_momentum import LiveMomentum  # noqa: E402
+
+momentum = importlib.import_module('03_momentum')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--events', type=int, default=10_000)
+    parser.add_argument('--baseline-events', type=int, default=300,
+                        help='Events timed with full recomputation before extrapolating')
+    args = parser.parse_args()
+
+    # A few simulated matches back to back, replayed as one long live feed
+    n_matches = args.events // 2000 + 1
+    df = next(simulator.iter_chunks(n_matches, seed=7, batch_size=n_matches))
+    df = df[momentum.COLUMNS].iloc[:args.events].reset_index(drop=True)
+    rows = list(df.itertuples(index=False))
+    print(f"Replaying {len(rows):,} events one at a time")
+
+    # Incremental: append + read the curve after every event
+    engine = LiveMomentum()
+    t0 = time.perf_counter()
+    for row in rows:
+        engine.append(row.Team, row.Mins, row.X, row.Y, row.Event, row.Qualifier)
+        engine.curve()
+    live_secs = time.perf_counter() - t0
+    print(f"LiveMomentum: {live_secs:.3f}s total, {live_secs / len(rows) * 1e6:,.1f} us per event")
+
+    # Baseline: recompute the full timeline after every event
+    n_base = min(args.baseline_events, len(rows))
+    t0 = time.perf_counter()
+    for i in range(1, n_base + 1):
+        momentum.prepare(df.iloc[:i])
+    base_per_event = (time.perf_counter() - t0) / n_base
+    print(f"Full recompute: {base_per_event * 1e3:,.2f} ms per event "
+          f"(~{base_per_event * len(rows):,.1f}s for all events, measured on {n_base})")
+    print(f"Speed-up: {base_per_event * len(rows) / live_secs:,.0f}x")
+
+    # Same final curve as the batch chart
+    _, live_curve = engine.curve()
+    assert np.allclose(live_curve, momentum.prepare(df)['momentum']), "curves differ"
+    print("Final curve matches 03_momentum.prepare().")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark: render time and file size of every chart in every render tier.
+
+Usage:
+    python benchmarks/bench_render_tiers.py --matches 20
+    python benchmarks/bench_render_tiers.py --matches 50 --charts carry pass --repeat 5
+
+Simulates --matches matches (src/simulator.py, fixed seed), so the carry and
+pass maps draw thousands of lines, and runs each chart's prepare() once. Then
+render() is timed in every tier of render_tiers.py, --repeat times (the
+median is reported) after one untimed warm-up render. 'svg-all-vector' is the
+svg tier with no layer rasterized, i.e. what a plain savefig('x.svg') writes.
+"""
+import argparse
+import contextlib
+import importlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, SRC_DIR)
+from charts import CHARTS  # noqa: E402
+
+SEED = 2024
+SCOPE_DEFAULTS = {'team': 'TEAM_NAME', 'player': 'TARGET_PLAYER'}
+
+
+def make_events(n_matches, seed=SEED):
+    import simulator
+    from possessions import build_index
+    events = next(simulator.iter_chunks(n_matches, seed, batch_size=n_matches))
+    return events.join(build_index(events))
+
+
+def render_once(module, data, target, output_image, tier):
+    """(render seconds, savefig record) for one render() in `tier`."""
+    import matplotlib.pyplot as plt
+    import render_tiers
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()), render_tiers.use(tier):
+        fig = module.render(data, output_image) if target is None else module.render(data, target, output_image)
+    secs = time.perf_counter() - t0
+    plt.close(fig)
+    return secs, render_tiers.LOG[-1]
+
+
+def run(n_matches, charts, repeat):
+    import matplotlib
+    matplotlib.use('Agg')
+    import render_tiers
+
+    events = make_events(n_matches)
+    print(f"{n_matches} matches, {len(events):,} events\n")
+    print(f"{'chart':<9} {'tier':<15} {'render':>9} {'savefig':>9} {'size':>10} {'rasterized':>10}")
+
+    modes = [(tier, tier) for tier in render_tiers.TIERS] + [('svg-all-vector', 'svg')]
+    with tempfile.TemporaryDirectory() as out_dir:
+        for chart in charts:
+            module_name, scope = CHARTS[chart]
+            module = importlib.import_module(module_name)
+            target = None if scope == 'match' else getattr(module, SCOPE_DEFAULTS[scope])
+            with contextlib.redirect_stdout(io.StringIO()):
+                data = module.prepare(events) if target is None else module.prepare(events, target)
+            if data is None:
+                print(f"{chart:<9} no data")
+                continue
+
+            output_image = os.path.join(out_dir, chart)
+            render_once(module, data, target, output_image, 'preview')  # Imports, pitch template
+            for label, tier in modes:
+                limit = render_tiers.RASTERIZE_MARKS, render_tiers.RASTERIZE_VERTICES
+                if label == 'svg-all-vector':
+                    render_tiers.RASTERIZE_MARKS = render_tiers.RASTERIZE_VERTICES = float('inf')
+                try:
+                    runs = [render_once(module, data, target, output_image, tier) for _ in range(repeat)]
+                finally:
+                    render_tiers.RASTERIZE_MARKS, render_tiers.RASTERIZE_VERTICES = limit
+                record = runs[-1][1]
+                print(f"{chart:<9} {label:<15} "
+                      f"{statistics.median(s for s, _ in runs) * 1000:>7.0f}ms "
+                      f"{statistics.median(r['savefig_secs'] for _, r in runs) * 1000:>7.0f}ms "
+                      f"{record['bytes'] / 1024:>7.0f} KB {record['rasterized']:>10}")
+            print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--matches', type=int, default=20)
+    parser.add_argument('--charts', nargs='+', choices=list(CHARTS), default=list(CHARTS))
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    run(args.matches, args.charts, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,276 @@
+"""
+Benchmark suite: load, compute and render time and memory for every analysis.
+
+Usage:
+    python benchmarks/bench_suite.py
+    python benchmarks/bench_suite.py --sizes 1 100 10000     # 10k matches: ~5 GB RAM, hours
+    python benchmarks/bench_suite.py --sizes 1 100 --out benchmarks/results/after.json --compare benchmarks/results/before.json
+    python benchmarks/bench_suite.py --compare benchmarks/results/before.json benchmarks/results/after.json
+
+Simulates one CSV per size with src/simulator.py (same seed every run, kept
+in benchmarks/.data/), then for each analysis times the three stages
+separately: load (event store read, plus the possession index where the
+chart uses it), compute (the chart's prepare()) and render (render() to a PNG).
+The event store itself is measured first: a cold load parses the CSV and
+writes the Parquet cache, and the possession index is built from scratch.
+
+Every analysis runs in a fresh process, so each stage reports the process
+RSS high-water mark so far. --tracemalloc adds a second, traced run of every
+analysis for the peak Python / NumPy allocation of each stage (tracing slows
+rendering several times over, so times always come from the untraced run).
+Results go to a JSON file; --compare reports the stages that got slower than
+a baseline file and exits 1 if any did.
+"""
+import argparse
+import contextlib
+import datetime
+import importlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, SRC_DIR)
+from charts import CHARTS  # noqa: E402
+
+# --- CONFIGURATION ---
+SIZES = [1, 100]            # Matches per dataset (about 2 minutes; add 10000 with --sizes)
+SEED = 2024
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.data')
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+MAX_RENDER_ROWS = 250_000   # Larger inputs skip render (KDE / one artist per row)
+THRESHOLD = 0.10            # --compare: slower by more than 10%...
+MIN_DELTA_SECS = 0.05       # ...and by at least this much (timer noise)
+
+# analysis -> (chart, extra render arguments)
+ANALYSES = {
+    'heatmap': ('heatmap', {}),
+    'heatmap_hist': ('heatmap', {'method': 'hist'}),
+    'momentum': ('momentum', {}),
+    'xt': ('xt', {}),
+    'radar': ('radar', {}),
+    'shots': ('shots', {}),
+    'carry': ('carry', {}),
+    'pass': ('pass', {}),
+    'network': ('network', {}),
+}
+# Default target of each scope, read from the chart script
+SCOPE_DEFAULTS = {'team': 'TEAM_NAME', 'player': 'TARGET_PLAYER'}
+# Charts that use the possession index (end locations, possession kept)
+USES_INDEX = {'xt', 'carry', 'pass'}
+
+
+# --- DATASETS ---
+
+def dataset_path(n_matches, seed, data_dir=DATA_DIR):
+    """Simulated CSV for this size and seed (generated once, then reused)."""
+    import simulator
+    path = os.path.join(data_dir, f"sim_{n_matches}m_seed{seed}.csv")
+    if not os.path.exists(path):
+        t0 = time.perf_counter()
+        n_events = simulator.write_events(n_matches, path, 'csv', seed)
+        print(f"Simulated {n_matches:,} matches ({n_events:,} events) in {time.perf_counter() - t0:.1f}s -> {path}")
+    return path
+
+
+# --- STAGES ---
+
+def timed(stage, fn, trace):
+    """Run one stage; returns (value, result row)."""
+    if trace:
+        tracemalloc.start()
+    t0 = time.perf_counter()
+    value = fn()
+    secs = time.perf_counter() - t0
+    row = {'stage': stage, 'secs': secs, 'peak_mb': None,
+           'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+    if trace:
+        row['peak_mb'] = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    return value, row
+
+
+def bench_store(csv_path, trace):
+    """Cold event store load and possession index build."""
+    from event_store import cache_dir_for, load_events
+    from possessions import SOURCE_COLUMNS, build_index
+    shutil.rmtree(cache_dir_for(csv_path), ignore_errors=True)
+
+    rows = []
+    df, row = timed('load', lambda: load_events(csv_path), trace)
+    rows.append({'analysis': 'event_store', 'rows': len(df), **row})
+    del df
+    _, row = timed('load_warm', lambda: load_events(csv_path), trace)
+    rows.append({'analysis': 'event_store', 'rows': None, **row})
+
+    source = load_events(csv_path, columns=SOURCE_COLUMNS)
+    _, row = timed('compute', lambda: build_index(source), trace)
+    rows.append({'analysis': 'possessions', 'rows': len(source), **row})
+    return rows
+
+
+def bench_analysis(csv_path, analysis, out_dir, trace):
+    """Load / compute / render rows for one analysis."""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from event_store import load_events
+    from possessions import load_index
+
+    chart, render_kwargs = ANALYSES[analysis]
+    module_name, scope = CHARTS[chart]
+    module = importlib.import_module(module_name)
+    target = getattr(module, SCOPE_DEFAULTS[scope]) if scope != 'match' else None
+    columns = getattr(module, 'COLUMNS', None)
+
+    def load():
+        df = load_events(csv_path, columns=columns)
+        return df.join(load_index(csv_path)) if chart in USES_INDEX else df
+
+    rows = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        df, row = timed('load', load, trace)
+        rows.append({**row, 'rows': len(df)})
+
+        args = (df,) if target is None else (df, target)
+        data, row = timed('compute', lambda: module.prepare(*args), trace)
+        n_rows = len(data) if hasattr(data, 'columns') else None
+        rows.append({**row, 'rows': n_rows})
+        del df
+
+        if data is None:
+            rows.append({'stage': 'render', 'secs': None, 'status': 'no data'})
+        elif n_rows is not None and n_rows > MAX_RENDER_ROWS:
+            rows.append({'stage': 'render', 'secs': None, 'status': f"skipped ({n_rows:,} rows)"})
+        else:
+            output_image = os.path.join(out_dir, f"{analysis}.png")
+            render_args = (data, output_image) if target is None else (data, target, output_image)
+            fig, row = timed('render', lambda: module.render(*render_args, **render_kwargs), trace)
+            plt.close(fig)
+            rows.append(row)
+    return [{'analysis': analysis, **row} for row in rows]
+
+
+def run_isolated(fn, *args):
+    """Call fn(*args) in a fresh interpreter, so memory marks start from zero."""
+    ctx = multiprocessing.get_context('spawn')
+    with ctx.Pool(1) as pool:
+        return pool.apply(fn, args)
+
+
+def run_dataset(csv_path, analyses, out_dir, trace):
+    rows = run_isolated(bench_store, csv_path, trace)
+    for name in analyses:
+        rows += run_isolated(bench_analysis, csv_path, name, out_dir, trace)
+    return rows
+
+
+def run_suite(sizes, seed=SEED, analyses=None, trace=False, data_dir=DATA_DIR):
+    results = []
+    with tempfile.TemporaryDirectory() as out_dir:
+        for n_matches in sizes:
+            csv_path = dataset_path(n_matches, seed, data_dir)
+            print(f"\n== {n_matches:,} matches ({os.path.getsize(csv_path) / 2**20:.1f} MB CSV)")
+            rows = run_dataset(csv_path, analyses or list(ANALYSES), out_dir, False)
+            if trace:
+                traced = run_dataset(csv_path, analyses or list(ANALYSES), out_dir, True)
+                peaks = {(r['analysis'], r['stage']): r['peak_mb'] for r in traced}
+                for row in rows:
+                    row['peak_mb'] = peaks.get((row['analysis'], row['stage']))
+            for row in rows:
+                row['matches'] = n_matches
+                print_row(row)
+            results += rows
+    return results
+
+
+# --- REPORTS ---
+
+def print_row(row):
+    secs = f"{row['secs']:.3f}s" if row.get('secs') is not None else row.get('status', '-')
+    peak = f"{row['peak_mb']:.1f} MB" if row.get('peak_mb') is not None else '-'
+    rss = f"{row['rss_mb']:.0f} MB" if row.get('rss_mb') is not None else '-'
+    print(f"  {row['analysis']:<13} {row['stage']:<10} {secs:>22} {peak:>12} {rss:>9}")
+
+
+def metadata(sizes, seed, trace):
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, cwd=SRC_DIR).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'commit': commit, 'python': platform.python_version(), 'platform': platform.platform(),
+        'cpus': os.cpu_count(), 'sizes': sizes, 'seed': seed, 'tracemalloc': trace,
+    }
+
+
+def compare(base, new, threshold=THRESHOLD):
+    """Print per-stage changes; returns the regressed (matches, analysis, stage) keys."""
+    def keyed(results):
+        return {(r['matches'], r['analysis'], r['stage']): r for r in results if r.get('secs') is not None}
+
+    old, cur = keyed(base['results']), keyed(new['results'])
+    print(f"\n{'Matches':>8} {'Analysis':<13} {'Stage':<10} {'Before':>9} {'After':>9} {'Change':>8}")
+    regressions = []
+    for key in sorted(old.keys() & cur.keys()):
+        before, after = old[key]['secs'], cur[key]['secs']
+        change = (after - before) / before if before else 0.0
+        slower = change > threshold and after - before > MIN_DELTA_SECS
+        if slower:
+            regressions.append(key)
+        flag = '  SLOWER' if slower else ('  faster' if change < -threshold and before - after > MIN_DELTA_SECS else '')
+        print(f"{key[0]:>8,} {key[1]:<13} {key[2]:<10} {before:>8.3f}s {after:>8.3f}s {change:>+7.0%}{flag}")
+
+    print(f"\n{len(regressions)} of {len(old.keys() & cur.keys())} stages slower by more than {threshold:.0%}")
+    return regressions
+
+
+# --- MAIN ---
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES, help='Matches per dataset')
+    parser.add_argument('--analyses', nargs='+', choices=list(ANALYSES))
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--out', help='Results JSON (default: benchmarks/results/<timestamp>.json)')
+    parser.add_argument('--tracemalloc', action='store_true',
+                        help='Also record peak traced allocations (a second, slower run)')
+    parser.add_argument('--compare', nargs='+', metavar='JSON',
+                        help='BASE: compare this run against BASE; BASE NEW: compare two saved runs')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD)
+    args = parser.parse_args()
+
+    if args.compare and len(args.compare) == 2:
+        with open(args.compare[0]) as f_base, open(args.compare[1]) as f_new:
+            sys.exit(1 if compare(json.load(f_base), json.load(f_new), args.threshold) else 0)
+
+    trace = args.tracemalloc
+    print(f"{'':<2}{'Analysis':<13} {'Stage':<10} {'Time':>22} {'Peak alloc':>12} {'RSS HWM':>9}")
+    run = {'meta': metadata(args.sizes, args.seed, trace),
+           'results': run_suite(args.sizes, args.seed, args.analyses, trace, args.data_dir)}
+
+    out = args.out or os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump(run, f, indent=1)
+    print(f"\nResults written to {out}")
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            sys.exit(1 if compare(json.load(f), run, args.threshold) else 0)
+
+
+if __name__ == '__main__':
+    main()
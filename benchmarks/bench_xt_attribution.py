@@ -0,0 +1,132 @@
+"""
+Benchmark: vectorized xT attribution vs the original iloc loop.
+
+Usage:
+    python benchmarks/bench_xt_attribution.py --rows 1000000
+
+The original loop is far too slow to run on a million events in a reasonable
+time, so by default it is timed on the first --loop-rows events and the result
+is extrapolated linearly (the loop is O(n)). Pass --full-loop to time it on the
+whole dataset instead.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from xt_engine import attribute_xt, threat_value  # noqa: E402
+
+EVENTS = ['Pass', 'Reception', 'Dribble', 'Cross', 'Shot', 'Interception']
+EVENT_WEIGHTS = [0.40, 0.30, 0.15, 0.05, 0.03, 0.07]
+
+
+# --- SYNTHETIC DATA ---
+
+def make_events(n_rows, seed=42):
+    """Random event log shaped like the generator output (many matches, both teams)."""
+    rng = np.random.default_rng(seed)
+    events_per_match = 1500
+
+    # Possession spells of 1-8 events, alternating between teams
+    spells = rng.integers(1, 9, size=n_rows // 2 + 1)
+    team_idx = np.repeat(np.arange(len(spells)) % 2, spells)[:n_rows]
+
+    row = np.arange(n_rows)
+    match_no = row // events_per_match
+    period = np.where((row % events_per_match) < events_per_match // 2, 1, 2)
+
+    return pd.DataFrame({
+        'MatchID': np.char.add('match_', match_no.astype(str)),
+        'Period': period,
+        'Team': np.where(team_idx == 0, 'Home', 'Away'),
+        'Player': np.char.add(np.where(team_idx == 0, 'H', 'A'), rng.integers(1, 12, n_rows).astype(str)),
+        'Event': rng.choice(EVENTS, size=n_rows, p=EVENT_WEIGHTS),
+        'X': rng.uniform(0, 100, n_rows).round(1),
+        'Y': rng.uniform(0, 100, n_rows).round(1),
+    })
+
+
+# --- ORIGINAL IMPLEMENTATION (from 04_player_xt.py) ---
+
+def legacy_player_scores(df, team_name):
+    player_scores = {}
+    for i in range(len(df) - 1):
+        curr_event = df.iloc[i]
+        next_event = df.iloc[i+1]
+
+        if curr_event['Team'] != team_name:
+            continue
+
+        if next_event['Team'] == team_name and curr_event['Period'] == next_event['Period']:
+            start_threat = threat_value(curr_event['X'], curr_event['Y'])
+            end_threat = threat_value(next_event['X'], next_event['Y'])
+            xt_added = end_threat - start_threat
+
+            if xt_added > 0:
+                p = curr_event['Player']
+                if p not in player_scores:
+                    player_scores[p] = {'Pass': 0.0, 'Carry': 0.0}
+                if curr_event['Event'] in ['Pass', 'Cross']:
+                    player_scores[p]['Pass'] += xt_added
+                elif curr_event['Event'] in ['Dribble']:
+                    player_scores[p]['Carry'] += xt_added
+    return player_scores
+
+
+def check_agreement(df, team_name):
+    """Vectorized totals must match the loop on a single-match slice."""
+    legacy = legacy_player_scores(df, team_name)
+    board = attribute_xt(df, teams=[team_name]).set_index('Player')
+
+    assert set(legacy) == set(board.index), "player sets differ"
+    for player, scores in legacy.items():
+        assert np.isclose(scores['Pass'], board.at[player, 'Pass xT'])
+        assert np.isclose(scores['Carry'], board.at[player, 'Carry xT'])
+
+
+# --- MAIN ---
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--loop-rows', type=int, default=20_000,
+                        help='Events timed with the original loop before extrapolating')
+    parser.add_argument('--full-loop', action='store_true',
+                        help='Time the original loop on every event (slow)')
+    args = parser.parse_args()
+
+    df = make_events(args.rows)
+    print(f"Synthetic events: {len(df):,} across {df['MatchID'].nunique():,} matches")
+
+    # Correctness on one match (the loop has no MatchID check)
+    one_match = df[df['MatchID'] == df['MatchID'].iloc[0]].reset_index(drop=True)
+    for team in ['Home', 'Away']:
+        check_agreement(one_match, team)
+    print("Vectorized totals match the original loop.")
+
+    # Vectorized: both teams, every match, one call
+    t0 = time.perf_counter()
+    board = attribute_xt(df)
+    vec_secs = time.perf_counter() - t0
+    print(f"Vectorized (both teams, all matches): {vec_secs:.3f}s -> {len(board)} player rows")
+
+    # Original loop: one team per pass over the data, so run it twice
+    loop_rows = len(df) if args.full_loop else min(args.loop_rows, len(df))
+    sample = df.iloc[:loop_rows]
+    t0 = time.perf_counter()
+    for team in ['Home', 'Away']:
+        legacy_player_scores(sample, team)
+    sample_secs = time.perf_counter() - t0
+    loop_secs = sample_secs * len(df) / loop_rows
+
+    label = "measured" if loop_rows == len(df) else f"extrapolated from {loop_rows:,} rows"
+    print(f"Original iloc loop (both teams): {loop_secs:.1f}s ({label})")
+    print(f"Speed-up: {loop_secs / vec_secs:,.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,15 @@
 import pandas as pd
 import random
 import os
+import sys
+
+# --- HIGH-VOLUME MODE ---
+# Any CLI argument (e.g. --matches 1000 --seed 7 --format parquet) hands over to
+# the vectorized, seedable simulator, which generates both periods of N matches.
+if __name__ == '__main__' and len(sys.argv) > 1:
+    import simulator
+    simulator.main(sys.argv[1:])
+    sys.exit()
 
 # --- CONFIGURATION ---
 MATCH_ID = "match_1768464395999"
@@ -1,67 +1,118 @@
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.cm as cm
 import matplotlib.colors as mcolors
-from mplsoccer import Pitch
+from event_store import load_events
+from instrument import timed
+import render_tiers
+from render_tiers import save
+import heatmap_engine
 
 # --- CONFIGURATION ---
-CSV_FILE = 'data/full_match_data.csv' 
+CSV_FILE = 'data/full_match_data.csv'
 OUTPUT_IMAGE = 'output/heatmap_lincoln_vs_eastern.png'
 TEAM_NAME = 'Home'  # Select which team's data to display
+COLUMNS = ['Team', 'X', 'Y']
+
+# 'kde' = seaborn KDE (smooth, slow on big data), 'hist' = binned grid (fast)
+HEATMAP_METHOD = 'kde'
+# 'hist' method grid: the engine's, so streamed (chunked.py) and cached
+# season grids bin the same way
+HIST_BINS = heatmap_engine.BINS    # X bins, Y bins
+HIST_SIGMA = heatmap_engine.SIGMA  # Gaussian smoothing of the binned grid (0 = none)
 
-# 1. LOAD DATA
-try:
-    df = pd.read_csv(CSV_FILE)
-    print(f"Successfully loaded {len(df)} rows from {CSV_FILE}")
-except FileNotFoundError:
-    print(f"Error: Could not find {CSV_FILE}. Make sure the data file exists.")
-    exit()
 
 # 2. DATA PREPROCESSING
-# Filter for the specific team
-df_filtered = df[df['Team'] == TEAM_NAME].copy()
-
-# Ensure X and Y are numbers
-df_filtered['X'] = pd.to_numeric(df_filtered['X'], errors='coerce')
-df_filtered['Y'] = pd.to_numeric(df_filtered['Y'], errors='coerce')
-
-# Drop missing values
-df_filtered = df_filtered.dropna(subset=['X', 'Y'])
-
-print(f"Plotting heatmap for {TEAM_NAME} ({len(df_filtered)} events)...")
-
-# 3. SETUP THE PITCH
-pitch = Pitch(pitch_type='opta', pitch_color='white', line_color='black', line_zorder=2)
-fig, ax = pitch.draw(figsize=(10, 7))
-
-# 4. PLOT THE HEATMAP
-# Choose color based on team (Optional: customize as needed)
-cmap_name = 'Reds' if TEAM_NAME == 'Home' else 'Blues'
-
-kde = pitch.kdeplot(
-    df_filtered.X,
-    df_filtered.Y,
-    fill=True,
-    thresh=0.05,    
-    n_levels=100,   
-    cmap=cmap_name,
-    alpha=0.8,      
-    ax=ax
-)
-
-# 5. ADD INTENSITY BAR
-norm = mcolors.Normalize(vmin=0, vmax=1)
-sm = cm.ScalarMappable(cmap=cmap_name, norm=norm)
-sm.set_array([]) 
-
-cbar = plt.colorbar(sm, ax=ax, fraction=0.046, pad=0.04)
-cbar.set_label('Action Density', fontsize=12)
-
-# 6. TITLES AND LABELS
-# --- UPDATED TITLE HERE ---
-ax.set_title("Lincoln FC vs Easter FC Heatmap", fontsize=18, fontweight='bold', pad=20)
-
-# 7. SAVE & SHOW
-plt.savefig(OUTPUT_IMAGE, dpi=300, bbox_inches='tight')
-print(f"Heatmap saved as {OUTPUT_IMAGE}")
-plt.show()
\ No newline at end of file
+@timed('compute')
+def prepare(df, team_name=TEAM_NAME):
+    # Filter for the specific team
+    df_filtered = df[df['Team'] == team_name].copy()
+
+    # Ensure X and Y are numbers
+    df_filtered['X'] = pd.to_numeric(df_filtered['X'], errors='coerce')
+    df_filtered['Y'] = pd.to_numeric(df_filtered['Y'], errors='coerce')
+
+    # Drop missing values
+    df_filtered = df_filtered.dropna(subset=['X', 'Y'])
+
+    if df_filtered.empty:
+        return None
+    return df_filtered
+
+
+@timed('render')
+def render(df_filtered, team_name=TEAM_NAME, output_image=OUTPUT_IMAGE,
+           method=HEATMAP_METHOD, bins=HIST_BINS, sigma=HIST_SIGMA):
+    # `df_filtered` is the event rows, or (hist method only) a precomputed
+    # count grid such as heatmap_engine.season_grid()
+    is_grid = isinstance(df_filtered, np.ndarray)
+    n_events = int(df_filtered.sum()) if is_grid else len(df_filtered)
+    print(f"Plotting heatmap for {team_name} ({n_events} events)...")
+
+    # 3. SETUP THE PITCH
+    # mplsoccer is imported here, not at module top, so that scout.py / cache
+    # hits which never draw do not pay for it
+    from mplsoccer import Pitch
+    pitch = Pitch(pitch_type='opta', pitch_color='white', line_color='black', line_zorder=2)
+    fig, ax = pitch.draw(figsize=(10, 7))
+
+    # 4. PLOT THE HEATMAP
+    # Choose color based on team (Optional: customize as needed)
+    cmap_name = 'Reds' if team_name == 'Home' else 'Blues'
+
+    if method == 'hist':
+        # Binned counts, smoothed and scaled to 0-1 to match the intensity bar
+        grid = df_filtered if is_grid else heatmap_engine.bin_grid(df_filtered.X, df_filtered.Y, bins)
+        grid = heatmap_engine.smooth(grid, sigma)
+        if grid.max() > 0:
+            grid = grid / grid.max()
+        stats = heatmap_engine.to_bin_statistic(pitch, grid)
+        pitch.heatmap(stats, ax=ax, cmap=cmap_name, vmin=0, vmax=1, alpha=0.8, zorder=1)
+    else:
+        kde = pitch.kdeplot(
+            df_filtered.X,
+            df_filtered.Y,
+            fill=True,
+            thresh=0.05,
+            n_levels=100,
+            gridsize=render_tiers.setting('kde_gridsize'),  # Coarser for previews
+            cmap=cmap_name,
+            alpha=0.8,
+            ax=ax
+        )
+
+    # 5. ADD INTENSITY BAR
+    norm = mcolors.Normalize(vmin=0, vmax=1)
+    sm = cm.ScalarMappable(cmap=cmap_name, norm=norm)
+    sm.set_array([])
+
+    cbar = plt.colorbar(sm, ax=ax, fraction=0.046, pad=0.04)
+    cbar.set_label('Action Density', fontsize=12)
+
+    # 6. TITLES AND LABELS
+    # --- UPDATED TITLE HERE ---
+    ax.set_title("Lincoln FC vs Easter FC Heatmap", fontsize=18, fontweight='bold', pad=20)
+
+    # 7. SAVE
+    output_image = save(fig, output_image, bbox_inches='tight')
+    print(f"Heatmap saved as {output_image}")
+    return fig
+
+
+if __name__ == '__main__':
+    # 1. LOAD DATA
+    try:
+        df = load_events(CSV_FILE, columns=COLUMNS)
+        print(f"Successfully loaded {len(df)} rows from {CSV_FILE}")
+    except FileNotFoundError:
+        print(f"Error: Could not find {CSV_FILE}. Make sure the data file exists.")
+        exit()
+
+    df_filtered = prepare(df, TEAM_NAME)
+    if df_filtered is None:
+        print(f"No events found for {TEAM_NAME}.")
+        exit()
+
+    render(df_filtered, TEAM_NAME, OUTPUT_IMAGE)
+    plt.show()
@@ -1,12 +1,14 @@
-import pandas as pd
 import matplotlib.pyplot as plt
-from mplsoccer import PyPizza
+from event_store import load_events
+from instrument import timed
+from render_tiers import save
 
 # --- CONFIGURATION ---
 CSV_FILE = 'data/full_match_data.csv'  # Linked to the generator output
 OUTPUT_IMAGE = 'output/radar_chart_attack_defense.png'
 # Choose a player likely to have mixed actions (e.g., a midfielder like H6, H8, A6, A8)
-TARGET_PLAYER = 'H8'  
+TARGET_PLAYER = 'H8'
+COLUMNS = ['Player', 'Event']
 
 # Colors
 ATTACK_COLOR = "#ef4444" # Red
@@ -14,47 +16,49 @@ DEFENSE_COLOR = "#3b82f6" # Blue
 BG_COLOR = "#1A1A1D"
 TEXT_COLOR = "white"
 
-# 1. LOAD DATA
-try:
-    df = pd.read_csv(CSV_FILE)
-    print(f"Loaded {len(df)} rows.")
-except FileNotFoundError:
-    print(f"Error: Could not find {CSV_FILE}. Run the generator first.")
-    exit()
+# Based on the events the generator produces:
+attack_events = ['Pass', 'Dribble', 'Reception', 'Cross', 'Shot']
+defense_events = ['Interception'] # The generator primarily uses interceptions for defense
 
-# 2. FILTER FOR PLAYER
-player_df = df[df['Player'] == TARGET_PLAYER].copy()
 
-if player_df.empty:
-    print(f"Error: No data found for player {TARGET_PLAYER}. Check player ID.")
-    exit()
+# 2. FILTER FOR PLAYER & 3. CALCULATE
+@timed('compute')
+def prepare(df, target_player=TARGET_PLAYER):
+    player_df = df[df['Player'] == target_player].copy()
 
-print(f"Analyzing {len(player_df)} events for {TARGET_PLAYER}...")
+    if player_df.empty:
+        return None
 
-# 3. DEFINE CATEGORIES & CALCULATE
-# Based on the events the generator produces:
-attack_events = ['Pass', 'Dribble', 'Reception', 'Cross', 'Shot']
-defense_events = ['Interception'] # The generator primarily uses interceptions for defense
+    print(f"Analyzing {len(player_df)} events for {target_player}...")
+
+    # Count every event type in one pass (see player_profiles.py for all players at once)
+    counts = player_df['Event'].value_counts()
+
+    params = []
+    values = []
+    slice_colors = []
+
+    # --- Attacking Loop ---
+    for event in attack_events:
+        params.append(event)
+        values.append(int(counts.get(event, 0)))
+        slice_colors.append(ATTACK_COLOR)
 
-params = []
-values = []
-slice_colors = []
+    # --- Defensive Loop ---
+    for event in defense_events:
+        # Use abbreviation for chart neatness
+        label = "Interc." if event == "Interception" else event
+        params.append(label)
+        values.append(int(counts.get(event, 0)))
+        slice_colors.append(DEFENSE_COLOR)
 
-# --- Attacking Loop ---
-for event in attack_events:
-    count = len(player_df[player_df['Event'] == event])
-    params.append(event)
-    values.append(count)
-    slice_colors.append(ATTACK_COLOR)
+    return {'params': params, 'values': values, 'slice_colors': slice_colors}
 
-# --- Defensive Loop ---
-for event in defense_events:
-    count = len(player_df[player_df['Event'] == event])
-    # Use abbreviation for chart neatness
-    label = "Interc." if event == "Interception" else event
-    params.append(label)
-    values.append(count)
-    slice_colors.append(DEFENSE_COLOR)
+
+# Event counts from several matches simply add up
+def merge(partials):
+    values = [sum(counts) for counts in zip(*(p['values'] for p in partials))]
+    return {**partials[0], 'values': values}
 
 
 # 4. SETUP PIZZA CHART
@@ -63,69 +67,94 @@ def get_max_range(val):
     # Ensure minimum scale of 5, otherwise scale to value + padding
     return max(val + 2, 5)
 
-max_range = [get_max_range(v) for v in values]
-min_range = [0] * len(params)
-
-# Create the Pizza object
-pizza = PyPizza(
-    params=params,
-    min_range=min_range,
-    max_range=max_range,
-    background_color=BG_COLOR,
-    straight_line_color=TEXT_COLOR,
-    last_circle_lw=1,
-    other_circle_lw=1,
-    inner_circle_size=20
-)
-
-# 5. DRAW CHART
-fig, ax = pizza.make_pizza(
-    values,
-    figsize=(8, 8),
-    param_location=110,
-    # Here we pass the list of colors instead of a single color
-    kwargs_slices=dict(
-        facecolor=slice_colors, 
-        edgecolor=BG_COLOR,
-        linewidth=2,
-        zorder=2
-    ),
-    kwargs_params=dict(
-        color=TEXT_COLOR, 
-        fontsize=11,
-        fontweight='bold',
-        va="center"
-    ),
-    kwargs_values=dict(
-        color=TEXT_COLOR, 
-        fontsize=10,
-        fontweight='bold',
-        # We use a neutral background for values to ensure readability over red/blue
-        bbox=dict(edgecolor=TEXT_COLOR, facecolor="#333333", boxstyle="round,pad=0.2", lw=1),
-        zorder=3
+
+@timed('render')
+def render(data, target_player=TARGET_PLAYER, output_image=OUTPUT_IMAGE):
+    params, values, slice_colors = data['params'], data['values'], data['slice_colors']
+
+    # Fixed scale when given (e.g. 0-100 for percentile profiles)
+    max_range = data.get('max_range') or [get_max_range(v) for v in values]
+    min_range = [0] * len(params)
+
+    # Create the Pizza object
+    from mplsoccer import PyPizza
+    pizza = PyPizza(
+        params=params,
+        min_range=min_range,
+        max_range=max_range,
+        background_color=BG_COLOR,
+        straight_line_color=TEXT_COLOR,
+        last_circle_lw=1,
+        other_circle_lw=1,
+        inner_circle_size=20
+    )
+
+    # 5. DRAW CHART
+    fig, ax = pizza.make_pizza(
+        values,
+        figsize=(8, 8),
+        param_location=110,
+        # Here we pass the list of colors instead of a single color
+        kwargs_slices=dict(
+            facecolor=slice_colors,
+            edgecolor=BG_COLOR,
+            linewidth=2,
+            zorder=2
+        ),
+        kwargs_params=dict(
+            color=TEXT_COLOR,
+            fontsize=11,
+            fontweight='bold',
+            va="center"
+        ),
+        kwargs_values=dict(
+            color=TEXT_COLOR,
+            fontsize=10,
+            fontweight='bold',
+            # We use a neutral background for values to ensure readability over red/blue
+            bbox=dict(edgecolor=TEXT_COLOR, facecolor="#333333", boxstyle="round,pad=0.2", lw=1),
+            zorder=3
+        )
+    )
+
+    # 6. TITLES & LEGEND
+    # Main Title
+    fig.text(
+        0.515, 0.97, f"{target_player} - Action Profile",
+        size=20, ha="center", color=TEXT_COLOR, fontweight='bold'
+    )
+
+    # Subtitle/Legend
+    fig.text(
+        0.515, 0.93,
+        "■ Attacking Actions  |  ■ Defensive Actions",
+        size=12, ha="center", color="#94a3b8", fontweight='bold'
     )
-)
-
-# 6. TITLES & LEGEND
-# Main Title
-fig.text(
-    0.515, 0.97, f"{TARGET_PLAYER} - Action Profile", 
-    size=20, ha="center", color=TEXT_COLOR, fontweight='bold'
-)
-
-# Subtitle/Legend
-fig.text(
-    0.515, 0.93, 
-    "■ Attacking Actions  |  ■ Defensive Actions", 
-    size=12, ha="center", color="#94a3b8", fontweight='bold'
-)
-# Manually color the legend squares in the subtitle text using coordinates isn't easiest in matplotlib text.
-# A simpler way is to add colored text bits:
-fig.text(0.35, 0.93, "■", size=12, ha="center", color=ATTACK_COLOR)
-fig.text(0.61, 0.93, "■", size=12, ha="center", color=DEFENSE_COLOR)
-
-
-# 7. SAVE
-plt.savefig(OUTPUT_IMAGE, dpi=300, bbox_inches='tight', facecolor=BG_COLOR)
-print(f"Attacking/Defensive Radar Chart saved as {OUTPUT_IMAGE}")
-plt.show()
\ No newline at end of file
+    # Manually color the legend squares in the subtitle text using coordinates isn't easiest in matplotlib text.
+    # A simpler way is to add colored text bits:
+    fig.text(0.35, 0.93, "■", size=12, ha="center", color=ATTACK_COLOR)
+    fig.text(0.61, 0.93, "■", size=12, ha="center", color=DEFENSE_COLOR)
+
+
+    # 7. SAVE
+    output_image = save(fig, output_image, bbox_inches='tight', facecolor=BG_COLOR)
+    print(f"Attacking/Defensive Radar Chart saved as {output_image}")
+    return fig
+
+
+if __name__ == '__main__':
+    # 1. LOAD DATA
+    try:
+        df = load_events(CSV_FILE, columns=COLUMNS)
+        print(f"Loaded {len(df)} rows.")
+    except FileNotFoundError:
+        print(f"Error: Could not find {CSV_FILE}. Run the generator first.")
+        exit()
+
+    data = prepare(df, TARGET_PLAYER)
+    if data is None:
+        print(f"Error: No data found for player {TARGET_PLAYER}. Check player ID.")
+        exit()
+
+    render(data, TARGET_PLAYER, OUTPUT_IMAGE)
+    plt.show()
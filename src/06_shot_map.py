@@ -1,89 +1,174 @@
-import pandas as pd
+import numpy as np
 import matplotlib.pyplot as plt
-from mplsoccer import VerticalPitch
 from matplotlib.lines import Line2D
+from event_store import load_events
+from instrument import timed
+from render_tiers import save
 
 # --- CONFIGURATION ---
 CSV_FILE = 'data/full_match_data.csv'  # Linked to the generator output
 OUTPUT_IMAGE = 'output/shot_map_outcomes.png'
 TEAM_NAME = 'Home'             # Change to 'Home' or 'Away'
+COLUMNS = ['Team', 'Player', 'Event', 'Qualifier', 'X', 'Y']
+SIZE_BY_XG = False             # Scale markers by each shot's xG
+GRID_BY = None                 # 'Team' or 'Player' = one small-multiple panel each
+# half=True zooms in on the attacking half (better for shot maps)
+PITCH_KWARGS = dict(pitch_type='opta', half=True, pitch_color='#f5f5f5', line_color='#d3d3d3', line_zorder=1)
+
+# One vectorized scatter per outcome; keys are the Qualifier values
+SHOT_STYLES = {
+    'Goal':       dict(s=600, marker='*', color='gold', edgecolor='black', zorder=3),
+    'Saved':      dict(s=300, marker='o', color='#3b82f6', edgecolor='white', alpha=0.9, zorder=2),
+    'Off Target': dict(s=300, marker='x', color='#ef4444', linewidth=3, alpha=0.8, zorder=2),
+    'Blocked':    dict(s=300, marker='s', color='#64748b', edgecolor='white', alpha=0.8, zorder=2),
+}
 
-# 1. LOAD DATA
-try:
-    df = pd.read_csv(CSV_FILE)
-    print(f"Loaded {len(df)} rows from {CSV_FILE}")
-except FileNotFoundError:
-    print(f"Error: Could not find {CSV_FILE}. Run the generator first.")
-    exit()
 
 # 2. FILTER FOR SHOTS
-# In the new generator, all shots are labeled "Shot" in the Event column
-df_shots = df[df['Event'] == 'Shot'].copy()
+@timed('compute')
+def prepare(df, team_name=TEAM_NAME):
+    # In the new generator, all shots are labeled "Shot" in the Event column
+    df_shots = df[df['Event'] == 'Shot'].copy()
 
-# Filter for the specific team
-df_shots = df_shots[df_shots['Team'] == TEAM_NAME]
+    # Filter for the specific team
+    df_shots = df_shots[df_shots['Team'] == team_name]
 
-if df_shots.empty:
-    print(f"No shots found for {TEAM_NAME} team.")
-    exit()
+    if df_shots.empty:
+        return None
+    return df_shots
 
-# 3. SETUP THE PITCH
-# half=True zooms in on the attacking half (better for shot maps)
-pitch = VerticalPitch(pitch_type='opta', half=True, pitch_color='#f5f5f5', 
-                      line_color='#d3d3d3', line_zorder=1)
-fig, ax = pitch.draw(figsize=(10, 8))
-
-# 4. PLOT SHOTS BY OUTCOME
-# We iterate through the shots and choose markers based on the 'Qualifier'
-for _, row in df_shots.iterrows():
-    
-    # CASE 1: GOAL
-    if row['Qualifier'] == 'Goal':
-        pitch.scatter(
-            x=row['X'], y=row['Y'], ax=ax, 
-            s=600, marker='*', color='gold', edgecolor='black', zorder=3, label='Goal'
-        )
-    
-    # CASE 2: SAVED
-    elif row['Qualifier'] == 'Saved':
-        pitch.scatter(
-            x=row['X'], y=row['Y'], ax=ax, 
-            s=300, marker='o', color='#3b82f6', edgecolor='white', alpha=0.9, zorder=2
-        )
-
-    # CASE 3: OFF TARGET
-    elif row['Qualifier'] == 'Off Target':
-        pitch.scatter(
-            x=row['X'], y=row['Y'], ax=ax, 
-            s=300, marker='x', color='#ef4444', linewidth=3, alpha=0.8, zorder=2
-        )
-        
-    # CASE 4: BLOCKED
-    elif row['Qualifier'] == 'Blocked':
-        pitch.scatter(
-            x=row['X'], y=row['Y'], ax=ax, 
-            s=300, marker='s', color='#64748b', edgecolor='white', alpha=0.8, zorder=2
-        )
-
-# 5. LEGEND & STATS
-# Custom legend
-legend_elements = [
-    Line2D([0], [0], marker='*', color='w', label='Goal', markerfacecolor='gold', markersize=18, markeredgecolor='black'),
-    Line2D([0], [0], marker='o', color='w', label='Saved', markerfacecolor='#3b82f6', markersize=12, markeredgecolor='white'),
-    Line2D([0], [0], marker='x', color='w', label='Off Target', markeredgecolor='#ef4444', markersize=12, markeredgewidth=2),
-    Line2D([0], [0], marker='s', color='w', label='Blocked', markerfacecolor='#64748b', markersize=12, markeredgecolor='white'),
-]
-
-ax.legend(handles=legend_elements, loc='lower center', ncol=4, fontsize=10, frameon=True, facecolor='white', framealpha=0.9)
-
-# Summary Title
-total_shots = len(df_shots)
-goals = len(df_shots[df_shots['Qualifier'] == 'Goal'])
-team_label = "Lincoln FC" if TEAM_NAME == 'Home' else "Easter FC"
-
-ax.set_title(f"{team_label} - Shot Map\n{goals} Goals / {total_shots} Shots", fontsize=18, fontweight='bold', color='#1e293b', pad=20)
-
-# 6. SAVE
-plt.savefig(OUTPUT_IMAGE, dpi=300, bbox_inches='tight')
-print(f"Shot Map saved as {OUTPUT_IMAGE}")
-plt.show()
\ No newline at end of file
+
+# --- xG FOR MARKER SIZES ---
+
+def estimate_xg(x, y):
+    """
+    Rough xG from shot distance and goal-mouth angle (logistic model) for
+    data without an xG column. Opta coordinates, attacking towards X=100.
+    """
+    dx = (100 - np.asarray(x, dtype=np.float64)) * 1.05   # 105m x 68m pitch
+    dy = (np.asarray(y, dtype=np.float64) - 50) * 0.68
+    distance = np.hypot(dx, dy)
+    half_goal = 7.32 / 2
+    angle = np.arctan2(2 * half_goal * dx, dx ** 2 + dy ** 2 - half_goal ** 2)
+    angle = np.where(angle < 0, angle + np.pi, angle)
+    return 1 / (1 + np.exp(-(-1.1 + 1.5 * angle - 0.09 * distance)))
+
+
+def shot_xg(df_shots):
+    if 'xG' in df_shots.columns:
+        return df_shots['xG'].to_numpy(dtype=np.float64)
+    return estimate_xg(df_shots['X'], df_shots['Y'])
+
+
+# --- DRAWING ---
+
+def draw_shots(pitch, ax, df_shots, size_by_xg=SIZE_BY_XG):
+    """One scatter call per outcome class instead of one per shot."""
+    xg = shot_xg(df_shots) if size_by_xg else None
+    qualifier = df_shots['Qualifier'].to_numpy()
+    for outcome, style in SHOT_STYLES.items():
+        mask = qualifier == outcome
+        if not mask.any():
+            continue
+        style = dict(style)
+        if xg is not None:
+            # Marker area proportional to xG (0.5 xG = the default size)
+            style['s'] = np.maximum(style['s'] * 2 * xg[mask], 30)
+        pitch.scatter(df_shots['X'].to_numpy()[mask], df_shots['Y'].to_numpy()[mask], ax=ax, **style)
+
+
+def legend_elements():
+    return [
+        Line2D([0], [0], marker='*', color='w', label='Goal', markerfacecolor='gold', markersize=18, markeredgecolor='black'),
+        Line2D([0], [0], marker='o', color='w', label='Saved', markerfacecolor='#3b82f6', markersize=12, markeredgecolor='white'),
+        Line2D([0], [0], marker='x', color='w', label='Off Target', markeredgecolor='#ef4444', markersize=12, markeredgewidth=2),
+        Line2D([0], [0], marker='s', color='w', label='Blocked', markerfacecolor='#64748b', markersize=12, markeredgecolor='white'),
+    ]
+
+
+def shot_summary(df_shots):
+    goals = int((df_shots['Qualifier'] == 'Goal').sum())
+    return f"{goals} Goals / {len(df_shots)} Shots"
+
+
+def make_pitch():
+    from mplsoccer import VerticalPitch
+    return VerticalPitch(**PITCH_KWARGS)
+
+
+@timed('render')
+def render(df_shots, team_name=TEAM_NAME, output_image=OUTPUT_IMAGE, size_by_xg=SIZE_BY_XG):
+    # 3. SETUP THE PITCH
+    pitch = make_pitch()
+    fig, ax = pitch.draw(figsize=(10, 8))
+
+    # 4. PLOT SHOTS BY OUTCOME
+    draw_shots(pitch, ax, df_shots, size_by_xg)
+
+    # 5. LEGEND & STATS
+    ax.legend(handles=legend_elements(), loc='lower center', ncol=4, fontsize=10, frameon=True, facecolor='white', framealpha=0.9)
+
+    # Summary Title
+    team_label = "Lincoln FC" if team_name == 'Home' else "Easter FC"
+    ax.set_title(f"{team_label} - Shot Map\n{shot_summary(df_shots)}", fontsize=18, fontweight='bold', color='#1e293b', pad=20)
+
+    # 6. SAVE
+    output_image = save(fig, output_image, bbox_inches='tight')
+    print(f"Shot Map saved as {output_image}")
+    return fig
+
+
+@timed('render')
+def render_grid(df, by=GRID_BY, targets=None, output_image=OUTPUT_IMAGE, ncols=4, size_by_xg=SIZE_BY_XG):
+    """
+    Small multiples: one half-pitch per team or player (`by` is 'Team' or
+    'Player'), drawn and saved in a single figure. Returns fig, or None if
+    none of the targets took a shot.
+    """
+    df_shots = df[df['Event'] == 'Shot']
+    if targets is None:
+        targets = sorted(df_shots[by].dropna().unique())
+    groups = {name: group for name, group in df_shots.groupby(by, observed=True) if name in set(targets)}
+    targets = [t for t in targets if t in groups]
+    if not targets:
+        return None
+
+    ncols = min(ncols, len(targets))
+    nrows = -(-len(targets) // ncols)
+    pitch = make_pitch()
+    fig, axs = pitch.draw(nrows=nrows, ncols=ncols, figsize=(4 * ncols, 3.6 * nrows))
+    axs = np.atleast_1d(axs).ravel()
+
+    for ax, target in zip(axs, targets):
+        draw_shots(pitch, ax, groups[target], size_by_xg)
+        ax.set_title(f"{target}\n{shot_summary(groups[target])}", fontsize=11, fontweight='bold', color='#1e293b')
+    for ax in axs[len(targets):]:
+        ax.remove()
+
+    fig.legend(handles=legend_elements(), loc='upper center', bbox_to_anchor=(0.5, 0), ncol=4, fontsize=10, frameon=False)
+    output_image = save(fig, output_image, bbox_inches='tight')
+    print(f"Shot Map grid ({len(targets)} panels) saved as {output_image}")
+    return fig
+
+
+if __name__ == '__main__':
+    # 1. LOAD DATA
+    try:
+        df = load_events(CSV_FILE, columns=COLUMNS)
+        print(f"Loaded {len(df)} rows from {CSV_FILE}")
+    except FileNotFoundError:
+        print(f"Error: Could not find {CSV_FILE}. Run the generator first.")
+        exit()
+
+    if GRID_BY is not None:
+        # Small multiples for every team / player in one figure
+        if render_grid(df, GRID_BY, output_image=OUTPUT_IMAGE) is None:
+            print("No shots found.")
+            exit()
+    else:
+        df_shots = prepare(df, TEAM_NAME)
+        if df_shots is None:
+            print(f"No shots found for {TEAM_NAME} team.")
+            exit()
+        render(df_shots, TEAM_NAME, OUTPUT_IMAGE)
+    plt.show()
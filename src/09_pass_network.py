@@ -0,0 +1,214 @@
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+from event_store import load_events
+from instrument import timed
+from render_tiers import save
+from possessions import same_segment
+
+# --- CONFIGURATION ---
+CSV_FILE = 'data/full_match_data.csv'
+OUTPUT_IMAGE = 'output/pass_network.png'
+TEAM_NAME = 'Home'  # Change to 'Home' (Lincoln) or 'Away' (Easter)
+COLUMNS = ['MatchID', 'Period', 'Team', 'Player', 'Event', 'X', 'Y']
+MIN_PASSES = 2      # Links drawn only with at least this many passes per match
+DAMPING = 0.85      # PageRank damping factor
+ITERATIONS = 200    # Power iteration limit (eigenvector / PageRank)
+TOLERANCE = 1e-10
+
+
+# 2. PASS LINKS (one sparse passer -> receiver matrix per match)
+def partial(df, team_name=TEAM_NAME):
+    # A completed pass is a 'Pass' immediately followed by a 'Reception'
+    # by a different player of the same team, in the same match and period
+    is_team = (df['Team'] == team_name).to_numpy()
+    if not is_team.any():
+        return None
+    event = df['Event']
+    is_pass = (event == 'Pass').to_numpy()
+    is_reception = (event == 'Reception').to_numpy()
+
+    players = np.array(sorted(df.loc[is_team, 'Player'].dropna().unique()), dtype=object)
+    codes = pd.Index(players).get_indexer(df['Player']).astype(np.int64)
+    codes[~is_team] = -1
+
+    link = np.zeros(len(df), dtype=bool)
+    if len(df) > 1:
+        link[:-1] = (
+            same_segment(df) & is_pass[:-1] & is_reception[1:] &
+            (codes[:-1] >= 0) & (codes[1:] >= 0) & (codes[:-1] != codes[1:])
+        )
+    passer, receiver = codes[np.flatnonzero(link)], codes[np.flatnonzero(link) + 1]
+
+    # Average position from each player's passes and receptions
+    touch = (is_pass | is_reception) & (codes >= 0)
+    n = len(players)
+    x = df['X'].to_numpy(dtype=np.float64)
+    y = df['Y'].to_numpy(dtype=np.float64)
+
+    from scipy import sparse
+    return {
+        'players': players,
+        # Duplicate (passer, receiver) entries are summed into pass counts
+        'passes': sparse.coo_matrix((np.ones(len(passer), dtype=np.int32), (passer, receiver)), shape=(n, n)).tocsr(),
+        'touches': np.bincount(codes[touch], minlength=n),
+        'x_sum': np.bincount(codes[touch], weights=x[touch], minlength=n),
+        'y_sum': np.bincount(codes[touch], weights=y[touch], minlength=n),
+        'matches': df['MatchID'].nunique() if 'MatchID' in df.columns else 1,
+    }
+
+
+# Matrices from several matches are re-indexed onto one player list and summed
+def merge(partials):
+    from scipy import sparse
+    players = np.array(sorted(set().union(*(p['players'] for p in partials))), dtype=object)
+    position = {player: i for i, player in enumerate(players)}
+    n = len(players)
+
+    passes = sparse.csr_matrix((n, n), dtype=np.int32)
+    total = {key: np.zeros(n) for key in ['touches', 'x_sum', 'y_sum']}
+    for p in partials:
+        remap = np.array([position[player] for player in p['players']], dtype=np.int64)
+        coo = p['passes'].tocoo()
+        passes = passes + sparse.csr_matrix((coo.data, (remap[coo.row], remap[coo.col])), shape=(n, n))
+        for key in total:
+            np.add.at(total[key], remap, p[key])
+    return {'players': players, 'passes': passes, **total, 'matches': sum(p['matches'] for p in partials)}
+
+
+def _power_iteration(step, n):
+    """Fixed point of `step` (vector -> vector), starting from the uniform vector."""
+    v = np.full(n, 1.0 / n)
+    for _ in range(ITERATIONS):
+        new = step(v)
+        if np.abs(new - v).sum() < TOLERANCE:
+            return new
+        v = new
+    return v
+
+
+# 3. CENTRALITY
+def centrality(passes):
+    """Per-player centrality metrics of a sparse pass-count matrix."""
+    from scipy.sparse.csgraph import shortest_path
+    counts = passes.astype(np.float64)
+    n = counts.shape[0]
+    made = np.asarray(counts.sum(axis=1)).ravel()
+    received = np.asarray(counts.sum(axis=0)).ravel()
+    links = counts + counts.T  # Passes either way between two players
+
+    # Eigenvector: well-connected players linked to other well-connected players
+    # (the identity shift keeps the iteration from oscillating)
+    def eigen_step(v):
+        w = links @ v + v
+        return w / w.sum()
+    eigenvector = _power_iteration(eigen_step, n)
+
+    # PageRank: where the ball tends to end up when it follows the passes
+    out_share = counts.multiply(1 / np.where(made > 0, made, 1)[:, None]).tocsr()
+    dangling = made == 0
+
+    def pagerank_step(v):
+        return (1 - DAMPING) / n + DAMPING * (out_share.T @ v + v[dangling].sum() / n)
+    pagerank = _power_iteration(pagerank_step, n)
+
+    # Closeness: frequent links are short, so distance = 1 / passes
+    distance = links.tocsr(copy=True)
+    distance.data = 1 / distance.data
+    paths = shortest_path(distance, directed=False)
+    reachable = np.isfinite(paths) & (paths > 0)
+    path_sum = np.where(reachable, paths, 0).sum(axis=1)
+    closeness = np.where(path_sum > 0, reachable.sum(axis=1) / np.where(path_sum > 0, path_sum, 1), 0.0)
+
+    total = counts.sum()
+    return pd.DataFrame({
+        'Passes_Made': made.astype(int),
+        'Passes_Received': received.astype(int),
+        'Involvement': (made + received) / (2 * total) if total else 0.0,
+        'Eigenvector': eigenvector,
+        'PageRank': pagerank,
+        'Closeness': closeness,
+    })
+
+
+def finalize(network, team_name=TEAM_NAME):
+    if network is None or network['passes'].nnz == 0:
+        return None
+    touches = np.maximum(network['touches'], 1)
+    nodes = centrality(network['passes'])
+    nodes.insert(0, 'Player', network['players'])
+    nodes.insert(1, 'X', network['x_sum'] / touches)
+    nodes.insert(2, 'Y', network['y_sum'] / touches)
+    nodes.insert(3, 'Touches', network['touches'].astype(int))
+    return {'nodes': nodes, 'passes': network['passes'], 'matches': network['matches']}
+
+
+@timed('compute')
+def prepare(df, team_name=TEAM_NAME):
+    return finalize(partial(df, team_name), team_name)
+
+
+@timed('render')
+def render(network, team_name=TEAM_NAME, output_image=OUTPUT_IMAGE):
+    nodes = network['nodes']
+    print(nodes.round(3).to_string(index=False))
+
+    # 4. DRAW PITCH
+    from mplsoccer import Pitch
+    pitch = Pitch(pitch_type='opta', pitch_color='#1e293b', line_color='#64748b')
+    fig, ax = pitch.draw(figsize=(12, 8))
+
+    # 5. PLOT LINKS
+    # Both directions of a pair together; width grows with the pass count
+    from scipy import sparse
+    links = sparse.triu(network['passes'] + network['passes'].T, k=1).tocoo()
+    keep = links.data >= MIN_PASSES * network['matches']
+    if keep.any():
+        a, b, count = links.row[keep], links.col[keep], links.data[keep]
+        width = 1 + 9 * count / count.max()
+        x, y = nodes['X'].to_numpy(), nodes['Y'].to_numpy()
+        for i in np.argsort(count):  # Strongest links on top
+            pitch.lines(x[a[i]], y[a[i]], x[b[i]], y[b[i]], ax=ax, color='#06b6d4',
+                        lw=width[i], alpha=0.25 + 0.6 * count[i] / count.max(), zorder=1)
+
+    # 6. PLOT PLAYERS (size = touches, colour = PageRank)
+    size = 150 + 650 * nodes['Touches'] / nodes['Touches'].max()
+    pitch.scatter(nodes['X'], nodes['Y'], s=size, c=nodes['PageRank'], cmap='YlOrRd',
+                  edgecolors='white', linewidth=1.5, ax=ax, zorder=2)
+    for _, node in nodes.iterrows():
+        pitch.annotate(node['Player'], (node['X'], node['Y']), ax=ax, va='center', ha='center',
+                       color='#0f172a', fontsize=9, fontweight='bold', zorder=3)
+
+    # 7. ANNOTATE THE HUB
+    hub = nodes.loc[nodes['PageRank'].idxmax()]
+    ax.text(50, -4, f"Hub: {hub['Player']} (PageRank {hub['PageRank']:.2f}, "
+                    f"{hub['Passes_Made']} made / {hub['Passes_Received']} received)",
+            ha='center', va='center', color='#f59e0b', fontsize=12, fontweight='bold')
+
+    team_label = "Lincoln FC" if team_name == 'Home' else "Easter FC"
+    matches = f" ({network['matches']} matches)" if network['matches'] > 1 else ''
+    ax.set_title(f"{team_label} - Pass Network{matches}", fontsize=18, fontweight='bold', color='white', pad=20)
+    fig.set_facecolor('#1e293b')
+
+    # 8. SAVE
+    output_image = save(fig, output_image, bbox_inches='tight', facecolor='#1e293b')
+    print(f"Pass Network saved as {output_image}")
+    return fig
+
+
+if __name__ == '__main__':
+    # 1. LOAD DATA
+    try:
+        df = load_events(CSV_FILE, columns=COLUMNS)
+        print(f"Loaded {len(df)} rows from {CSV_FILE}")
+    except FileNotFoundError:
+        print(f"Error: Could not find {CSV_FILE}. Run the generator first.")
+        exit()
+
+    network = prepare(df, TEAM_NAME)
+    if network is None:
+        print(f"No completed passes found for {TEAM_NAME}.")
+        exit()
+
+    render(network, TEAM_NAME, OUTPUT_IMAGE)
+    plt.show()
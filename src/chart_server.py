@@ -0,0 +1,438 @@
+"""
+Local chart server: any chart for any match, team or player over HTTP.
+
+    GET /chart/<chart>?match=<MatchID>&team=Home&player=H8&tier=preview
+    GET /charts    charts, tiers, matches, teams and players on offer
+    GET /health    request, cache and render counters
+
+<chart> is any chart in charts.py (heatmap, momentum, xt, radar, shots,
+carry, pass, network). team / player default to the chart script's
+TEAM_NAME / TARGET_PLAYER. match defaults to every match in the CSV, like
+render_all.py. tier is a render tier from render_tiers.py and defaults to
+preview. The response is the image (PNG, SVG or PDF). X-Cache says whether
+it was a cache hit, a fresh render, or a render another request had already
+started, and X-Render-Secs how long the render took.
+
+An asyncio front end parses requests and never draws. Rendering is
+CPU-bound and runs on a process pool. Every worker loads the events and the
+possession index once at start-up, imports the chart scripts, and keeps
+them for its lifetime. Identical requests that arrive while a render is
+running wait for that render instead of starting another. Finished images
+go into an in-memory LRU cache bounded to CACHE_MB.
+
+If a worker dies (killed, out of memory, a crash in native code) the pool
+is broken for good, so the server starts a new one and retries the render
+once. /health reports the pool state and how often it was restarted.
+
+Usage:
+    python src/chart_server.py --csv data/full_match_data.csv --port 8766 --workers 4
+    curl -o carry.png "http://127.0.0.1:8766/chart/carry?team=Away&tier=final"
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import multiprocessing
+import os
+import queue
+import shutil
+import signal
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from urllib.parse import parse_qs, urlsplit
+
+import render_tiers
+from charts import CHARTS
+
+# Set before anything imports matplotlib
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+# --- CONFIGURATION ---
+CSV_FILE = 'data/full_match_data.csv'
+HOST = '127.0.0.1'
+PORT = 8766
+DEFAULT_TIER = 'preview'
+CACHE_MB = 256            # In-memory result cache, least recently used out first
+MAX_REQUEST_BYTES = 16 << 10
+WARM_UP_POLL_SECS = 0.5   # warm_up() checks this often whether a worker failed to start
+# Default target of each scope, read from the chart script's configuration
+SCOPE_DEFAULTS = {'team': 'TEAM_NAME', 'player': 'TARGET_PLAYER'}
+CONTENT_TYPES = {'png': 'image/png', 'svg': 'image/svg+xml', 'pdf': 'application/pdf'}
+REASONS = {200: 'OK', 204: 'No Content', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+# --- WORKERS ---
+# Each pool process holds the event store from start-up to shutdown
+
+_EVENTS = None
+_MATCH_ROWS = None   # MatchID -> row positions
+_OUT_DIR = None      # Scratch directory images are written to and read back from
+
+
+def _init_worker(csv_path, out_dir, ready):
+    global _EVENTS, _MATCH_ROWS, _OUT_DIR
+    # Ctrl+C reaches the whole process group; the server shuts the pool down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    from event_store import load_events
+    from possessions import load_index
+    _EVENTS = load_events(csv_path).join(load_index(csv_path))
+    _MATCH_ROWS = _EVENTS.groupby('MatchID', observed=True).indices
+    _OUT_DIR = out_dir
+    for module_name, _ in CHARTS.values():
+        importlib.import_module(module_name)
+    ready.put(os.getpid())
+
+
+def _warm_up():
+    return os.getpid()
+
+
+def _render(chart, match_id, target, tier):
+    """Render one chart in this worker. Returns (status, seconds, image bytes)."""
+    from render_all import render_chart
+    events = _EVENTS if match_id is None else _EVENTS.take(_MATCH_ROWS[match_id])
+    output_image = render_tiers.output_path(os.path.join(_OUT_DIR, f"{chart}-{os.getpid()}"), tier)
+    status, secs = render_chart(events, chart, target, output_image, tier)
+    if status != 'rendered':
+        return status, secs, None
+    with open(output_image, 'rb') as f:
+        image = f.read()
+    os.remove(output_image)
+    return status, secs, image
+
+
+# --- RESULT CACHE ---
+
+class ResultCache:
+    """In-memory LRU of rendered images, bounded by total size."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()   # key -> (image, render secs)
+        self.bytes = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, image, secs):
+        if len(image) > self.max_bytes:
+            return
+        if key in self.entries:
+            self.bytes -= len(self.entries.pop(key)[0])
+        self.entries[key] = (image, secs)
+        self.bytes += len(image)
+        while self.bytes > self.max_bytes:
+            _, (old, _) = self.entries.popitem(last=False)
+            self.bytes -= len(old)
+
+
+class RequestError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# --- SERVER ---
+
+class ChartServer:
+    def __init__(self, csv_path=CSV_FILE, workers=None, cache_mb=CACHE_MB, verbose=False):
+        from event_store import load_events
+        # What can be asked for; the events themselves live in the workers
+        index = load_events(csv_path, columns=['MatchID', 'Team', 'Player'])
+        self.csv_path = csv_path
+        self.matches = [str(m) for m in index['MatchID'].dropna().unique()]
+        self.teams = sorted(str(t) for t in index['Team'].dropna().unique())
+        self.players = sorted(str(p) for p in index['Player'].dropna().unique())
+        self.defaults = {}
+        for chart, (module_name, scope) in CHARTS.items():
+            if scope != 'match':
+                self.defaults[chart] = getattr(importlib.import_module(module_name), SCOPE_DEFAULTS[scope])
+
+        self.workers = workers or os.cpu_count() or 1
+        self.out_dir = tempfile.mkdtemp(prefix='chart_server-')
+        self.pool = self._new_pool()
+        self.pool_restarts = 0
+        self.pool_error = None   # Why the pool last had to be restarted
+        self.cache = ResultCache(int(cache_mb * 2**20))
+        self.in_flight = {}   # key -> future of the render every identical request waits on
+        self.verbose = verbose
+        self.stats = {'requests': 0, 'hits': 0, 'renders': 0, 'coalesced': 0, 'errors': 0, 'render_secs': 0.0}
+        self.server = None
+
+    def _new_pool(self):
+        # Each worker's initializer reports its pid here once the events are loaded
+        self.ready = multiprocessing.Queue()
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                   initargs=(self.csv_path, self.out_dir, self.ready))
+
+    def _restart_pool(self, broken, error):
+        """Replace a broken pool (once, however many requests noticed it)."""
+        if self.pool is not broken:
+            return
+        self.pool = self._new_pool()
+        self.pool_restarts += 1
+        self.pool_error = f"{type(error).__name__}: {error}"
+        broken.shutdown(wait=False, cancel_futures=True)
+        print(f"Render pool broken ({self.pool_error}); started a new one")
+
+    def pool_state(self):
+        # _broken is set by the executor as soon as it notices a dead worker
+        return 'broken' if getattr(self.pool, '_broken', False) else 'ok'
+
+    def warm_up(self):
+        """
+        Start every worker now, so the first requests do not pay for loading.
+        Returns once every worker's initializer has finished.
+        """
+        # The pool starts a process per task it cannot hand to an idle worker;
+        # any one of them may run several of these tasks
+        futures = [self.pool.submit(_warm_up) for _ in range(self.workers)]
+        pids = set()
+        while len(pids) < self.workers:
+            try:
+                pids.add(self.ready.get(timeout=WARM_UP_POLL_SECS))
+            except queue.Empty:
+                for future in futures:
+                    if future.done():
+                        future.result()  # Raises if a worker failed to start
+        return pids
+
+    # --- CHARTS ---
+
+    def parse(self, chart, query):
+        """Validated cache key (chart, match, target, tier) for a chart request."""
+        if chart not in CHARTS:
+            raise RequestError(404, f"unknown chart {chart!r} (choose from {', '.join(CHARTS)})")
+        params = {name: values[-1] for name, values in parse_qs(query).items()}
+        tier = params.get('tier', DEFAULT_TIER)
+        if tier not in render_tiers.TIERS:
+            raise RequestError(400, f"unknown tier {tier!r} (choose from {', '.join(render_tiers.TIERS)})")
+        match_id = params.get('match') or None
+        if match_id is not None and match_id not in self.matches:
+            raise RequestError(404, f"unknown match {match_id!r}")
+
+        scope = CHARTS[chart][1]
+        target = None
+        if scope != 'match':
+            target = params.get(scope) or self.defaults[chart]
+            if target not in (self.teams if scope == 'team' else self.players):
+                raise RequestError(404, f"unknown {scope} {target!r}")
+        return chart, match_id, target, tier
+
+    async def chart(self, key):
+        """(image, render secs, how it was served) for a parsed chart request."""
+        entry = self.cache.get(key)
+        if entry is not None:
+            self.stats['hits'] += 1
+            return (*entry, 'hit')
+
+        future = self.in_flight.get(key)
+        how = 'coalesced'
+        if future is None:
+            how = 'rendered'
+            future = asyncio.ensure_future(self._render_on_pool(key))
+            self.in_flight[key] = future
+            future.add_done_callback(lambda f: self._finished(key, f))
+        else:
+            self.stats['coalesced'] += 1
+
+        # shield(): a client hanging up must not cancel a render others wait for
+        status, secs, image = await asyncio.shield(future)
+        if image is None:
+            raise RequestError(404, f"no {key[0]} data for {key[2] or 'this match'}")
+        return image, secs, how
+
+    async def _render_on_pool(self, key):
+        """_render() on the pool; if the pool is broken, on a new pool, once."""
+        loop = asyncio.get_running_loop()
+        for attempt in range(2):
+            pool = self.pool
+            try:
+                return await loop.run_in_executor(pool, _render, *key)
+            except BrokenProcessPool as e:
+                self._restart_pool(pool, e)
+                if attempt:
+                    raise
+
+    def _finished(self, key, future):
+        del self.in_flight[key]
+        if future.cancelled() or future.exception() is not None:
+            return
+        status, secs, image = future.result()
+        self.stats['renders'] += 1
+        self.stats['render_secs'] += secs
+        if image is not None:
+            self.cache.put(key, image, secs)
+
+    def catalogue(self):
+        return {
+            'charts': {chart: {'scope': scope, 'default': self.defaults.get(chart)}
+                       for chart, (_, scope) in CHARTS.items()},
+            'tiers': list(render_tiers.TIERS), 'default_tier': DEFAULT_TIER,
+            'matches': self.matches, 'teams': self.teams, 'players': self.players,
+        }
+
+    def health(self):
+        pool = self.pool_state()
+        return {'status': 'ok' if pool == 'ok' else 'degraded', 'csv': self.csv_path, 'workers': self.workers,
+                'pool': pool, 'pool_restarts': self.pool_restarts, 'pool_error': self.pool_error,
+                'in_flight': len(self.in_flight), 'cached': len(self.cache.entries),
+                'cache_mb': self.cache.bytes / 2**20, **self.stats}
+
+    # --- HTTP ---
+
+    async def handle(self, reader, writer):
+        """One client connection; requests are served in turn while it stays open."""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+                except asyncio.LimitOverrunError:
+                    await self._send(writer, 413, {'error': 'request too large'}, keep_alive=False)
+                    return
+                lines = head.decode('latin-1').split('\r\n')
+                try:
+                    method, target, version = lines[0].split(' ', 2)
+                except ValueError:
+                    await self._send(writer, 400, {'error': 'bad request line'}, keep_alive=False)
+                    return
+                headers = {k.strip().lower(): v.strip() for k, _, v in (line.partition(':') for line in lines[1:] if line)}
+                keep_alive = (version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close')
+
+                start = time.perf_counter()
+                status = await self._respond(writer, method, target, keep_alive)
+                if self.verbose:
+                    print(f"{method} {target} {status} {(time.perf_counter() - start) * 1000:.0f}ms")
+                if not keep_alive or status == 405:
+                    return
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, method, target, keep_alive):
+        self.stats['requests'] += 1
+        if method == 'OPTIONS':
+            return await self._send(writer, 204, None, keep_alive)
+        if method not in ('GET', 'HEAD'):
+            # Any request body is left unread, so the connection can't be reused
+            return await self._send(writer, 405, {'error': 'only GET'}, keep_alive=False)
+
+        url = urlsplit(target)
+        if url.path == '/health':
+            return await self._send(writer, 200, self.health(), keep_alive)
+        if url.path == '/charts':
+            return await self._send(writer, 200, self.catalogue(), keep_alive)
+        if not url.path.startswith('/chart/'):
+            return await self._send(writer, 404, {'error': 'not found'}, keep_alive)
+
+        try:
+            key = self.parse(url.path[len('/chart/'):], url.query)
+            image, secs, how = await self.chart(key)
+        except RequestError as e:
+            self.stats['errors'] += 1
+            return await self._send(writer, e.status, {'error': str(e)}, keep_alive)
+        except Exception as e:  # A chart that failed to render; keep serving the rest
+            self.stats['errors'] += 1
+            return await self._send(writer, 500, {'error': f"{type(e).__name__}: {e}"}, keep_alive)
+
+        content_type = CONTENT_TYPES[render_tiers.TIERS[key[3]]['format']]
+        extra = {'X-Cache': how, 'X-Render-Secs': f"{secs:.3f}"}
+        body = b'' if method == 'HEAD' else image
+        return await self._send(writer, 200, body, keep_alive, content_type, extra, length=len(image))
+
+    async def _send(self, writer, status, body, keep_alive, content_type='application/json', extra=None,
+                    length=None):
+        if body is not None and not isinstance(body, bytes):
+            body = json.dumps(body).encode()
+        body = body or b''
+        headers = {
+            'Content-Type': content_type,
+            'Content-Length': str(len(body) if length is None else length),
+            'Connection': 'keep-alive' if keep_alive else 'close',
+            # Charts are embedded in the console, opened from file:// or a static host
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Expose-Headers': 'X-Cache, X-Render-Secs',
+            **(extra or {}),
+        }
+        head = f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n" + ''.join(f"{k}: {v}\r\n" for k, v in headers.items())
+        writer.write(head.encode('latin-1') + b'\r\n' + body)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        return status
+
+    async def start(self, host=HOST, port=PORT):
+        """Listen on (host, port); returns the bound port (pass 0 for any free one)."""
+        self.server = await asyncio.start_server(self.handle, host, port, limit=MAX_REQUEST_BYTES)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+        shutil.rmtree(self.out_dir, ignore_errors=True)
+
+
+# --- MAIN ---
+
+async def serve(server, host, port):
+    port = await server.start(host, port)
+    print(f"Serving charts from {server.csv_path} on http://{host}:{port}/chart/<chart> "
+          f"({server.workers} workers, Ctrl+C to stop)")
+    try:
+        await server.server.serve_forever()
+    finally:
+        await server.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve charts on demand over HTTP.")
+    parser.add_argument('--csv', default=CSV_FILE)
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--workers', type=int, default=None, help='Render processes (default: CPU count)')
+    parser.add_argument('--cache-mb', type=float, default=CACHE_MB, help='In-memory result cache size')
+    parser.add_argument('--verbose', action='store_true', help='Log every request')
+    args = parser.parse_args(argv)
+
+    try:
+        server = ChartServer(args.csv, args.workers, args.cache_mb, args.verbose)
+    except FileNotFoundError:
+        print(f"Error: Could not find {args.csv}. Run the generator first.")
+        sys.exit(1)
+    t0 = time.perf_counter()
+    server.warm_up()
+    print(f"Loaded {args.csv} into {server.workers} workers in {time.perf_counter() - t0:.1f}s")
+
+    # `kill` stops the server like Ctrl+C
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        asyncio.run(serve(server, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        print(f"Error: Could not listen on {args.host}:{args.port} ({e.strerror}).")
+        sys.exit(1)
+    finally:
+        server.close()
+        print(f"Stopped. {server.stats['requests']} requests, {server.stats['hits']} cache hits, "
+              f"{server.stats['renders']} renders, {server.stats['coalesced']} coalesced.")
+
+
+if __name__ == '__main__':
+    main()
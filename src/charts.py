@@ -0,0 +1,103 @@
+"""
+Chart registry shared by render_all.py, season.py, scout.py and chart_server.py.
+
+Deliberately free of pandas / matplotlib imports, so a command line can list
+and parse the charts before any of the plotting stack is loaded.
+
+sources() lists the files a chart's output depends on: its script and every
+module from src/ it imports, directly or through other local modules. The
+batch renderer's up-to-date check and the render cache key both use it, so
+editing a shared module (xt_model.py, possessions.py, render_tiers.py, ...)
+re-renders the charts built on it.
+
+constants() reads a script's UPPER_CASE configuration (TEAM_NAME, colours,
+bins, ...) from its source, so scout.py can find a chart's default target and
+its render cache key without importing the script.
+"""
+import ast
+import functools
+import os
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# chart name -> (script module, what the chart is drawn for)
+CHARTS = {
+    'heatmap': ('02_heatmap', 'team'),
+    'momentum': ('03_momentum', 'match'),
+    'xt': ('04_player_xt', 'team'),
+    'radar': ('05_radar_chart', 'player'),
+    'shots': ('06_shot_map', 'team'),
+    'carry': ('07_carry_map', 'team'),
+    'pass': ('08_pass_map', 'team'),
+    'network': ('09_pass_network', 'team'),
+}
+
+TITLES = {
+    'heatmap': 'Team touch heatmap',
+    'momentum': 'Match momentum (xT per minute)',
+    'xt': 'Player xT leaderboard',
+    'radar': 'Player pizza chart',
+    'shots': 'Shot map',
+    'carry': 'Carry map',
+    'pass': 'Pass map',
+    'network': 'Pass network',
+}
+
+
+def _local_imports(path):
+    """Names of the src/ modules a source file imports (at any level)."""
+    with open(path) as f:
+        tree = ast.parse(f.read(), path)
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name.split('.')[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.add(node.module.split('.')[0])
+    return {name for name in names if os.path.exists(os.path.join(SRC_DIR, name + '.py'))}
+
+
+@functools.lru_cache(maxsize=None)
+def sources(module_name):
+    """Sorted paths of `module_name`'s script and the local modules it imports, transitively."""
+    seen, todo = set(), [module_name]
+    while todo:
+        name = todo.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        todo.extend(_local_imports(os.path.join(SRC_DIR, name + '.py')))
+    return tuple(sorted(os.path.join(SRC_DIR, name + '.py') for name in seen))
+
+
+@functools.lru_cache(maxsize=None)
+def constants(module_name):
+    """
+    `module_name`'s top-level UPPER_CASE assignments whose value is a literal.
+    Computed ones (HIST_BINS = heatmap_engine.BINS) are left out; their inputs
+    are in sources().
+    """
+    path = os.path.join(SRC_DIR, module_name + '.py')
+    with open(path) as f:
+        tree = ast.parse(f.read(), path)
+    values = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign):
+            targets, value = node.targets, node.value
+        elif isinstance(node, ast.AnnAssign) and node.value is not None:
+            targets, value = [node.target], node.value
+        else:
+            continue
+        names = [t.id for t in targets if isinstance(t, ast.Name) and t.id.isupper()]
+        if not names:
+            continue
+        try:
+            literal = ast.literal_eval(value)
+        except ValueError:
+            # Not a literal (a call, another module's value, ...)
+            for name in names:
+                values.pop(name, None)
+            continue
+        for name in names:
+            values[name] = literal
+    return values
@@ -0,0 +1,151 @@
+"""
+Single-pass aggregation over event CSVs too large to load at once.
+
+The CSV is read in chunks (pd.read_csv(chunksize=...), typed with the
+event_store schema, only the columns the aggregators need) and every chunk is
+fed to all aggregators before it is dropped, so memory stays at one chunk
+however long the season export is.
+
+Aggregators have update(chunk) / result():
+    HeatmapBins   binned event counts per team (see heatmap_engine.py)
+    ShotCounts    shots per team / player / outcome
+    XTSums        Pass / Carry xT per player (see xt_engine.py); the last row
+                  of each chunk is carried into the next, so an action whose
+                  next event falls in the following chunk is still credited
+
+Usage:
+    python src/chunked.py data/season_export.csv --chunk-rows 500000
+    python src/chunked.py data/season_export.csv --heatmap Home --out output/heatmap_stream.png
+"""
+import argparse
+import importlib
+import time
+
+import numpy as np
+import pandas as pd
+
+import heatmap_engine
+from event_store import read_csv_typed
+from xt_engine import attribute_xt
+
+# --- CONFIGURATION ---
+CHUNK_ROWS = 250_000
+
+
+def iter_chunks(csv_path, columns=None, chunksize=CHUNK_ROWS):
+    """Typed DataFrames of at most `chunksize` rows, in file order."""
+    usecols = list(columns) if columns is not None else None
+    yield from read_csv_typed(csv_path, usecols=usecols, chunksize=chunksize)
+
+
+# --- AGGREGATORS ---
+
+class HeatmapBins:
+    """Event counts per team on the heatmap grid."""
+    columns = ['Team', 'X', 'Y']
+
+    def __init__(self, bins=heatmap_engine.BINS):
+        self.bins = bins
+        self.grids = {}
+
+    def update(self, chunk):
+        for team, rows in chunk.groupby('Team', observed=True):
+            grid = heatmap_engine.bin_grid(rows['X'], rows['Y'], self.bins)
+            self.grids[team] = self.grids.get(team, 0) + grid
+
+    def result(self):
+        return self.grids
+
+
+class ShotCounts:
+    """Shots per Team / Player / Qualifier."""
+    columns = ['Team', 'Player', 'Event', 'Qualifier']
+
+    def __init__(self):
+        self.parts = []
+
+    def update(self, chunk):
+        shots = chunk[chunk['Event'] == 'Shot']
+        if not shots.empty:
+            self.parts.append(shots.groupby(['Team', 'Player', 'Qualifier'], observed=True).size())
+
+    def result(self):
+        if not self.parts:
+            return pd.Series(dtype='int64', name='Shots')
+        counts = pd.concat(self.parts).groupby(level=[0, 1, 2]).sum()
+        return counts.rename('Shots')
+
+
+class XTSums:
+    """Pass / Carry / Total xT per Team and Player, across chunk boundaries."""
+    columns = ['MatchID', 'Period', 'Team', 'Player', 'Event', 'X', 'Y']
+
+    def __init__(self, surface=None):
+        self.surface = surface
+        self.carry = None
+        self.parts = []
+
+    def update(self, chunk):
+        # The previous chunk's last row only now gets its "next event"; the new
+        # last row never continues inside this frame, so nothing is counted twice
+        frame = chunk if self.carry is None else pd.concat([self.carry, chunk], ignore_index=True)
+        self.parts.append(attribute_xt(frame, surface=self.surface))
+        self.carry = chunk.iloc[-1:]
+
+    def result(self):
+        if not self.parts:
+            return pd.DataFrame(columns=['Team', 'Player', 'Pass xT', 'Carry xT', 'Total xT'])
+        parts = [p.astype({'Team': str, 'Player': str}) for p in self.parts]
+        return (
+            pd.concat(parts)
+            .groupby(['Team', 'Player'])[['Pass xT', 'Carry xT', 'Total xT']].sum()
+            .reset_index()
+            .sort_values('Total xT', ascending=False, ignore_index=True)
+        )
+
+
+def scan(csv_path, aggregators, chunksize=CHUNK_ROWS):
+    """Feed every chunk of the CSV to every aggregator (one read of the file)."""
+    columns = list(dict.fromkeys(col for agg in aggregators for col in agg.columns))
+    n_rows = 0
+    for chunk in iter_chunks(csv_path, columns, chunksize):
+        for agg in aggregators:
+            agg.update(chunk)
+        n_rows += len(chunk)
+    return n_rows
+
+
+# --- MAIN ---
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Heatmap bins, shot counts and xT in one pass over a large CSV.")
+    parser.add_argument('csv')
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    parser.add_argument('--heatmap', metavar='TEAM', help='Also render the binned heatmap for this team')
+    parser.add_argument('--out', default='output/heatmap_stream.png')
+    args = parser.parse_args(argv)
+
+    heatmap, shots, xt = HeatmapBins(), ShotCounts(), XTSums()
+    t0 = time.perf_counter()
+    n_rows = scan(args.csv, [heatmap, shots, xt], args.chunk_rows)
+    print(f"Scanned {n_rows:,} rows in {time.perf_counter() - t0:.1f}s (chunks of {args.chunk_rows:,})")
+
+    shot_table = shots.result().unstack(fill_value=0)
+    print("\nShots by team:")
+    print(shot_table.groupby(level='Team').sum().to_string())
+    print("\nTop 10 players by xT:")
+    print(xt.result().head(10).round(3).to_string(index=False))
+
+    if args.heatmap:
+        grid = heatmap.result().get(args.heatmap)
+        if grid is None or not np.any(grid):
+            print(f"No events for {args.heatmap}.")
+            return
+        import matplotlib
+        matplotlib.use('Agg')
+        heatmap_script = importlib.import_module('02_heatmap')
+        heatmap_script.render(grid, args.heatmap, args.out, method='hist')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,231 @@
+"""
+Compact in-memory event table for season-scale analysis.
+
+A plain pd.read_csv() of the event export keeps every MatchID / Team /
+Player / Event string as a Python object and every number as 64 bits, about
+140 bytes per event. The typed event store (event_store.py) brings that to
+about 27. EventTable goes further for long-lived, season-sized analysis data:
+
+    MatchID, Team, Player,            integer codes (int8 / int16 / int32, the
+    Event, Qualifier, Prog_Metric     smallest that fits) into one vocabulary
+                                      per column; -1 = missing
+    Period                            int8
+    Elapsed                           int16 seconds since kick-off (replaces
+                                      Mins + Secs, which to_pandas() rebuilds;
+                                      the generator's occasional '2:61' comes
+                                      back as 3:01)
+    X, Y                              float32
+    ScreenX, ScreenY                  float32, only with screen=True (console
+                                      tap positions, unused by the analyses)
+
+That is 18 bytes per event, a full league season (380 matches) in well
+under 100 MB. Columns are plain NumPy arrays, so mask() / filter() work
+without pandas, and to_pandas() gives back the event store schema with
+categoricals built straight from the codes.
+
+Usage:
+    python src/compact_events.py data/full_match_data.csv       # memory comparison
+    python src/compact_events.py data/season --out data/season_events.npz
+"""
+import argparse
+import glob
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import dataset
+from event_store import COLUMNS, SCHEMA, read_csv_typed
+
+# --- CONFIGURATION ---
+CODE_COLUMNS = ['MatchID', 'Team', 'Player', 'Event', 'Qualifier', 'Prog_Metric']
+VALUE_COLUMNS = {'Period': 'int8', 'Elapsed': 'int16', 'X': 'float32', 'Y': 'float32'}
+SCREEN_COLUMNS = {'ScreenX': 'float32', 'ScreenY': 'float32'}
+CHUNK_ROWS = 250_000
+SEASON_MATCHES = 380  # One league season, for the memory projection
+
+
+def code_dtype(n_categories):
+    """Smallest signed integer type that holds codes 0..n-1 and -1."""
+    for dtype in ('int8', 'int16', 'int32'):
+        if n_categories <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype('int64')
+
+
+class EventTable:
+    """Columns of NumPy arrays plus one vocabulary per coded column."""
+
+    def __init__(self, columns, categories):
+        self.columns = columns          # name -> ndarray (all the same length)
+        self.categories = categories    # coded column name -> ndarray of labels
+
+    def __len__(self):
+        return len(self.columns['X'])
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    @property
+    def nbytes(self):
+        """Bytes held by the columns and vocabularies."""
+        data = sum(col.nbytes for col in self.columns.values())
+        vocab = sum(sum(len(str(label)) for label in labels) + 8 * len(labels)
+                    for labels in self.categories.values())
+        return data + vocab
+
+    # --- FROM / TO PANDAS ---
+
+    @classmethod
+    def from_pandas(cls, df, screen=False):
+        columns, categories = {}, {}
+        for col in CODE_COLUMNS:
+            values = df[col] if isinstance(df[col].dtype, pd.CategoricalDtype) else df[col].astype('category')
+            categories[col] = np.asarray(values.cat.categories, dtype=object)
+            columns[col] = values.cat.codes.to_numpy().astype(code_dtype(len(categories[col])), copy=False)
+
+        elapsed = df['Mins'].to_numpy().astype('int32') * 60 + df['Secs'].to_numpy()
+        columns['Period'] = df['Period'].to_numpy().astype('int8', copy=False)
+        columns['Elapsed'] = elapsed.astype('int16')
+        for col in ['X', 'Y', *(SCREEN_COLUMNS if screen else [])]:
+            columns[col] = df[col].to_numpy().astype('float32', copy=False)
+        return cls(columns, categories)
+
+    def to_pandas(self, columns=None):
+        """DataFrame in the event store schema (Mins / Secs rebuilt from Elapsed)."""
+        wanted = [c for c in COLUMNS if c in self.columns or c in ('Mins', 'Secs')]
+        if columns is not None:
+            wanted = [c for c in wanted if c in columns]
+        data = {}
+        for col in wanted:
+            if col in self.categories:
+                data[col] = pd.Categorical.from_codes(self.columns[col], categories=self.categories[col])
+            elif col == 'Mins':
+                data[col] = (self.columns['Elapsed'] // 60).astype(SCHEMA['Mins'])
+            elif col == 'Secs':
+                data[col] = (self.columns['Elapsed'] % 60).astype(SCHEMA['Secs'])
+            else:
+                data[col] = self.columns[col]
+        return pd.DataFrame(data)
+
+    # --- SELECTION ---
+
+    def code(self, column, label):
+        """Code of `label` in a coded column (-1 if it never occurs)."""
+        matches = np.flatnonzero(self.categories[column] == label)
+        return int(matches[0]) if len(matches) else -1
+
+    def mask(self, **equals):
+        """Rows where every column equals the value (or is in the list), e.g. mask(Event='Pass')."""
+        keep = np.ones(len(self), dtype=bool)
+        for column, value in equals.items():
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            if column in self.categories:
+                codes = [self.code(column, v) for v in values]
+                keep &= np.isin(self.columns[column], [c for c in codes if c >= 0])
+            else:
+                keep &= np.isin(self.columns[column], values)
+        return keep
+
+    def filter(self, mask_or_rows):
+        return EventTable({name: col[mask_or_rows] for name, col in self.columns.items()}, self.categories)
+
+    # --- BUILDING ---
+
+    @classmethod
+    def concat(cls, tables):
+        """One table from several, merging the vocabularies and re-coding."""
+        tables = [t for t in tables if len(t)]
+        if len(tables) == 1:
+            return tables[0]
+        categories, columns = {}, {}
+        for col in CODE_COLUMNS:
+            vocab = pd.Index([], dtype=object)
+            for t in tables:
+                vocab = vocab.append(pd.Index(t.categories[col], dtype=object)).unique()
+            dtype = code_dtype(len(vocab))
+            parts = []
+            for t in tables:
+                # Old code -> new code, with -1 (missing) mapped to itself via the last slot
+                lookup = np.append(vocab.get_indexer(t.categories[col]), -1).astype(dtype)
+                parts.append(lookup[t.columns[col]])
+            categories[col] = np.asarray(vocab, dtype=object)
+            columns[col] = np.concatenate(parts)
+        for col in tables[0].columns:
+            if col not in categories:
+                columns[col] = np.concatenate([t.columns[col] for t in tables])
+        return cls(columns, categories)
+
+    @classmethod
+    def from_csv(cls, csv_path, screen=False, chunksize=CHUNK_ROWS):
+        """Build chunk by chunk, so the full typed DataFrame is never in memory."""
+        usecols = [c for c in COLUMNS if screen or c not in SCREEN_COLUMNS]
+        chunks = read_csv_typed(csv_path, usecols=usecols, chunksize=chunksize)
+        return cls.concat([cls.from_pandas(chunk, screen) for chunk in chunks])
+
+    @classmethod
+    def from_source(cls, source, screen=False, match_ids=None):
+        """From a partitioned dataset directory, or a glob of CSVs."""
+        if dataset.is_dataset(source):
+            columns = [c for c in COLUMNS if screen or c not in SCREEN_COLUMNS]
+            return cls.concat([cls.from_pandas(events, screen)
+                               for _, events in dataset.iter_matches(source, columns, match_ids)])
+        return cls.concat([cls.from_csv(path, screen) for path in sorted(glob.glob(source))])
+
+    # --- PERSISTENCE ---
+
+    def save(self, path):
+        arrays = {f"col_{name}": col for name, col in self.columns.items()}
+        arrays.update({f"cat_{name}": labels.astype(str) for name, labels in self.categories.items()})
+        with open(path, 'wb') as f:
+            np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            columns = {key[4:]: data[key] for key in data.files if key.startswith('col_')}
+            categories = {key[4:]: data[key].astype(object) for key in data.files if key.startswith('cat_')}
+        return cls(columns, categories)
+
+
+# --- MAIN ---
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a compact event table and compare memory use.")
+    parser.add_argument('source', help='CSV (or glob) or dataset directory')
+    parser.add_argument('--out', help='Save the table as .npz')
+    parser.add_argument('--screen', action='store_true', help='Keep ScreenX / ScreenY')
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    table = EventTable.from_source(args.source, screen=args.screen)
+    build_secs = time.perf_counter() - t0
+    n_rows = len(table)
+    n_matches = len(table.categories['MatchID'])
+    print(f"{n_rows:,} events from {n_matches:,} matches in {build_secs:.1f}s\n")
+
+    sizes = {'EventTable': table.nbytes}
+    if not dataset.is_dataset(args.source):
+        paths = sorted(glob.glob(args.source))
+        raw = [pd.read_csv(p) for p in paths]
+        sizes['pd.read_csv()'] = sum(int(df.memory_usage(deep=True).sum()) for df in raw)
+        del raw
+        typed = [read_csv_typed(p) for p in paths]
+        sizes['event store (typed)'] = sum(int(df.memory_usage(deep=True).sum()) for df in typed)
+        del typed
+    sizes['EventTable.to_pandas()'] = int(table.to_pandas().memory_usage(deep=True).sum())
+
+    per_match = n_rows / max(n_matches, 1)
+    print(f"{'Representation':<24} {'Total':>10} {'Bytes/event':>12} {f'{SEASON_MATCHES}-match season':>18}")
+    for name, size in sorted(sizes.items(), key=lambda kv: -kv[1]):
+        season = size / n_rows * per_match * SEASON_MATCHES
+        print(f"{name:<24} {size / 2**20:>8.1f} MB {size / n_rows:>12.1f} {season / 2**20:>15.0f} MB")
+
+    if args.out:
+        table.save(args.out)
+        print(f"\nSaved to {args.out} ({os.path.getsize(args.out) / 2**20:.1f} MB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,261 @@
+"""
+Partitioned multi-match event dataset.
+
+Layout (one Parquet file per match, written with the event_store schema):
+
+    data/season/
+        _manifest.json                  # match -> file, rows, teams, players
+        MatchID=match_1768464395999/events.parquet
+        MatchID=match_1768464396000/events.parquet
+        ...
+
+Match, team and player filters are resolved against the manifest first, so
+partitions that cannot contain the requested rows are never opened. Team and
+player filters can also be pushed into the Parquet scan itself for analyses
+that do not need the surrounding event sequence.
+
+Usage:
+    python src/dataset.py "data/*.csv" --root data/season
+"""
+import argparse
+import glob
+import json
+import os
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+import instrument
+from event_store import SCHEMA, load_events, parquet_bytes
+
+# --- CONFIGURATION ---
+DATASET_ROOT = 'data/season'
+MANIFEST_NAME = '_manifest.json'
+PARTITION_FILE = 'events.parquet'
+
+
+# --- MANIFEST ---
+
+def read_manifest(root):
+    try:
+        with open(os.path.join(root, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _write_manifest(root, manifest):
+    tmp_path = os.path.join(root, MANIFEST_NAME + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, os.path.join(root, MANIFEST_NAME))
+
+
+def is_dataset(path):
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, MANIFEST_NAME))
+
+
+# --- WRITE ---
+
+def _to_schema(match_df):
+    """Cast to the store dtypes, keeping only the categories this match uses."""
+    match_df = match_df.reset_index(drop=True)
+    match_df = match_df.astype({col: dtype for col, dtype in SCHEMA.items() if col in match_df.columns})
+    for col in match_df.select_dtypes('category').columns:
+        match_df[col] = match_df[col].cat.remove_unused_categories()
+    return match_df
+
+
+def write_partitions(df, root=DATASET_ROOT):
+    """
+    Split `df` by MatchID and write (or overwrite) one partition per match.
+    Row order inside each match is preserved. Returns the match IDs written.
+    """
+    os.makedirs(root, exist_ok=True)
+    manifest = read_manifest(root)
+
+    written = []
+    for match_id, match_df in df.groupby('MatchID', sort=False, observed=True):
+        match_dir = os.path.join(root, f"MatchID={match_id}")
+        os.makedirs(match_dir, exist_ok=True)
+
+        match_df = _to_schema(match_df)
+        # Replaced in one step: a crash leaves the old partition or the new one
+        path = os.path.join(match_dir, PARTITION_FILE)
+        match_df.to_parquet(path + '.tmp', index=False)
+        os.replace(path + '.tmp', path)
+
+        manifest[str(match_id)] = _manifest_entry(match_id, match_df)
+        written.append(str(match_id))
+
+    _write_manifest(root, manifest)
+    return written
+
+
+def _manifest_entry(match_id, match_df):
+    return {
+        'file': os.path.join(f"MatchID={match_id}", PARTITION_FILE),
+        'rows': len(match_df),
+        'teams': sorted(match_df['Team'].dropna().unique().tolist()),
+        'players': sorted(match_df['Player'].dropna().unique().tolist()),
+    }
+
+
+def partition_rows(root, match_id):
+    """Rows in a match's partition file (0 if it has none), read from the Parquet footer."""
+    path = os.path.join(root, f"MatchID={match_id}", PARTITION_FILE)
+    if not os.path.exists(path):
+        return 0
+    return pq.ParquetFile(path).metadata.num_rows
+
+
+def sync_manifest(root, match_ids):
+    """Rebuild the manifest entries of `match_ids` from their partition files."""
+    manifest = read_manifest(root)
+    for match_id in match_ids:
+        path = os.path.join(root, f"MatchID={match_id}", PARTITION_FILE)
+        if os.path.exists(path):
+            manifest[str(match_id)] = _manifest_entry(match_id, pd.read_parquet(path, columns=['Team', 'Player']))
+    _write_manifest(root, manifest)
+
+
+def append_partitions(df, root=DATASET_ROOT):
+    """
+    Add the rows of `df` to their match partitions (created if missing).
+    Each touched match is re-sorted by Period / Mins / Secs, keeping arrival
+    order for ties. Returns the match IDs written.
+    """
+    manifest = read_manifest(root)
+    merged = []
+    for match_id, match_df in df.groupby('MatchID', sort=False, observed=True):
+        if str(match_id) in manifest:
+            match_df = pd.concat([read_match(root, str(match_id), manifest=manifest), _to_schema(match_df)],
+                                 ignore_index=True)
+        merged.append(match_df.sort_values(['Period', 'Mins', 'Secs'], kind='stable'))
+
+    if not merged:
+        return []
+    # Categories differ between matches; write_partitions re-casts each one
+    return write_partitions(pd.concat(merged, ignore_index=True), root)
+
+
+def import_csvs(pattern, root=DATASET_ROOT):
+    """Add every CSV matching `pattern` to the dataset, one file at a time."""
+    paths = sorted(glob.glob(pattern))
+    written = []
+    for path in paths:
+        written.extend(write_partitions(load_events(path), root))
+    return written
+
+
+# --- READ ---
+
+def select_matches(root, match_ids=None, teams=None, players=None):
+    """Match IDs whose partitions can contain the requested teams / players."""
+    selected = []
+    for match_id, info in sorted(read_manifest(root).items()):
+        if match_ids is not None and match_id not in match_ids:
+            continue
+        if teams is not None and not set(teams) & set(info['teams']):
+            continue
+        if players is not None and not set(players) & set(info['players']):
+            continue
+        selected.append(match_id)
+    return selected
+
+
+def _scan_filters(teams, players):
+    filters = []
+    if teams is not None:
+        filters.append(('Team', 'in', list(teams)))
+    if players is not None:
+        filters.append(('Player', 'in', list(players)))
+    return filters or None
+
+
+def read_match(root, match_id, columns=None, teams=None, players=None, manifest=None):
+    """
+    Load one match partition. Team / player filters are applied inside the
+    Parquet scan, so filtered-out rows are never materialised in pandas.
+    Pass an already read `manifest` when loading many matches.
+    """
+    info = (manifest or read_manifest(root))[match_id]
+    path = os.path.join(root, info['file'])
+    with instrument.stage('load'):
+        df = pq.read_table(
+            path,
+            columns=list(columns) if columns is not None else None,
+            filters=_scan_filters(teams, players),
+        ).to_pandas()
+        if instrument.ENABLED:
+            instrument.count(events=len(df), bytes_read=parquet_bytes(path, columns))
+    return df
+
+
+def iter_matches(source, columns=None, match_ids=None, teams=None, players=None, row_filter=False):
+    """
+    Yield (match_id, events) one match at a time from a partitioned dataset
+    directory or a glob of CSV files.
+
+    Partitions are pruned by match / team / player before they are opened.
+    With row_filter=True the team / player filters also drop rows during the
+    scan; leave it off for analyses that need both teams' event sequence.
+    """
+    scan_teams = teams if row_filter else None
+    scan_players = players if row_filter else None
+
+    if is_dataset(source):
+        manifest = read_manifest(source)
+        for match_id in select_matches(source, match_ids, teams, players):
+            yield match_id, read_match(source, match_id, columns, scan_teams, scan_players, manifest)
+        return
+
+    # Plain CSVs: load one file at a time through the typed cache
+    for path in sorted(glob.glob(source)):
+        read_columns = None if columns is None else list(dict.fromkeys(['MatchID', 'Team', 'Player', *columns]))
+        df = load_events(path, columns=read_columns)
+        for match_id, match_df in df.groupby('MatchID', sort=False, observed=True):
+            if match_ids is not None and match_id not in match_ids:
+                continue
+            if teams is not None and not match_df['Team'].isin(teams).any():
+                continue
+            if players is not None and not match_df['Player'].isin(players).any():
+                continue
+            if scan_teams is not None:
+                match_df = match_df[match_df['Team'].isin(scan_teams)]
+            if scan_players is not None:
+                match_df = match_df[match_df['Player'].isin(scan_players)]
+            if columns is not None:
+                match_df = match_df[list(columns)]
+            yield str(match_id), match_df.reset_index(drop=True)
+
+
+def aggregate(source, partial_fn, merge_fn, **scan):
+    """
+    Stream matches through `partial_fn(events)` and fold the results with
+    `merge_fn([running, partial])`, so only one match plus the running total
+    is in memory at a time. Partials that are None are skipped.
+    """
+    running = None
+    for _, events in iter_matches(source, **scan):
+        partial = partial_fn(events)
+        if partial is None:
+            continue
+        running = partial if running is None else merge_fn([running, partial])
+    return running
+
+
+# --- MAIN ---
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import match CSVs into a partitioned dataset.")
+    parser.add_argument('pattern', help='CSV glob, e.g. "data/*.csv"')
+    parser.add_argument('--root', default=DATASET_ROOT)
+    args = parser.parse_args(argv)
+
+    written = import_csvs(args.pattern, args.root)
+    print(f"Wrote {len(written)} match partitions to {args.root}")
+
+
+if __name__ == '__main__':
+    main()
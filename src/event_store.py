@@ -0,0 +1,169 @@
+"""
+Shared, typed loader for the match event CSV.
+
+Every analysis script used to call pd.read_csv() on its own and re-parse the
+string columns as objects. This module defines the 13-column schema written by
+01_generate_data.py and keeps a Parquet copy of each CSV next to it in a
+`.cache/` folder. The cache is keyed on the CSV's mtime/size and its content
+hash, so later loads skip CSV parsing and only read the requested columns.
+"""
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+import instrument
+
+# --- SCHEMA ---
+# Column order matches the generator export
+SCHEMA = {
+    'MatchID': 'category',
+    'Period': 'int8',
+    'Team': 'category',
+    'Player': 'category',
+    'Event': 'category',
+    'Qualifier': 'category',
+    'Prog_Metric': 'category',
+    'Mins': 'int16',
+    'Secs': 'int8',
+    'X': 'float32',
+    'Y': 'float32',
+    'ScreenX': 'float32',
+    'ScreenY': 'float32',
+}
+COLUMNS = list(SCHEMA)
+
+CACHE_DIR_NAME = '.cache'
+HASH_BLOCK_SIZE = 1 << 20
+
+
+# --- HELPERS ---
+
+def file_hash(path):
+    """SHA-1 of a file's contents, read in 1 MB blocks."""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_dir_for(csv_path):
+    return os.path.join(os.path.dirname(os.path.abspath(csv_path)), CACHE_DIR_NAME)
+
+
+def _manifest_path(csv_path):
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(cache_dir_for(csv_path), f"{stem}.json")
+
+
+def _read_manifest(csv_path):
+    try:
+        with open(_manifest_path(csv_path)) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _write_manifest(csv_path, manifest):
+    tmp_path = _manifest_path(csv_path) + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, _manifest_path(csv_path))
+
+
+def read_csv_typed(csv_path, **kwargs):
+    """Parse the CSV straight into the schema dtypes (no object columns)."""
+    return pd.read_csv(csv_path, dtype=SCHEMA, **kwargs)
+
+
+# --- CACHE ---
+
+def ensure_cache(csv_path):
+    """
+    Make sure an up-to-date Parquet cache exists for `csv_path`.
+    Returns the cache manifest: {'mtime_ns', 'size', 'sha1', 'cache_file'}.
+
+    1. mtime and size unchanged       -> reuse the cache without hashing
+    2. file touched but same contents -> reuse the cache, refresh the mtime
+    3. contents changed               -> parse the CSV and rewrite the cache
+    """
+    return _ensure_cache(csv_path)[0]
+
+
+def _ensure_cache(csv_path):
+    """ensure_cache(), plus the events it parsed when it had to rewrite the cache (else None)."""
+    stat = os.stat(csv_path)  # Raises FileNotFoundError like pd.read_csv
+    manifest = _read_manifest(csv_path)
+
+    def cache_exists(m):
+        return m is not None and os.path.exists(os.path.join(cache_dir_for(csv_path), m['cache_file']))
+
+    if cache_exists(manifest) and manifest['mtime_ns'] == stat.st_mtime_ns and manifest['size'] == stat.st_size:
+        return manifest, None
+
+    sha1 = file_hash(csv_path)
+    if cache_exists(manifest) and manifest['sha1'] == sha1:
+        manifest.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+        _write_manifest(csv_path, manifest)
+        return manifest, None
+
+    os.makedirs(cache_dir_for(csv_path), exist_ok=True)
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    cache_file = f"{stem}-{sha1[:12]}.parquet"
+
+    with instrument.stage('csv_parse'):
+        df = read_csv_typed(csv_path)
+        instrument.count(bytes_read=stat.st_size)
+    df.to_parquet(os.path.join(cache_dir_for(csv_path), cache_file), index=False)
+
+    # Drop the cache of the previous version of this CSV
+    if manifest is not None and manifest.get('cache_file') != cache_file:
+        try:
+            os.remove(os.path.join(cache_dir_for(csv_path), manifest['cache_file']))
+        except FileNotFoundError:
+            pass
+
+    manifest = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'sha1': sha1, 'cache_file': cache_file}
+    _write_manifest(csv_path, manifest)
+    return manifest, df
+
+
+def load_events(csv_path, columns=None):
+    """
+    Load match events with the typed schema.
+    `columns` limits the read to those columns (projection on the Parquet cache).
+    """
+    with instrument.stage('load'):
+        manifest, parsed = _ensure_cache(csv_path)
+        if parsed is not None:
+            # Just parsed the CSV (counted as read there); no need to read the cache back
+            df = parsed if columns is None else parsed[list(columns)]
+        else:
+            cache_path = os.path.join(cache_dir_for(csv_path), manifest['cache_file'])
+            df = pd.read_parquet(cache_path, columns=list(columns) if columns is not None else None)
+            if instrument.ENABLED:
+                instrument.count(bytes_read=parquet_bytes(cache_path, columns))
+        instrument.count(events=len(df))
+    return df
+
+
+def parquet_bytes(path, columns=None):
+    """On-disk (compressed) size of the given columns of a Parquet file."""
+    import pyarrow.parquet as pq
+    metadata = pq.ParquetFile(path).metadata
+    wanted = None if columns is None else set(columns)
+    total = 0
+    for rg in range(metadata.num_row_groups):
+        row_group = metadata.row_group(rg)
+        for c in range(row_group.num_columns):
+            column = row_group.column(c)
+            if wanted is None or column.path_in_schema in wanted:
+                total += column.total_compressed_size
+    return total
+
+
+def data_hash(csv_path):
+    """Content hash of the CSV, reusing the cache manifest when it is current."""
+    return ensure_cache(csv_path)['sha1']
@@ -0,0 +1,498 @@
+"""
+Local event ingest service for the scouting console (index.html).
+
+The console used to write every tap to Firestore with its own network round
+trip, and failures were only logged. Now it buffers events and POSTs them in
+batches to this server:
+
+    POST /events   {"console": "<id>", "seq": 7, "events": [{...}, ...]}
+    GET  /health   server status and WAL size
+
+Every batch is checked (check_batch_id, check_event) before anything is
+logged; a bad console / seq or event gets 400. Every accepted batch is
+appended to a write-ahead log and fsync'ed before the response is sent
+(concurrent requests share one fsync: group commit), so an acknowledged
+event survives a crash. A batch only counts as received once its fsync
+succeeded: if the write fails the request gets 503 and the console's retry
+is stored. A retried batch (same console + seq) is acknowledged again but
+not stored twice.
+
+The WAL is compacted into the partitioned dataset (see dataset.py) every
+COMPACT_INTERVAL seconds, when it grows past COMPACT_EVENTS events, and on
+shutdown; on start-up any WAL left behind is compacted first. Compaction
+writes one match at a time and first records each match's partition size,
+so a compaction cut short by a crash is finished on restart without storing
+any match twice. Records that cannot be stored are moved to
+_wal/quarantine.jsonl with the reason instead of blocking the WAL.
+
+Usage:
+    python src/ingest_server.py --root data/season --port 8765
+"""
+import argparse
+import json
+import math
+import os
+import signal
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+import dataset
+
+# --- CONFIGURATION ---
+HOST = '127.0.0.1'
+PORT = 8765
+ROOT = dataset.DATASET_ROOT
+WAL_DIR_NAME = '_wal'
+COMPACT_INTERVAL = 30.0   # Seconds between background compactions
+COMPACT_EVENTS = 20_000   # ...or sooner once the WAL holds this many events
+MAX_BODY_BYTES = 5 << 20
+QUARANTINE_NAME = 'quarantine.jsonl'
+
+# Console event keys -> event store columns
+FIELD_MAP = {
+    'matchId': 'MatchID', 'Period': 'Period', 'Team': 'Team', 'Player': 'Player',
+    'Event': 'Event', 'Qualifier': 'Qualifier', 'Prog': 'Prog_Metric',
+    'Mins': 'Mins', 'Secs': 'Secs', 'NormX': 'X', 'NormY': 'Y',
+    'ScreenX': 'ScreenX', 'ScreenY': 'ScreenY',
+}
+# Every event needs these keys; numbers may arrive as numeric strings
+REQUIRED_FIELDS = ['matchId', 'Period', 'Team', 'Event', 'Mins', 'Secs']
+# Whole-number fields and their allowed range: real match limits, well
+# inside the int8 / int16 columns they are stored in (event_store.SCHEMA)
+INT_RANGES = {'Period': (1, 5), 'Mins': (0, 200), 'Secs': (0, 59)}
+FLOAT_FIELDS = ['NormX', 'NormY', 'ScreenX', 'ScreenY']   # Optional, may be empty
+FLOAT32_MAX = 3.4e38                                      # Stored as float32
+
+
+def _number(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError
+    return number
+
+
+def check_batch_id(console, seq):
+    """Raise ValueError unless console is a string and seq an integer (either may be None)."""
+    if console is not None and not isinstance(console, str):
+        raise ValueError(f"console must be a string, got {console!r}")
+    if seq is not None and (isinstance(seq, bool) or not isinstance(seq, int)):
+        raise ValueError(f"seq must be an integer, got {seq!r}")
+
+
+def check_event(event):
+    """Raise ValueError unless `event` is a console event the dataset can store."""
+    if not isinstance(event, dict):
+        raise ValueError(f"event must be an object, got {type(event).__name__}")
+    missing = [key for key in REQUIRED_FIELDS if event.get(key) in (None, '')]
+    if missing:
+        raise ValueError(f"event missing {', '.join(missing)}")
+    for key in list(INT_RANGES) + FLOAT_FIELDS:
+        value = event.get(key)
+        if key in FLOAT_FIELDS and value in (None, ''):
+            continue
+        try:
+            number = _number(value)
+        except ValueError:
+            raise ValueError(f"{key} must be a number, got {value!r}") from None
+        if key in INT_RANGES:
+            low, high = INT_RANGES[key]
+            if not low <= number <= high or number != int(number):
+                raise ValueError(f"{key} must be a whole number from {low} to {high}, got {value!r}")
+        elif abs(number) > FLOAT32_MAX:
+            raise ValueError(f"{key} is out of range, got {value!r}")
+
+
+def to_frame(events):
+    """Console event dicts -> DataFrame in the event store columns."""
+    df = pd.DataFrame.from_records(events).rename(columns=FIELD_MAP)
+    for col in FIELD_MAP.values():
+        if col not in df.columns:
+            df[col] = None
+    df = df[list(FIELD_MAP.values())]
+    for col in ['Period', 'Mins', 'Secs']:
+        df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype('int64')
+    for col in ['X', 'Y', 'ScreenX', 'ScreenY']:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    for col in ['Qualifier', 'Prog_Metric']:
+        df[col] = df[col].replace('', None)
+    return df
+
+
+# --- WRITE-AHEAD LOG ---
+
+class EventLog:
+    """Append-only JSON-lines WAL with group commit and dataset compaction."""
+
+    def __init__(self, root=ROOT):
+        self.root = root
+        self.wal_dir = os.path.join(root, WAL_DIR_NAME)
+        self.wal_path = os.path.join(self.wal_dir, 'events.wal')
+        self.seq_path = os.path.join(self.wal_dir, 'consoles.json')
+        self.pending_path = self.wal_path + '.compacting'
+        self.quarantine_path = os.path.join(self.wal_dir, QUARANTINE_NAME)
+        os.makedirs(self.wal_dir, exist_ok=True)
+
+        self._lock = threading.Lock()          # Guards the fields below
+        self._flushed = threading.Condition(self._lock)
+        self._queue = []                       # (ticket, encoded record) waiting for the next fsync
+        self._queued_seq = 0                   # Tickets ever handed out
+        self._synced_seq = 0                   # Tickets whose write has finished (or failed)
+        self._failed = set()                   # Tickets whose write failed, until their request sees it
+        self._in_flight = set()                # (console, seq) queued but not yet on disk
+        self._flushing = False
+        self._compact_lock = threading.Lock()
+
+        self.last_seq = self._load_seqs()      # console -> highest batch on disk
+        self.wal_events = 0
+        self.stats = {'batches': 0, 'events': 0, 'duplicates': 0, 'fsyncs': 0, 'write_errors': 0,
+                      'compactions': 0, 'compaction_errors': 0, 'quarantined': 0}
+
+        # Recover anything a previous run acknowledged but never compacted
+        # (this also opens a fresh WAL)
+        self._wal = None
+        self.compact()
+
+    def _load_seqs(self):
+        try:
+            with open(self.seq_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def append(self, console, seq, events):
+        """
+        Durably log one batch. Returns False if it was already accepted;
+        raises OSError if it could not be written (nothing is acknowledged).
+        """
+        record = (json.dumps({'console': console, 'seq': seq, 'events': events}) + '\n').encode()
+        batch = (console, seq) if console is not None and seq is not None else None
+        with self._lock:
+            while batch is not None:
+                if seq <= self.last_seq.get(console, -1):
+                    self.stats['duplicates'] += 1
+                    return False
+                if batch not in self._in_flight:
+                    break
+                self._flushed.wait()  # A retry racing the original: wait for its outcome
+            if batch is not None:
+                self._in_flight.add(batch)
+            self._queued_seq += 1
+            ticket = self._queued_seq
+            self._queue.append((ticket, record))
+
+            # Group commit: the first waiting thread writes and fsyncs every
+            # queued record; the others wait for a sync that covers them
+            try:
+                while self._synced_seq < ticket:
+                    if self._flushing:
+                        self._flushed.wait()
+                        continue
+                    self._flush()
+            finally:
+                self._in_flight.discard(batch)
+                self._flushed.notify_all()
+
+            if ticket in self._failed:
+                self._failed.discard(ticket)
+                raise OSError(f"could not write batch {batch} to the WAL")
+            if batch is not None:
+                self.last_seq[console] = max(self.last_seq.get(console, -1), seq)
+            self.wal_events += len(events)
+            self.stats['batches'] += 1
+            self.stats['events'] += len(events)
+        return True
+
+    def _flush(self):
+        """Write and fsync every queued record; called with the lock held."""
+        self._flushing = True
+        queued, self._queue = self._queue, []
+        covered = queued[-1][0]
+        self._lock.release()
+        offset = self._wal.tell()
+        try:
+            self._wal.write(b''.join(record for _, record in queued))
+            self._wal.flush()
+            os.fsync(self._wal.fileno())
+            ok = True
+        except OSError as e:
+            print(f"WAL write failed: {e}", file=sys.stderr)
+            self._rewind(offset)
+            ok = False
+        finally:
+            self._lock.acquire()
+            self._flushing = False
+            self._synced_seq = covered
+            if ok:
+                self.stats['fsyncs'] += 1
+            else:
+                self.stats['write_errors'] += 1
+                self._failed.update(ticket for ticket, _ in queued)
+            self._flushed.notify_all()
+
+    def _rewind(self, offset):
+        """Cut a failed write off the WAL, so the next record starts on a clean line."""
+        try:
+            self._wal.close()
+        except OSError:
+            pass  # The failed write's buffer, dropped by the truncate below
+        self._wal = open(self.wal_path, 'ab')
+        try:
+            self._wal.truncate(offset)
+        except OSError as e:
+            print(f"Could not truncate the WAL after a failed write: {e}", file=sys.stderr)
+
+    def compact(self):
+        """Move every logged event into the dataset. Returns the number of events moved."""
+        with self._compact_lock:
+            with self._lock:
+                # Swap in a fresh WAL; new batches keep flowing while we compact
+                while self._flushing:
+                    self._flushed.wait()
+                pending = self.pending_path
+                if self._wal is not None:
+                    self._wal.close()
+                if os.path.exists(self.wal_path) and not os.path.exists(pending):
+                    os.replace(self.wal_path, pending)
+                self._wal = open(self.wal_path, 'ab')
+                self.wal_events = 0
+
+            if not os.path.exists(pending):
+                return 0
+            seqs = self._load_seqs()   # Batches already in the dataset
+            records, bad, received = self._read_pending(pending, seqs)
+
+            # Partition sizes before this WAL is applied, recorded once: after
+            # a crash, a match whose partition has grown since was already written
+            journal_path = pending + '.journal'
+            by_match = {}
+            for record in records:
+                by_match.setdefault(str(record['events'][0]['matchId']), []).append(record)
+            try:
+                with open(journal_path) as f:
+                    before = json.load(f)
+            except FileNotFoundError:
+                before = {match_id: dataset.partition_rows(self.root, match_id) for match_id in by_match}
+                with open(journal_path + '.tmp', 'w') as f:
+                    json.dump(before, f)
+                os.replace(journal_path + '.tmp', journal_path)
+
+            moved = 0
+            already_written = []
+            for match_id, match_records in by_match.items():
+                if dataset.partition_rows(self.root, match_id) != before.get(match_id, 0):
+                    already_written.append(match_id)
+                    continue
+                events = [event for record in match_records for event in record['events']]
+                try:
+                    dataset.append_partitions(to_frame(events), self.root)
+                    moved += len(events)
+                except Exception as e:  # One match's records must not hold up the rest
+                    bad.extend((record, f"{type(e).__name__}: {e}") for record in match_records)
+            if already_written:
+                dataset.sync_manifest(self.root, already_written)
+            self._quarantine(bad)
+
+            for console, seq in received:
+                seqs[console] = max(seqs.get(console, -1), seq)
+            with open(self.seq_path + '.tmp', 'w') as f:
+                json.dump(seqs, f)
+            os.replace(self.seq_path + '.tmp', self.seq_path)
+            os.remove(pending)
+            os.remove(journal_path)
+
+            with self._lock:
+                for console, seq in seqs.items():
+                    self.last_seq[console] = max(self.last_seq.get(console, -1), seq)
+                self.stats['compactions'] += 1
+            return moved
+
+    def _read_pending(self, pending, seqs):
+        """
+        Records of a WAL file, one per match, that still need storing;
+        (record, reason) for those that cannot be stored; and the (console,
+        seq) of every batch in the file.
+        """
+        records, bad, seen = [], [], set()
+        with open(pending, 'rb') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Torn final line from a crash mid-write (never acknowledged)
+                try:
+                    console, seq = record.get('console'), record.get('seq')
+                    check_batch_id(console, seq)
+                except (ValueError, AttributeError) as e:
+                    bad.append((record, str(e)))
+                    continue
+                if console is not None and seq is not None:
+                    if (console, seq) in seen or seq <= seqs.get(console, -1):
+                        continue  # Written again by a retry, or already compacted
+                    seen.add((console, seq))
+                try:
+                    for event in record['events']:
+                        check_event(event)
+                except (ValueError, KeyError, TypeError) as e:
+                    bad.append((record, str(e)))
+                    continue
+                # A batch can span matches (console switched match); split it
+                split = {}
+                for event in record['events']:
+                    split.setdefault(str(event['matchId']), []).append(event)
+                records.extend({**record, 'events': events} for events in split.values())
+        return records, bad, seen
+
+    def _quarantine(self, bad):
+        """Append records that cannot be stored, with the reason, to the quarantine file."""
+        if not bad:
+            return
+        with open(self.quarantine_path, 'a') as f:
+            for record, reason in bad:
+                f.write(json.dumps({'reason': reason, 'record': record}) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        print(f"Quarantined {len(bad)} WAL record(s) in {self.quarantine_path}", file=sys.stderr)
+        with self._lock:
+            self.stats['quarantined'] += len(bad)
+
+    def close(self):
+        try:
+            self.compact()
+        finally:
+            self._wal.close()
+
+
+# --- HTTP ---
+
+class IngestHandler(BaseHTTPRequestHandler):
+    server_version = 'ScoutIngest/1.0'
+    protocol_version = 'HTTP/1.1'  # Keep-alive for consoles posting every few seconds
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _reply(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        # The console is opened from file:// or a static host
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_OPTIONS(self):
+        self._reply(204, {})
+
+    def do_GET(self):
+        if self.path != '/health':
+            return self._reply(404, {'error': 'not found'})
+        log = self.server.log
+        self._reply(200, {'status': 'ok', 'wal_events': log.wal_events, **log.stats})
+
+    def do_POST(self):
+        if self.path != '/events':
+            return self._reply(404, {'error': 'not found'})
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY_BYTES:
+            return self._reply(413, {'error': 'batch too large'})
+        try:
+            body = json.loads(self.rfile.read(length))
+            if isinstance(body, list):
+                body = {'events': body}
+            events = body['events']
+            if not isinstance(events, list):
+                raise ValueError('events must be a list')
+            console, seq = body.get('console'), body.get('seq')
+            check_batch_id(console, seq)
+            for i, event in enumerate(events):
+                try:
+                    check_event(event)
+                except ValueError as e:
+                    raise ValueError(f"event {i}: {e}") from None
+        except (ValueError, KeyError, TypeError) as e:
+            return self._reply(400, {'error': f"bad batch: {e}"})
+
+        try:
+            stored = self.server.log.append(console, seq, events)
+        except OSError as e:
+            return self._reply(503, {'error': f"not stored, retry: {e}"})
+        except Exception as e:  # Answer rather than drop the connection
+            return self._reply(500, {'error': f"{type(e).__name__}: {e}"})
+        self._reply(200, {'accepted': len(events), 'duplicate': not stored})
+        if self.server.log.wal_events >= COMPACT_EVENTS:
+            self.server.request_compaction()
+
+
+class IngestServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, root=ROOT, compact_interval=COMPACT_INTERVAL, verbose=False):
+        super().__init__(address, IngestHandler)
+        self.log = EventLog(root)
+        self.verbose = verbose
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._compactor = threading.Thread(target=self._compact_loop, args=(compact_interval,), daemon=True)
+        self._compactor.start()
+
+    def request_compaction(self):
+        self._wake.set()
+
+    def _compact_loop(self, interval):
+        while not self._stop.is_set():
+            self._wake.wait(interval)
+            self._wake.clear()
+            if self.log.wal_events or os.path.exists(self.log.pending_path):
+                try:
+                    self.log.compact()
+                except Exception as e:  # Keep compacting; the WAL is retried next time
+                    self.log.stats['compaction_errors'] += 1
+                    print(f"Compaction failed: {type(e).__name__}: {e}", file=sys.stderr)
+
+    def server_close(self):
+        self._stop.set()
+        self._wake.set()
+        self._compactor.join()
+        super().server_close()
+        self.log.close()
+
+
+# --- MAIN ---
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch event ingest for the scouting console.")
+    parser.add_argument('--root', default=ROOT, help='Dataset directory events are compacted into')
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--compact-interval', type=float, default=COMPACT_INTERVAL)
+    parser.add_argument('--verbose', action='store_true', help='Log every request')
+    args = parser.parse_args(argv)
+
+    server = IngestServer((args.host, args.port), args.root, args.compact_interval, args.verbose)
+
+    # `kill` stops the server like Ctrl+C, so the final compaction still runs
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+    signal.signal(signal.SIGTERM, stop)
+
+    print(f"Ingesting into {args.root} on http://{args.host}:{args.port}/events (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Stopped. {server.log.stats['events']} events in {server.log.stats['batches']} batches.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,323 @@
+"""
+Opt-in stage timing and profiling for chart runs.
+
+Set SCOUT_TRACE to switch it on (it is off by default):
+
+    SCOUT_TRACE=1               named stage timers, event counts, bytes read
+    SCOUT_TRACE=profile         ...plus cProfile (top functions, and a .prof file)
+    SCOUT_TRACE=memory          ...plus tracemalloc (peak and per-stage allocation)
+    SCOUT_TRACE=profile,memory  both
+
+Every run writes one JSON trace to SCOUT_TRACE_DIR (default output/traces),
+named <run>-<date>-<time>-<pid>-<n> with n counting the process's runs; an
+existing trace is never overwritten.
+The runners (scout.py, render_all.py, season.py) open a named run per chart;
+anything else, such as running a chart script directly, gets one run per
+process, written at exit.
+
+    with stage('load'):            nested stages are timed separately
+        df = ...
+        count(events=len(df))      added to the run and to the open stages
+
+    @timed('compute')              decorator form
+    def prepare(df): ...
+
+When disabled, stage() returns a shared no-op object, count() returns
+immediately and @timed returns the function unchanged, so the instrumented
+code pays no more than a function call.
+
+Usage:
+    SCOUT_TRACE=1 python src/scout.py heatmap --team Home --no-cache
+    python src/instrument.py output/traces/chart-heatmap-*.json
+"""
+import argparse
+import atexit
+import contextlib
+import functools
+import itertools
+import json
+import os
+import sys
+import time
+
+# --- CONFIGURATION ---
+ENV_VAR = 'SCOUT_TRACE'
+TRACE_DIR = os.environ.get('SCOUT_TRACE_DIR', 'output/traces')
+PROFILE_TOP = 25  # Functions kept in the trace, by own time
+
+OPTIONS = {opt.strip() for opt in os.environ.get(ENV_VAR, '').lower().split(',')} - {'', '0', 'off', 'false'}
+ENABLED = bool(OPTIONS)
+PROFILE = bool(OPTIONS & {'profile', 'all'})
+MEMORY = bool(OPTIONS & {'memory', 'all'})
+
+_current = None  # Innermost open Run
+_run_numbers = itertools.count(1)  # Per-process suffix of trace file names
+
+
+class _NullStage:
+    """What stage() returns when tracing is off."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def count(self, **values):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+# --- RUNS AND STAGES ---
+
+class Stage:
+    def __init__(self, run, name):
+        self.run = run
+        self.name = name
+        self.counts = {}
+
+    def count(self, **values):
+        for key, value in values.items():
+            self.counts[key] = self.counts.get(key, 0) + value
+
+    def __enter__(self):
+        self.parent = self.run.open_stages[-1] if self.run.open_stages else None
+        self.run.open_stages.append(self)
+        self.child_secs = 0.0
+        self.mem_start = _traced_bytes()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        secs = time.perf_counter() - self.start
+        self.run.open_stages.pop()
+        if self.parent is not None:
+            self.parent.child_secs += secs
+        record = {
+            'name': self.name,
+            'path': '/'.join(s.name for s in self.run.open_stages + [self]),
+            'start': self.start - self.run.start,
+            'secs': secs,
+            'self_secs': secs - self.child_secs,
+            **self.counts,
+        }
+        if self.mem_start is not None:
+            record['alloc_mb'] = (_traced_bytes() - self.mem_start) / 2**20
+        if exc_type is not None:
+            record['error'] = exc_type.__name__
+        self.run.stages.append(record)
+        return False
+
+
+class Run:
+    """One traced run: stages, counters and optional profiles, saved as JSON."""
+
+    def __init__(self, name, **meta):
+        self.name = name
+        self.meta = meta
+        self.stages = []
+        self.open_stages = []
+        self.counters = {}
+        self.profiler = None
+        self.tracing_memory = False
+        self.outer = None              # Run that was open when this one started
+
+    def begin(self):
+        self.started = time.time()
+        self.start = time.perf_counter()
+        if PROFILE and not _profiler_active():
+            import cProfile
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        if MEMORY:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self.tracing_memory = True
+        return self
+
+    def count(self, **values):
+        for key, value in values.items():
+            self.counters[key] = self.counters.get(key, 0) + value
+        for open_stage in self.open_stages:
+            open_stage.count(**values)
+
+    def finish(self, error=None):
+        wall_secs = time.perf_counter() - self.start
+        trace = {
+            'run': self.name, 'pid': os.getpid(), 'argv': sys.argv,
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+            'wall_secs': wall_secs, 'meta': self.meta, 'counters': self.counters,
+            'stages': sorted(self.stages, key=lambda s: s['start']),
+        }
+        if error is not None:
+            trace['error'] = error
+        path = _new_trace_path(self.name)
+
+        if self.profiler is not None:
+            self.profiler.disable()
+            self.profiler.dump_stats(path + '.prof')
+            trace['profile'] = {'file': path + '.prof', 'top': _top_functions(self.profiler)}
+        if self.tracing_memory:
+            import tracemalloc
+            current, peak = tracemalloc.get_traced_memory()
+            top = tracemalloc.take_snapshot().statistics('lineno')[:10]
+            tracemalloc.stop()
+            trace['memory'] = {
+                'peak_mb': peak / 2**20, 'current_mb': current / 2**20,
+                'top': [{'line': str(s.traceback), 'mb': s.size / 2**20} for s in top],
+            }
+
+        with open(path + '.json', 'w') as f:
+            json.dump(trace, f, indent=1, default=str)
+        return path + '.json'
+
+
+def _slug(name):
+    return ''.join(c if c.isalnum() or c in '-_.' else '-' for c in name)
+
+
+def _new_trace_path(name):
+    """Path (without extension) of a new trace; its .json file is created here, so no run can take it."""
+    os.makedirs(TRACE_DIR, exist_ok=True)
+    base = os.path.join(TRACE_DIR, f"{_slug(name)}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}")
+    while True:
+        path = f"{base}-{next(_run_numbers)}"
+        try:
+            with open(path + '.json', 'x'):
+                return path
+        except FileExistsError:
+            continue
+
+
+def _traced_bytes():
+    if not MEMORY:
+        return None
+    import tracemalloc
+    return tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+
+
+def _profiler_active():
+    run = _current
+    while run is not None:
+        if run.profiler is not None:
+            return True
+        run = run.outer
+    return False
+
+
+def _top_functions(profiler):
+    import pstats
+    stats = pstats.Stats(profiler).stats
+    rows = []
+    for (filename, line, func), (_, calls, tottime, cumtime, _) in stats.items():
+        rows.append({'function': f"{os.path.basename(filename)}:{line}({func})",
+                     'calls': calls, 'tottime': tottime, 'cumtime': cumtime})
+    # By own time: cumulative time is dominated by the import machinery and
+    # the stage functions the trace already times
+    return sorted(rows, key=lambda r: -r['tottime'])[:PROFILE_TOP]
+
+
+def _process_run():
+    """The implicit per-process run for stages outside any trace_run()."""
+    global _current
+    if _current is None:
+        script = os.path.splitext(os.path.basename(sys.argv[0] or 'python'))[0] or 'python'
+        _current = Run(script).begin()
+        atexit.register(_finish_process_run, _current)
+    return _current
+
+
+def _finish_process_run(run):
+    if run.stages or run.counters:
+        run.finish()
+
+
+# --- PUBLIC API ---
+
+def stage(name):
+    """Context manager timing one named stage (no-op unless SCOUT_TRACE is set)."""
+    if not ENABLED:
+        return _NULL_STAGE
+    return Stage(_process_run(), name)
+
+
+def count(**values):
+    """Add to the run's counters, e.g. count(events=len(df), bytes_read=size)."""
+    if ENABLED:
+        _process_run().count(**values)
+
+
+def timed(name):
+    """Decorator form of stage(); leaves the function untouched when disabled."""
+    def decorate(fn):
+        if not ENABLED:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+@contextlib.contextmanager
+def trace_run(name, **meta):
+    """Trace everything inside as one named run with its own JSON file."""
+    global _current
+    if not ENABLED:
+        yield None
+        return
+    run = Run(name, **meta)
+    run.outer = _current
+    _current = run
+    run.begin()
+    error = None
+    try:
+        yield run
+    except BaseException as e:
+        error = repr(e)
+        raise
+    finally:
+        _current = run.outer
+        run.finish(error)
+
+
+# --- MAIN ---
+
+def format_trace(trace):
+    """Stage tree of a saved trace as text."""
+    lines = [f"{trace['run']}  {trace['wall_secs']:.3f}s wall  started {trace['started']}"]
+    if trace['counters']:
+        lines.append('  ' + ', '.join(f"{k}={v:,}" for k, v in trace['counters'].items()))
+    for s in trace['stages']:
+        depth = s['path'].count('/')
+        extras = ', '.join(f"{k}={s[k]:,}" for k in s if k not in
+                           ('name', 'path', 'start', 'secs', 'self_secs', 'alloc_mb', 'error'))
+        alloc = f" {s['alloc_mb']:+.1f} MB" if s.get('alloc_mb') is not None else ''
+        error = f"  [{s['error']}]" if 'error' in s else ''
+        lines.append(f"  {'  ' * depth}{s['name']:<{24 - 2 * depth}} {s['secs']:>8.3f}s "
+                     f"(self {s['self_secs']:.3f}s){alloc}  {extras}{error}".rstrip())
+    if 'memory' in trace:
+        lines.append(f"  peak traced memory {trace['memory']['peak_mb']:.1f} MB")
+    if 'profile' in trace:
+        lines.append(f"  top functions by own time ({trace['profile']['file']}):")
+        for row in trace['profile']['top'][:10]:
+            lines.append(f"    {row['tottime']:>8.3f}s {row['calls']:>8}  {row['function']}")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print saved run traces as stage trees.")
+    parser.add_argument('traces', nargs='+', help='Trace JSON files')
+    args = parser.parse_args(argv)
+    for path in args.traces:
+        with open(path) as f:
+            print(format_trace(json.load(f)) + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""
+Incremental match momentum for live updates.
+
+03_momentum.py rebuilds the whole timeline for every chart: per-minute sums
+for both teams followed by a full Gaussian filter. During a live match events
+arrive one at a time, so LiveMomentum keeps per-minute threat accumulators for
+each team and, on every append, re-smooths only the minutes whose Gaussian
+window contains the touched minute. The smoothed curve is identical to
+gaussian_filter1d(mode='reflect') on the full series.
+
+Usage:
+    engine = LiveMomentum()
+    engine.append('Home', mins=12, x=84.0, y=47.0)
+    minutes, momentum = engine.curve()
+"""
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from xt_model import default_surface, lookup
+
+# --- CONFIGURATION ---
+SIGMA = 1.5       # Same smoothing as 03_momentum.py
+TRUNCATE = 4.0    # gaussian_filter1d default
+TEAM_INDEX = {'Home': 0, 'Away': 1}
+INITIAL_MINUTES = 128
+
+
+def gaussian_kernel(sigma=SIGMA, truncate=TRUNCATE):
+    """The normalised kernel gaussian_filter1d uses for the same sigma / truncate."""
+    radius = int(truncate * sigma + 0.5)
+    offsets = np.arange(-radius, radius + 1)
+    weights = np.exp(-0.5 / sigma ** 2 * offsets ** 2)
+    return weights / weights.sum()
+
+
+class LiveMomentum:
+    """Per-minute threat accumulators with a windowed smoothing update."""
+
+    def __init__(self, sigma=SIGMA, truncate=TRUNCATE, surface=None):
+        self.kernel = gaussian_kernel(sigma, truncate)
+        self.radius = len(self.kernel) // 2
+        self.surface = default_surface() if surface is None else surface
+
+        self._raw = np.zeros((2, INITIAL_MINUTES))
+        self._smooth = np.zeros((2, INITIAL_MINUTES))
+        self.n_minutes = 0  # Timeline covers minutes 0 .. last event minute + 1
+        self.n_events = 0
+        self.goals = []     # (minute, team) of every goal
+
+    # --- UPDATES ---
+
+    def append(self, team, mins, x, y, event=None, qualifier=None):
+        """Add one event and refresh the affected part of the smoothed curve."""
+        mins = int(mins)
+        self._grow(mins + 2)
+        self._raw[TEAM_INDEX[team], mins] += float(lookup(self.surface, x, y))
+        if event == 'Shot' and qualifier == 'Goal':
+            self.goals.append((mins, team))
+        self.n_events += 1
+        self._refresh(mins, mins)
+
+    def append_events(self, df):
+        """Add a batch of events (a DataFrame with Team, Mins, X, Y) in one update."""
+        if df.empty:
+            return
+        mins = df['Mins'].to_numpy().astype(np.int64)
+        team = df['Team'].map(TEAM_INDEX).to_numpy().astype(np.int64)
+        self._grow(int(mins.max()) + 2)
+        np.add.at(self._raw, (team, mins), lookup(self.surface, df['X'], df['Y']))
+
+        if 'Event' in df.columns and 'Qualifier' in df.columns:
+            is_goal = ((df['Event'] == 'Shot') & (df['Qualifier'] == 'Goal')).to_numpy()
+            self.goals.extend(zip(mins[is_goal].tolist(), df['Team'].to_numpy()[is_goal].tolist()))
+        self.n_events += len(df)
+        self._refresh(int(mins.min()), int(mins.max()))
+
+    # --- READ ---
+
+    def curve(self):
+        """(minutes, momentum) with momentum = smoothed Home - smoothed Away."""
+        n = self.n_minutes
+        return np.arange(n), self._smooth[0, :n] - self._smooth[1, :n]
+
+    def team_curves(self):
+        """Smoothed per-minute threat for Home and Away."""
+        n = self.n_minutes
+        return self._smooth[0, :n].copy(), self._smooth[1, :n].copy()
+
+    def chart_data(self):
+        """Current state in the shape 03_momentum.render() expects."""
+        minutes, momentum = self.curve()
+        goals = pd.DataFrame(self.goals, columns=['Mins', 'Team'])
+        return {'minutes': pd.Series(minutes, name='Mins'), 'momentum': momentum.copy(), 'goals': goals}
+
+    # --- INTERNALS ---
+
+    def _grow(self, n_minutes):
+        """Extend the timeline; the old right edge must be re-smoothed (reflection moved)."""
+        if n_minutes <= self.n_minutes:
+            return
+        if n_minutes > self._raw.shape[1]:
+            capacity = max(n_minutes, 2 * self._raw.shape[1])
+            for name in ['_raw', '_smooth']:
+                grown = np.zeros((2, capacity))
+                grown[:, :self.n_minutes] = getattr(self, name)[:, :self.n_minutes]
+                setattr(self, name, grown)
+
+        old_n = self.n_minutes
+        self.n_minutes = n_minutes
+        if old_n:
+            self._refresh(max(0, old_n - 1), max(0, old_n - 1))
+
+    def _refresh(self, first_minute, last_minute):
+        """Re-smooth every minute whose kernel window reaches [first_minute, last_minute]."""
+        n, r = self.n_minutes, self.radius
+        start = max(0, first_minute - r)
+        end = min(n, last_minute + r + 1)
+        if last_minute >= n - r - 1:
+            end = n  # Reflection at the right edge reaches further back
+
+        # Indices of the padded window, mirrored like mode='reflect' (abcd|dcba)
+        idx = np.arange(start - r, end + r) % (2 * n)
+        idx = np.where(idx >= n, 2 * n - 1 - idx, idx)
+
+        windows = sliding_window_view(self._raw[:, idx], len(self.kernel), axis=1)
+        self._smooth[:, start:end] = windows @ self.kernel
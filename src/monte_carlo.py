@@ -0,0 +1,263 @@
+"""
+Monte Carlo match forecasts from the simulator.
+
+Runs tens of thousands of simulated matches (simulator.simulate_batch with
+record_events=False, so no event log is ever built) across a process pool
+and keeps only the final scores. Each batch returns a score matrix (how often
+each Home-Away score came up) and the matrices are summed, which is all that
+win / draw / loss, expected goals and scoreline probabilities need.
+
+Every batch draws from its own stream, spawned from one SeedSequence, and
+batches are merged in submission order. A forecast is therefore reproducible
+for a given (seed, batch size), whatever the number of workers.
+
+Team behaviour uses the simulator's parameters (action weights in the final
+third and in build-up, shot outcome weights, pass and cross success rates).
+Set them directly, or fit them to a team's events in a match CSV.
+
+Usage:
+    python src/monte_carlo.py --sims 50000 --workers 4 --seed 7
+    python src/monte_carlo.py --home shot_outcome_weights=20,30,30,20 --away build_up_weights=70,30
+    python src/monte_carlo.py --fit data/full_match_data.csv --home-team Home --away-team Away
+    python src/monte_carlo.py --sims 200000 --tolerance 0.005       # stop once converged
+"""
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from simulator import ATTACKING_X, DEFAULT_TEAM_PARAMS, simulate_batch
+
+# --- CONFIGURATION ---
+N_SIMS = 20_000
+BATCH_SIZE = 2_500    # Matches per task (simulated in lock-step; larger batches amortise each step)
+MAX_GOALS = 15        # Scores above this are counted at MAX_GOALS
+Z_95 = 1.96
+GOALS_SHOWN = 6       # Goal distribution columns (the last one is "6+")
+TOP_SCORELINES = 5
+
+
+# --- SIMULATION ---
+
+def _simulate(seed_seq, n_matches, home_params, away_params):
+    """Score matrix for one batch: counts[home goals, away goals]."""
+    rng = np.random.default_rng(seed_seq)
+    _, goals = simulate_batch(rng, n_matches, home_params, away_params, record_events=False)
+    goals = np.minimum(goals, MAX_GOALS)
+    counts = np.zeros((MAX_GOALS + 1, MAX_GOALS + 1), dtype=np.int64)
+    np.add.at(counts, (goals[:, 0], goals[:, 1]), 1)
+    return counts
+
+
+def outcome_probabilities(counts):
+    """(home win, draw, away win) shares of a score matrix."""
+    n = counts.sum()
+    home = np.tril(counts, -1).sum()   # Row (home goals) above column
+    away = np.triu(counts, 1).sum()
+    return np.array([home, np.trace(counts), away]) / n
+
+
+def half_width(p, n):
+    """95% confidence half-width of a proportion estimated from n matches."""
+    return Z_95 * np.sqrt(p * (1 - p) / n)
+
+
+def run(n_sims=N_SIMS, home_params=None, away_params=None, seed=None, workers=None,
+        batch_size=BATCH_SIZE, tolerance=None):
+    """
+    Simulate up to `n_sims` matches. Returns a dict with the summed score
+    matrix, the convergence history [(matches, (home, draw, away))] after
+    every batch, and timing. With `tolerance`, stops after the first batch
+    where every outcome's 95% half-width is within it.
+    """
+    if n_sims < 1 or batch_size < 1:
+        raise ValueError(f"n_sims and batch_size must be at least 1, got {n_sims} and {batch_size}")
+    sizes = [min(batch_size, n_sims - first) for first in range(0, n_sims, batch_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    workers = workers or os.cpu_count() or 1
+
+    counts = np.zeros((MAX_GOALS + 1, MAX_GOALS + 1), dtype=np.int64)
+    history = []
+
+    def merge(batch_counts):
+        nonlocal counts
+        counts = counts + batch_counts
+        probs = outcome_probabilities(counts)
+        history.append((int(counts.sum()), probs))
+        return tolerance is not None and half_width(probs, counts.sum()).max() <= tolerance
+
+    t0 = time.perf_counter()
+    if workers == 1 or len(sizes) == 1:
+        for size, batch_seed in zip(sizes, seeds):
+            if merge(_simulate(batch_seed, size, home_params, away_params)):
+                break
+    else:
+        # A bounded window of batches in flight, merged in submission order
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            batches = iter(zip(sizes, seeds))
+            converged = False
+            while not converged:
+                for size, batch_seed in batches:
+                    pending.append(pool.submit(_simulate, batch_seed, size, home_params, away_params))
+                    if len(pending) >= 2 * workers:
+                        break
+                if not pending:
+                    break
+                converged = merge(pending.popleft().result())
+            for future in pending:
+                future.cancel()
+
+    secs = time.perf_counter() - t0
+    n = int(counts.sum())
+    return {'counts': counts, 'history': history, 'matches': n, 'secs': secs,
+            'sims_per_sec': n / secs if secs else float('inf'), 'workers': workers}
+
+
+# --- TEAM PARAMETERS ---
+
+def team_params(events, team):
+    """
+    Simulator parameters for one team, fitted to its events. Needs Event,
+    Qualifier, Team, X, Y and the possession index columns (End_X, End_Y,
+    Kept). Anything the data has no examples of keeps the default.
+    """
+    own = events[(events['Team'] == team).to_numpy()]
+    event = own['Event'].astype(str).to_numpy()
+    x = own['X'].to_numpy()
+    params = {}
+
+    def weights(key, names, rows):
+        counts = [int((event[rows] == name).sum()) for name in names]
+        if sum(counts):
+            params[key] = counts
+
+    weights('final_third_weights', ['Pass', 'Dribble', 'Cross', 'Shot'], x > ATTACKING_X)
+    weights('build_up_weights', ['Pass', 'Dribble'], x <= ATTACKING_X)
+
+    shots = own['Qualifier'][event == 'Shot'].astype(str).value_counts()
+    outcomes = [int(shots.get(q, 0)) for q in ['Goal', 'Saved', 'Off Target', 'Blocked']]
+    if sum(outcomes):
+        params['shot_outcome_weights'] = outcomes
+
+    # A pass or cross succeeded if the team still has the ball on the next event
+    kept = own['Kept'].to_numpy()
+    dist = np.hypot(own['End_X'].to_numpy() - x, own['End_Y'].to_numpy() - own['Y'].to_numpy())
+    for key, rows in [('short_pass_success', (event == 'Pass') & (dist < 15)),
+                      ('long_pass_success', (event == 'Pass') & (dist >= 15)),
+                      ('cross_success', event == 'Cross')]:
+        rows &= ~np.isnan(dist)
+        if rows.any():
+            params[key] = float(kept[rows].mean())
+    return params
+
+
+def fit_params(csv_path, team):
+    from event_store import load_events
+    from possessions import load_index
+    events = load_events(csv_path, columns=['Team', 'Event', 'Qualifier', 'X', 'Y']).join(load_index(csv_path))
+    if not (events['Team'] == team).any():
+        raise ValueError(f"No events for team {team!r} in {csv_path}")
+    return team_params(events, team)
+
+
+def parse_params(pairs):
+    """['shot_outcome_weights=20,30,30,20', 'cross_success=0.6'] -> params dict."""
+    params = {}
+    for pair in pairs or []:
+        key, _, value = pair.partition('=')
+        if key not in DEFAULT_TEAM_PARAMS:
+            raise ValueError(f"Unknown team parameter {key!r} (choose from {', '.join(DEFAULT_TEAM_PARAMS)})")
+        values = [float(v) for v in value.split(',')]
+        if isinstance(DEFAULT_TEAM_PARAMS[key], list):
+            if len(values) != len(DEFAULT_TEAM_PARAMS[key]):
+                raise ValueError(f"{key} needs {len(DEFAULT_TEAM_PARAMS[key])} weights")
+            params[key] = values
+        else:
+            params[key] = values[0]
+    return params
+
+
+# --- REPORT ---
+
+def report(result, home_name='Home', away_name='Away'):
+    counts, n = result['counts'], result['matches']
+    probs = outcome_probabilities(counts)
+    err = half_width(probs, n)
+    goals = np.arange(MAX_GOALS + 1)
+    home_goals, away_goals = counts.sum(axis=1), counts.sum(axis=0)
+
+    lines = [f"{n:,} matches in {result['secs']:.1f}s "
+             f"({result['sims_per_sec']:,.0f} matches/s, {result['workers']} workers)", '']
+    for label, p, e in zip([f"{home_name} win", 'Draw', f"{away_name} win"], probs, err):
+        lines.append(f"  {label:<16} {p:>7.2%}  +/- {e:.2%}")
+
+    header = ' '.join(f"{g:>6}" for g in range(GOALS_SHOWN)) + f" {f'{GOALS_SHOWN}+':>6}"
+    lines += ['', f"  {'Goals':<16} {'Mean':>7}  {header}"]
+    for label, dist in [(home_name, home_goals), (away_name, away_goals)]:
+        shares = np.append(dist[:GOALS_SHOWN], dist[GOALS_SHOWN:].sum()) / n
+        lines.append(f"  {label:<16} {(goals * dist).sum() / n:>7.2f}  " + ' '.join(f"{s:>6.1%}" for s in shares))
+
+    top = np.argsort(counts, axis=None)[::-1][:TOP_SCORELINES]
+    lines += ['', '  Most likely scores: ' + ', '.join(
+        f"{h}-{a} ({counts[h, a] / n:.1%})" for h, a in zip(*np.unravel_index(top, counts.shape)))]
+
+    # Convergence: the estimate and its half-width as matches accumulate
+    lines += ['', f"  {'Matches':>9} {'Home':>8} {'Draw':>8} {'Away':>8} {'+/- max':>8}"]
+    shown, next_shown = [], 1
+    for i, (m, p) in enumerate(result['history']):
+        if m >= next_shown or i == len(result['history']) - 1:
+            shown.append((m, p))
+            next_shown = 2 * m
+    for m, p in shown:
+        lines.append(f"  {m:>9,} {p[0]:>8.2%} {p[1]:>8.2%} {p[2]:>8.2%} {half_width(p, m).max():>8.2%}")
+    return '\n'.join(lines)
+
+
+# --- MAIN ---
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Forecast match outcomes by simulating many matches.")
+    parser.add_argument('--sims', type=int, default=N_SIMS)
+    parser.add_argument('--workers', type=int, default=None, help='Process pool size (default: CPU count)')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--tolerance', type=float, default=None,
+                        help='Stop once every outcome is known to +/- this (95%%)')
+    parser.add_argument('--home', nargs='+', metavar='KEY=VALUE', help='Home team parameters')
+    parser.add_argument('--away', nargs='+', metavar='KEY=VALUE', help='Away team parameters')
+    parser.add_argument('--fit', metavar='CSV', help='Fit both teams to their events in this CSV')
+    parser.add_argument('--home-team', default='Home', help='Team in --fit data playing at home')
+    parser.add_argument('--away-team', default='Away', help='Team in --fit data playing away')
+    args = parser.parse_args(argv)
+    for name in ['sims', 'batch_size', 'workers']:
+        value = getattr(args, name)
+        if value is not None and value < 1:
+            parser.error(f"--{name.replace('_', '-')} must be at least 1, got {value}")
+
+    try:
+        home = fit_params(args.fit, args.home_team) if args.fit else {}
+        away = fit_params(args.fit, args.away_team) if args.fit else {}
+        home.update(parse_params(args.home))
+        away.update(parse_params(args.away))
+    except FileNotFoundError:
+        print(f"Error: Could not find {args.fit}. Run the generator first.")
+        sys.exit(1)
+    except ValueError as e:
+        parser.error(str(e))
+
+    for name, params in [(args.home_team, home), (args.away_team, away)]:
+        if params:
+            print(f"{name}: " + ', '.join(f"{k}={v:.3f}" if isinstance(v, float) else f"{k}={v}"
+                                          for k, v in params.items()))
+
+    result = run(args.sims, home, away, args.seed, args.workers, args.batch_size, args.tolerance)
+    print(report(result, args.home_team, args.away_team))
+
+
+if __name__ == '__main__':
+    main()
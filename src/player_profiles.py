@@ -0,0 +1,164 @@
+"""
+Player profile matrix for radar / pizza charts.
+
+05_radar_chart.py profiles one player by filtering the events and counting
+each event type separately. profile_matrix() does every player at once with a
+single groupby: event counts, per-90 rates and percentile ranks (per-90
+compared with all other players). The matrix is cached next to the event
+store, and export_all() renders a pizza for every player from it in parallel.
+
+Usage:
+    python src/player_profiles.py --csv data/full_match_data.csv
+    python src/player_profiles.py --export --metric p90 --workers 4
+"""
+import argparse
+import contextlib
+import importlib
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+matplotlib.use('Agg')  # Batch export only, nothing is shown
+import matplotlib.pyplot as plt
+import pandas as pd
+
+import render_tiers
+from event_store import cache_dir_for, data_hash, load_events
+
+radar = importlib.import_module('05_radar_chart')
+
+# --- CONFIGURATION ---
+CSV_FILE = 'data/full_match_data.csv'
+OUTPUT_DIR = 'output'
+COLUMNS = ['MatchID', 'Team', 'Player', 'Event', 'Mins']
+PROFILE_EVENTS = radar.attack_events + radar.defense_events
+METRICS = ['count', 'p90', 'pct']
+
+
+# --- MATRIX ---
+
+def profile_matrix(df):
+    """
+    One row per player: Team, Matches, Minutes, then for every profile event
+    its count, '<event> p90' and '<event> pct' (percentile of the per-90 rate).
+
+    The data has no substitutions, so a player is credited with the full
+    length (last event minute) of every match they appear in.
+    """
+    if 'MatchID' not in df.columns:
+        df = df.assign(MatchID='match')
+
+    # Player x Event counts in one groupby (several times faster than pd.crosstab)
+    counts = (
+        df.groupby(['Player', 'Event'], observed=True).size()
+        .unstack(fill_value=0)
+        .reindex(columns=PROFILE_EVENTS, fill_value=0)
+    )
+    counts.columns = list(PROFILE_EVENTS)
+    counts = counts[counts.sum(axis=1) > 0]
+
+    match_length = df.groupby('MatchID', observed=True)['Mins'].max().clip(lower=1)
+    appearances = df[['MatchID', 'Player', 'Team']].drop_duplicates(['MatchID', 'Player'])
+    appearances = appearances[appearances['Player'].isin(counts.index)]
+    appearances['Minutes'] = appearances['MatchID'].map(match_length).astype(float).to_numpy()
+    played = appearances.groupby('Player', observed=True).agg(
+        Team=('Team', 'first'), Matches=('MatchID', 'nunique'), Minutes=('Minutes', 'sum'),
+    )
+
+    matrix = played.join(counts, how='inner')
+    per90 = counts.loc[matrix.index].div(matrix['Minutes'], axis=0) * 90
+    pct = per90.rank(pct=True, method='average') * 100
+
+    matrix = pd.concat([matrix, per90.add_suffix(' p90').round(2), pct.add_suffix(' pct').round(0)], axis=1)
+    matrix.index = matrix.index.astype(str)
+    matrix.index.name = 'Player'
+    matrix['Team'] = matrix['Team'].astype(str)
+    return matrix
+
+
+def radar_data(matrix, player, metric='count'):
+    """The dict 05_radar_chart.render() draws, for one row of the matrix."""
+    row = matrix.loc[player]
+    suffix = '' if metric == 'count' else f" {metric}"
+    params, values, slice_colors = [], [], []
+    for event in PROFILE_EVENTS:
+        is_defense = event in radar.defense_events
+        params.append("Interc." if event == "Interception" else event)
+        value = row[event + suffix]
+        values.append(float(value) if metric == 'p90' else int(value))
+        slice_colors.append(radar.DEFENSE_COLOR if is_defense else radar.ATTACK_COLOR)
+
+    data = {'params': params, 'values': values, 'slice_colors': slice_colors}
+    if metric == 'pct':
+        data['max_range'] = [100] * len(params)
+    return data
+
+
+# --- CACHE ---
+
+def load_profiles(csv_path=CSV_FILE):
+    """profile_matrix() for the CSV, cached until the CSV changes."""
+    cache_path = os.path.join(cache_dir_for(csv_path), f"player_profiles-{data_hash(csv_path)[:12]}.parquet")
+    if os.path.exists(cache_path):
+        return pd.read_parquet(cache_path)
+
+    matrix = profile_matrix(load_events(csv_path, columns=COLUMNS))
+    matrix.to_parquet(cache_path)
+    return matrix
+
+
+# --- BATCH EXPORT ---
+
+def _render_one(job):
+    player, data, output_image = job
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        fig = radar.render(data, player, output_image)
+    plt.close(fig)
+    return player, output_image, time.perf_counter() - t0
+
+
+def export_all(csv_path=CSV_FILE, out_dir=OUTPUT_DIR, metric='count', players=None, workers=None):
+    """Render a pizza per player from the cached matrix. Returns [(player, path, secs)]."""
+    matrix = load_profiles(csv_path)
+    players = list(matrix.index) if players is None else [p for p in players if p in matrix.index]
+    os.makedirs(out_dir, exist_ok=True)
+
+    suffix = '' if metric == 'count' else f"_{metric}"
+    jobs = [(player, radar_data(matrix, player, metric), render_tiers.output_path(os.path.join(out_dir, f"radar_{player}{suffix}")))
+            for player in players]
+
+    if workers == 1:
+        return [_render_one(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_render_one, jobs))
+
+
+# --- MAIN ---
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the player profile matrix and export pizza charts.")
+    parser.add_argument('--csv', default=CSV_FILE)
+    parser.add_argument('--export', action='store_true', help='Render a pizza chart for every player')
+    parser.add_argument('--metric', choices=METRICS, default='count')
+    parser.add_argument('--players', nargs='+', help='Only these players')
+    parser.add_argument('--out', default=OUTPUT_DIR)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    matrix = load_profiles(args.csv)
+    print(f"Profile matrix: {len(matrix)} players ({time.perf_counter() - t0:.2f}s)")
+    if not args.export:
+        print(matrix[['Team', 'Matches', 'Minutes', *PROFILE_EVENTS]].to_string())
+        return
+
+    t0 = time.perf_counter()
+    results = export_all(args.csv, args.out, args.metric, args.players, args.workers)
+    print(f"Rendered {len(results)} pizza charts to {args.out}/ in {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,211 @@
+"""
+Possession / sequence index.
+
+The carry map, pass map and xT leaderboard all need "where did this action
+end?" and "did the team keep the ball?". Each used to work it out on its own
+with shift(-1), ignoring period (and match) boundaries. build_index() derives
+it once, in one vectorized pass, for every row:
+
+    Possession_ID   running id; a new possession starts when the team, the
+                    period or the match changes
+    Seq             order of the event inside its possession (0, 1, 2, ...)
+    Next_Row        row position of the next event in the same match and
+                    period (-1 if there is none)
+    End_X, End_Y    location of the next event in the acting team's frame
+                    (the opponent's coordinates are mirrored on a turnover)
+    Kept            the next event is by the same team
+
+The index is cached next to the event store's Parquet copy, and
+possession_table() summarises each possession so sequence-level questions
+("all possessions reaching the box") are plain boolean filters.
+
+Usage:
+    python src/possessions.py --csv data/full_match_data.csv
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+import instrument
+from event_store import cache_dir_for, data_hash, load_events
+from spatial_index import in_region
+
+# --- CONFIGURATION ---
+INDEX_COLUMNS = ['Possession_ID', 'Seq', 'Next_Row', 'End_X', 'End_Y', 'Kept']
+SOURCE_COLUMNS = ['MatchID', 'Period', 'Team', 'X', 'Y']
+SUMMARY_COLUMNS = ['MatchID', 'Period', 'Team', 'Event', 'Qualifier', 'X', 'Y']
+
+
+# --- HELPERS ---
+
+def _codes(series):
+    """Integer codes for a column so row-to-row comparisons stay numeric."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy()
+    return pd.factorize(series)[0]
+
+
+def same_segment(df):
+    """
+    True at row i where row i+1 is in the same period and (when a MatchID
+    column is present) the same match. Length len(df) - 1.
+    """
+    period = df['Period'].to_numpy()
+    same = period[1:] == period[:-1]
+    if 'MatchID' in df.columns:
+        match = _codes(df['MatchID'])
+        same &= match[1:] == match[:-1]
+    return same
+
+
+def continuation_mask(df):
+    """
+    True where the NEXT event belongs to the same team, in the same period
+    and (when a MatchID column is present) the same match.
+    The last row never continues.
+    """
+    mask = np.zeros(len(df), dtype=bool)
+    if len(df) < 2:
+        return mask
+    team = _codes(df['Team'])
+    mask[:-1] = same_segment(df) & (team[1:] == team[:-1])
+    return mask
+
+
+# --- INDEX ---
+
+def build_index(df):
+    """Possession / sequence columns for every row of `df` (same index, same order)."""
+    n = len(df)
+    has_next = np.zeros(n, dtype=bool)
+    kept = np.zeros(n, dtype=bool)
+    if n > 1:
+        team = _codes(df['Team'])
+        has_next[:-1] = same_segment(df)
+        kept[:-1] = has_next[:-1] & (team[1:] == team[:-1])
+
+    # A possession starts at row 0 and after every row that does not continue
+    starts = np.ones(n, dtype=bool)
+    starts[1:] = ~kept[:-1]
+    possession_id = np.cumsum(starts) - 1
+    first_row = np.flatnonzero(starts)
+    positions = np.arange(n)
+    seq = positions - first_row[possession_id]
+
+    next_row = np.where(has_next, positions + 1, -1)
+
+    # Next event's location, mirrored into this team's frame on a turnover
+    x = df['X'].to_numpy(dtype=np.float32)
+    y = df['Y'].to_numpy(dtype=np.float32)
+    end_x = np.full(n, np.nan, dtype=np.float32)
+    end_y = np.full(n, np.nan, dtype=np.float32)
+    end_x[:-1] = np.where(kept[:-1], x[1:], 100 - x[1:])
+    end_y[:-1] = np.where(kept[:-1], y[1:], 100 - y[1:])
+    end_x[~has_next] = np.nan
+    end_y[~has_next] = np.nan
+
+    return pd.DataFrame({
+        'Possession_ID': possession_id.astype(np.int32),
+        'Seq': seq.astype(np.int32),
+        'Next_Row': next_row.astype(np.int32),
+        'End_X': end_x,
+        'End_Y': end_y,
+        'Kept': kept,
+    }, index=df.index)
+
+
+def ensure_index(df):
+    """`df` with the index columns, joining nothing if they are already there."""
+    if all(col in df.columns for col in INDEX_COLUMNS):
+        return df
+    return pd.concat([df.drop(columns=[c for c in INDEX_COLUMNS if c in df.columns]), build_index(df)], axis=1)
+
+
+# --- SEQUENCE QUERIES ---
+
+def possession_table(df, index=None):
+    """
+    One row per possession: MatchID, Period, Team, First_Row, N_Events,
+    Start_X, Max_X, Reached_Box, Shot and Goal. Needs SUMMARY_COLUMNS.
+    """
+    index = build_index(df) if index is None else index
+    pid = index['Possession_ID'].to_numpy()
+    x = df['X'].to_numpy()
+    y = df['Y'].to_numpy()
+    in_box = in_region(x, y, 'box')  # Ends at the goal line: X > 100 is off the pitch, not in the box
+    is_shot = (df['Event'] == 'Shot').to_numpy()
+    is_goal = is_shot & (df['Qualifier'] == 'Goal').to_numpy()
+
+    rows = pd.DataFrame({
+        'Possession_ID': pid, 'Row': np.arange(len(df)), 'X': x,
+        'Reached_Box': in_box, 'Shot': is_shot, 'Goal': is_goal,
+    })
+    table = rows.groupby('Possession_ID').agg(
+        First_Row=('Row', 'first'), N_Events=('Row', 'size'), Start_X=('X', 'first'),
+        Max_X=('X', 'max'), Reached_Box=('Reached_Box', 'any'), Shot=('Shot', 'any'), Goal=('Goal', 'any'),
+    )
+
+    first = table['First_Row'].to_numpy()
+    labels = ['MatchID', 'Period', 'Team'] if 'MatchID' in df.columns else ['Period', 'Team']
+    for col in reversed(labels):
+        table.insert(0, col, df[col].to_numpy()[first])
+    return table.reset_index()
+
+
+def possession_events(df, index, possession_ids):
+    """All events of the given possessions, in order."""
+    return df[index['Possession_ID'].isin(possession_ids).to_numpy()]
+
+
+# --- PERSISTED INDEX ---
+
+def _cache_path(csv_path, kind):
+    return os.path.join(cache_dir_for(csv_path), f"{kind}-{data_hash(csv_path)[:12]}.parquet")
+
+
+def load_index(csv_path):
+    """
+    Index for every row of the CSV (aligned with load_events()), cached next
+    to the event store until the CSV changes.
+    """
+    with instrument.stage('possession_index'):
+        cache_path = _cache_path(csv_path, 'possession_index')
+        if os.path.exists(cache_path):
+            return pd.read_parquet(cache_path)
+
+        index = build_index(load_events(csv_path, columns=SOURCE_COLUMNS))
+        index.to_parquet(cache_path)
+    return index
+
+
+def load_possessions(csv_path):
+    """Cached possession_table() for the CSV."""
+    cache_path = _cache_path(csv_path, 'possessions')
+    if os.path.exists(cache_path):
+        return pd.read_parquet(cache_path)
+
+    table = possession_table(load_events(csv_path, columns=SUMMARY_COLUMNS), load_index(csv_path))
+    table.to_parquet(cache_path, index=False)
+    return table
+
+
+# --- MAIN ---
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and cache the possession index for a match CSV.")
+    parser.add_argument('--csv', default='data/full_match_data.csv')
+    args = parser.parse_args(argv)
+
+    table = load_possessions(args.csv)
+    summary = table.groupby('Team', observed=True).agg(
+        Possessions=('Possession_ID', 'size'), Avg_Length=('N_Events', 'mean'),
+        Reached_Box=('Reached_Box', 'sum'), Shots=('Shot', 'sum'), Goals=('Goal', 'sum'),
+    )
+    print(f"{len(table)} possessions in {args.csv}")
+    print(summary.round(2).to_string())
+
+
+if __name__ == '__main__':
+    main()
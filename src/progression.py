@@ -0,0 +1,228 @@
+"""
+Vectorized progression tagging.
+
+01_generate_data.py and the simulator tag `Prog Pass` / `Prog Carry` /
+`Prog Reception` while they simulate. Imported event data arrives without
+those tags (or with a provider's own), so this module applies the same rules
+to any event table as whole-array masks:
+
+    Prog Pass       forward >= pass_forward (start X > own_half_x), or
+                    forward >= pass_forward_own_half (start X < own_half_x), or
+                    from outside into the box (end X >= box_x, box_y_min < end Y < box_y_max)
+    Prog Carry      forward >= carry_forward, or crosses midfield_x
+    Prog Reception  receives a Prog Pass, or a pass longer than
+                    reception_pass_dist that ends beyond reception_x
+
+End locations come from the possession index (End_X / End_Y, mirrored on a
+turnover), so an intercepted pass still ends where it was aimed.
+
+geometry() does the work that does not depend on the thresholds, once.
+tag_codes() is only comparisons on those arrays, so changing a threshold and
+re-tagging does not reload or re-derive anything. load_progression() caches
+the derived columns beside the event store, per CSV and threshold set.
+
+Usage:
+    python src/progression.py --csv data/full_match_data.csv
+    python src/progression.py --csv data/full_match_data.csv --pass-forward 15 --carry-forward 12
+"""
+import argparse
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+import instrument
+from event_store import cache_dir_for, data_hash, load_events
+from possessions import load_index
+from spatial_index import BOX_X, BOX_Y_MAX, BOX_Y_MIN
+
+# --- CONFIGURATION ---
+# Defaults are the rules of check_progression() in 01_generate_data.py
+THRESHOLDS = {
+    'pass_forward': 10.0,           # Metres forward for a Prog Pass...
+    'pass_forward_own_half': 15.0,  # ...stricter when it starts before own_half_x
+    'own_half_x': 40.0,
+    'box_x': BOX_X,                 # A pass from outside into the box is progressive
+    'box_y_min': BOX_Y_MIN,         # (spatial_index.REGIONS['box'])
+    'box_y_max': BOX_Y_MAX,
+    'carry_forward': 10.0,          # Metres forward for a Prog Carry...
+    'midfield_x': 50.0,             # ...or any carry across this line
+    'reception_x': 70.0,            # Reception beyond this line...
+    'reception_pass_dist': 10.0,    # ...of a pass longer than this
+}
+PROG_METRICS = ['Prog Pass', 'Prog Carry', 'Prog Reception']
+PROG_PASS, PROG_CARRY, PROG_RECEPTION = range(3)
+EMPTY = -1
+
+SOURCE_COLUMNS = ['MatchID', 'Period', 'Team', 'Event', 'X', 'Y']
+DERIVED_COLUMNS = ['Prog_Metric', 'Forward']
+
+
+def _thresholds(thresholds):
+    unknown = set(thresholds or {}) - set(THRESHOLDS)
+    if unknown:
+        raise ValueError(f"Unknown progression thresholds: {', '.join(sorted(unknown))}")
+    return {**THRESHOLDS, **(thresholds or {})}
+
+
+# --- RULES ---
+# Plain array functions, shared with simulator.py
+
+def pass_progressive(start_x, end_x, end_y, thresholds=THRESHOLDS):
+    t = thresholds
+    forward = end_x - start_x
+    return (
+        ((start_x > t['own_half_x']) & (forward >= t['pass_forward'])) |
+        ((start_x < t['own_half_x']) & (forward >= t['pass_forward_own_half'])) |
+        ((start_x < t['box_x']) & (end_x >= t['box_x']) & (end_y > t['box_y_min']) & (end_y < t['box_y_max']))
+    )
+
+
+def carry_progressive(start_x, end_x, thresholds=THRESHOLDS):
+    t = thresholds
+    return ((end_x - start_x) >= t['carry_forward']) | ((start_x < t['midfield_x']) & (end_x > t['midfield_x']))
+
+
+def reception_progressive(prog_pass, end_x, pass_dist, thresholds=THRESHOLDS):
+    """`prog_pass`, `end_x` and `pass_dist` describe the pass being received."""
+    t = thresholds
+    return prog_pass | ((end_x > t['reception_x']) & (pass_dist > t['reception_pass_dist']))
+
+
+# --- TAGGING ---
+
+def geometry(df, index=None):
+    """
+    Threshold-independent arrays for tag_codes(): event masks, start and end
+    locations, and for each reception the row of the pass it completes.
+    `index` is the possession index for `df` (built from `df` when omitted,
+    or taken from its columns when `df` already carries them).
+    """
+    if index is None:
+        if 'End_X' in df.columns and 'Kept' in df.columns:
+            index = df
+        else:
+            from possessions import build_index
+            index = build_index(df)
+
+    event = df['Event'].to_numpy()
+    x = df['X'].to_numpy(dtype=np.float32)
+    y = df['Y'].to_numpy(dtype=np.float32)
+    end_x = index['End_X'].to_numpy(dtype=np.float32)
+    end_y = index['End_Y'].to_numpy(dtype=np.float32)
+    kept = index['Kept'].to_numpy()
+    is_pass = event == 'Pass'
+
+    # A reception completes the pass on the row before it (same team, same period)
+    from_pass = np.zeros(len(df), dtype=bool)
+    from_pass[1:] = is_pass[:-1] & kept[:-1]
+    is_reception = (event == 'Reception') & from_pass
+    pass_row = np.flatnonzero(is_reception) - 1
+
+    return {
+        'is_pass': is_pass & ~np.isnan(end_x),
+        'is_carry': (event == 'Dribble') & ~np.isnan(end_x),
+        'reception_row': pass_row + 1,
+        'pass_row': pass_row,
+        'x': x, 'y': y, 'end_x': end_x, 'end_y': end_y,
+    }
+
+
+def tag_codes(geom, thresholds=None):
+    """int8 code per row (index into PROG_METRICS, -1 = not progressive)."""
+    t = _thresholds(thresholds)
+    x, end_x, end_y = geom['x'], geom['end_x'], geom['end_y']
+    codes = np.full(len(x), EMPTY, dtype=np.int8)
+
+    prog_pass = geom['is_pass'] & pass_progressive(x, end_x, end_y, t)
+    codes[prog_pass] = PROG_PASS
+    codes[geom['is_carry'] & carry_progressive(x, end_x, t)] = PROG_CARRY
+
+    rows = geom['pass_row']
+    pass_dist = np.hypot(end_x[rows] - x[rows], end_y[rows] - geom['y'][rows])
+    received = reception_progressive(prog_pass[rows], end_x[rows], pass_dist, t)
+    codes[geom['reception_row'][received]] = PROG_RECEPTION
+    return codes
+
+
+def to_metric(codes, index=None):
+    """Prog_Metric column (categorical, NaN = not progressive) from tag codes."""
+    return pd.Series(pd.Categorical.from_codes(codes, categories=PROG_METRICS), index=index, name='Prog_Metric')
+
+
+def tag(df, index=None, thresholds=None):
+    """Prog_Metric for every row of `df`."""
+    return to_metric(tag_codes(geometry(df, index), thresholds), df.index)
+
+
+def retag(df, index=None, thresholds=None):
+    """`df` with its Prog_Metric column replaced by freshly computed tags."""
+    return df.assign(Prog_Metric=tag(df, index, thresholds))
+
+
+# --- PERSISTED TAGS ---
+
+def thresholds_key(thresholds=None):
+    """Short hash of the full threshold set (part of the cache file name)."""
+    blob = json.dumps(_thresholds(thresholds), sort_keys=True).encode()
+    return hashlib.sha1(blob).hexdigest()[:8]
+
+
+def _cache_path(csv_path, thresholds):
+    return os.path.join(cache_dir_for(csv_path),
+                        f"progression-{data_hash(csv_path)[:12]}-{thresholds_key(thresholds)}.parquet")
+
+
+def derived_columns(df, index=None, thresholds=None, geom=None):
+    """Prog_Metric plus Forward (metres gained by passes and carries, NaN elsewhere)."""
+    geom = geometry(df, index) if geom is None else geom
+    moves = geom['is_pass'] | geom['is_carry']
+    forward = np.where(moves, geom['end_x'] - geom['x'], np.nan).astype(np.float32)
+    return pd.DataFrame({
+        'Prog_Metric': pd.Categorical.from_codes(tag_codes(geom, thresholds), categories=PROG_METRICS),
+        'Forward': forward,
+    }, index=df.index)
+
+
+def load_progression(csv_path, thresholds=None):
+    """
+    derived_columns() for every row of the CSV (aligned with load_events()),
+    cached per threshold set until the CSV changes.
+    """
+    with instrument.stage('progression'):
+        cache_path = _cache_path(csv_path, thresholds)
+        if os.path.exists(cache_path):
+            return pd.read_parquet(cache_path)
+
+        columns = derived_columns(load_events(csv_path, columns=SOURCE_COLUMNS), load_index(csv_path), thresholds)
+        columns.to_parquet(cache_path)
+    return columns
+
+
+# --- MAIN ---
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-tag progressive actions with configurable thresholds.")
+    parser.add_argument('--csv', default='data/full_match_data.csv')
+    for name, default in THRESHOLDS.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", dest=name, type=float, default=default)
+    args = parser.parse_args(argv)
+
+    thresholds = {name: getattr(args, name) for name in THRESHOLDS}
+    events = load_events(args.csv, columns=SOURCE_COLUMNS + ['Prog_Metric'])
+    tags = load_progression(args.csv, thresholds)['Prog_Metric']
+
+    print(f"{len(events):,} events in {args.csv} (thresholds {thresholds_key(thresholds)})")
+    counts = pd.DataFrame({
+        'In data': events['Prog_Metric'].value_counts(),
+        'Re-tagged': tags.value_counts(),
+    }).reindex(PROG_METRICS).fillna(0).astype(int)
+    print(counts.to_string())
+    same = (events['Prog_Metric'].astype(object).fillna('') == tags.astype(object).fillna('')).mean()
+    print(f"Agreement with the existing tags: {same:.2%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+"""
+Headless batch renderer.
+
+Loads the match data once and renders every chart (heatmap, momentum, xT,
+radar, shot, carry and pass maps, pass network) for every team / player, fanned out over a
+process pool. Charts whose output is newer than both the data and the chart
+script (with the local modules it imports, see charts.sources()) are
+skipped unless --force is given; other charts whose data and
+parameters were rendered before are copied from the render cache (see
+render_cache.py). --tier picks preview / final / svg / pdf output (see
+render_tiers.py); the report lists render time and file size per chart.
+
+Usage:
+    python src/render_all.py --csv data/full_match_data.csv --out-dir output
+    python src/render_all.py --tier preview
+"""
+import argparse
+import contextlib
+import importlib
+import io
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib
+matplotlib.use('Agg')  # Headless: no windows, no plt.show() blocking
+import matplotlib.pyplot as plt
+
+import instrument
+import render_tiers
+from charts import CHARTS, sources
+from event_store import data_hash, load_events
+from render_cache import RenderCache
+from possessions import load_index
+
+# --- CONFIGURATION ---
+CSV_FILE = 'data/full_match_data.csv'
+OUTPUT_DIR = 'output'
+
+# Events and render tier set in each worker by the pool initializer
+_EVENTS = None
+_TIER = None
+
+
+# --- JOBS ---
+
+def build_jobs(df, out_dir, charts=None, tier=None):
+    """One (chart, target, output path) job per chart and team / player."""
+    teams = sorted(df['Team'].dropna().unique())
+    players = sorted(df['Player'].dropna().unique())
+
+    jobs = []
+    for chart, (_, scope) in CHARTS.items():
+        if charts and chart not in charts:
+            continue
+        if scope == 'match':
+            jobs.append((chart, None, render_tiers.output_path(os.path.join(out_dir, chart), tier)))
+            continue
+        for target in (teams if scope == 'team' else players):
+            jobs.append((chart, target, render_tiers.output_path(os.path.join(out_dir, f"{chart}_{target}"), tier)))
+    return jobs
+
+
+def is_up_to_date(chart, output_image, csv_path):
+    """Output exists and is newer than the data, the chart script and the local modules it imports."""
+    if not os.path.exists(output_image):
+        return False
+    newest_input = max(os.path.getmtime(path) for path in (csv_path, *sources(CHARTS[chart][0])))
+    return os.path.getmtime(output_image) >= newest_input
+
+
+def render_chart(events, chart, target, output_image, tier=None):
+    """
+    Run one chart's prepare() + render() on already loaded events, saved in
+    `tier` (default: the active render tier). Returns (status, seconds) with
+    status 'rendered' or 'no data'.
+    """
+    module = importlib.import_module(CHARTS[chart][0])
+    start = time.perf_counter()
+
+    # The scripts print progress for interactive use; keep the batch report clean
+    with contextlib.redirect_stdout(io.StringIO()), render_tiers.use(tier or render_tiers.TIER):
+        if target is None:
+            data = module.prepare(events)
+            fig = module.render(data, output_image) if data is not None else None
+        else:
+            data = module.prepare(events, target)
+            fig = module.render(data, target, output_image) if data is not None else None
+
+    if fig is not None:
+        plt.close(fig)
+    return ('rendered' if fig is not None else 'no data'), time.perf_counter() - start
+
+
+def _init_worker(events, tier):
+    global _EVENTS, _TIER
+    _EVENTS, _TIER = events, tier
+
+
+def _render_job(events, job, tier=None):
+    """render_chart() as its own traced run (see instrument.py)."""
+    chart, target, output_image = job
+    with instrument.trace_run(f"render_all-{chart}", target=target, output=output_image, tier=tier):
+        return render_chart(events, chart, target, output_image, tier)
+
+
+def _run_job(job):
+    return _render_job(_EVENTS, job, _TIER)
+
+
+# --- MAIN ---
+
+def run(csv_path=CSV_FILE, out_dir=OUTPUT_DIR, workers=None, force=False, charts=None, cache=None, tier=None):
+    """
+    Render every chart; returns a list of (chart, target, output, status, seconds).
+    `cache` is a RenderCache (or None to always render); --force skips lookups
+    but still refreshes the cache. `tier` is a render tier (render_tiers.py).
+    """
+    tier = tier or render_tiers.TIER
+    t0 = time.perf_counter()
+    # Possession index (end locations, possession kept) is shared by every chart
+    events = load_events(csv_path).join(load_index(csv_path))
+    print(f"Loaded {len(events)} rows from {csv_path} in {time.perf_counter() - t0:.2f}s")
+
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = build_jobs(events, out_dir, charts, tier)
+    events_hash = data_hash(csv_path) if cache is not None else None
+
+    results = []
+    pending = []
+    keys = {}
+    for job in jobs:
+        chart, target, output_image = job
+        if not force and is_up_to_date(chart, output_image, csv_path):
+            results.append((*job, 'up to date', 0.0))
+            continue
+        if cache is not None:
+            keys[job] = cache.key(events_hash, chart, target, CHARTS[chart][0], tier=tier)
+            start = time.perf_counter()
+            if not force and cache.fetch(keys[job], output_image):
+                results.append((*job, 'cached', time.perf_counter() - start))
+                continue
+        pending.append(job)
+
+    workers = workers or os.cpu_count() or 1
+    rendered = []
+    if workers == 1 or len(pending) <= 1:
+        for job in pending:
+            rendered.append((*job, *_render_job(events, job, tier)))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(events, tier)) as pool:
+            futures = {pool.submit(_run_job, job): job for job in pending}
+            for future in as_completed(futures):
+                rendered.append((*futures[future], *future.result()))
+
+    if cache is not None:
+        for chart, target, output_image, status, secs in rendered:
+            if status == 'rendered':
+                cache.store(keys[(chart, target, output_image)], output_image, secs)
+        cache.save()
+    return results + rendered
+
+
+def print_report(results, wall_secs):
+    print(f"\n{'Chart':<10} {'Target':<8} {'Status':<11} {'Time':>7} {'Size':>9}  Output")
+    total_bytes = 0
+    for chart, target, output_image, status, secs in sorted(results, key=lambda r: (r[0], str(r[1]))):
+        size = os.path.getsize(output_image) if os.path.exists(output_image) else 0
+        total_bytes += size
+        print(f"{chart:<10} {str(target or '-'):<8} {status:<11} {secs:>6.2f}s {size / 1024:>6.0f} KB  {output_image}")
+
+    rendered = [r for r in results if r[3] == 'rendered']
+    cpu_secs = sum(r[4] for r in rendered)
+    print(f"\nRendered {len(rendered)} / {len(results)} charts "
+          f"({cpu_secs:.1f}s chart time, {wall_secs:.1f}s wall, {total_bytes / 2**20:.1f} MB of images)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render every chart from one data load.")
+    parser.add_argument('--csv', default=CSV_FILE)
+    parser.add_argument('--out-dir', default=OUTPUT_DIR)
+    parser.add_argument('--workers', type=int, default=None, help='Process pool size (default: CPU count)')
+    parser.add_argument('--charts', nargs='+', choices=list(CHARTS), help='Only render these charts')
+    parser.add_argument('--force', action='store_true', help='Re-render charts that are already up to date')
+    parser.add_argument('--no-cache', action='store_true', help='Do not read or fill the render cache')
+    parser.add_argument('--tier', choices=list(render_tiers.TIERS), default=render_tiers.TIER,
+                        help='Output tier (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    cache = None if args.no_cache else RenderCache()
+    t0 = time.perf_counter()
+    try:
+        results = run(args.csv, args.out_dir, args.workers, args.force, args.charts, cache, args.tier)
+    except FileNotFoundError:
+        print(f"Error: Could not find {args.csv}. Run the generator first.")
+        sys.exit(1)
+    print_report(results, time.perf_counter() - t0)
+    if cache is not None:
+        print(cache.report())
+
+
+if __name__ == '__main__':
+    main()
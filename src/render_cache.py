@@ -0,0 +1,210 @@
+"""
+Content-addressed cache of rendered chart images.
+
+Rendering a chart at 300 dpi costs far more than copying a PNG, and most
+nightly renders draw exactly what was drawn the night before. A cache key
+hashes everything a chart depends on:
+
+    - the input events (CSV content hash, or the selected dataset partitions)
+    - the chart, its target (team / player) and any extra render arguments
+    - the chart script's source and its configuration constants (colours,
+      bins, ...), read from the source by charts.constants() so a lookup
+      does not import the script and the plotting stack behind it
+    - the source of every local module the script imports, directly or
+      through other local modules (xt_model.py, possessions.py,
+      render_tiers.py, ...; see charts.sources())
+
+On a hit the stored image (PNG, or SVG / PDF for the vector render tiers)
+is copied to the requested output instead of rendering. Entries are evicted
+least-recently-used once the cache grows past its size limit, and hit / miss
+counts and the render time saved are kept in the cache index.
+
+Usage:
+    python src/render_cache.py            # stats
+    python src/render_cache.py --clear
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import dataset
+from charts import constants, sources
+from event_store import data_hash, file_hash
+
+# --- CONFIGURATION ---
+CACHE_DIR = 'output/.render_cache'
+MAX_BYTES = 500 << 20        # LRU eviction beyond this total size
+INDEX_NAME = 'index.json'
+# Module constants that name files rather than change what is drawn
+IGNORED_PARAMS = {'CSV_FILE', 'OUTPUT_IMAGE', 'OUTPUT_DIR', 'COLUMNS'}
+
+
+# --- KEYS ---
+
+def chart_params(module_name):
+    """The chart script's UPPER_CASE configuration values that can be serialised."""
+    params = {}
+    for name, value in constants(module_name).items():
+        if name in IGNORED_PARAMS:
+            continue
+        try:
+            params[name] = json.loads(json.dumps(value, default=list))
+        except (TypeError, ValueError):
+            continue  # Bytes, complex and other non-JSON literals
+    return params
+
+
+def source_hash(source, match_ids=None):
+    """
+    Hash of the input events: a CSV's content hash, or for a dataset
+    directory the selected partitions' files (size and mtime).
+    """
+    if not dataset.is_dataset(source):
+        paths = sorted(glob.glob(source)) or [source]
+        return hashlib.sha1('|'.join(data_hash(p) for p in paths).encode()).hexdigest()
+
+    digest = hashlib.sha1()
+    for match_id, info in sorted(dataset.read_manifest(source).items()):
+        if match_ids is not None and match_id not in match_ids:
+            continue
+        stat = os.stat(os.path.join(source, info['file']))
+        digest.update(f"{match_id}:{stat.st_size}:{stat.st_mtime_ns}|".encode())
+    return digest.hexdigest()
+
+
+class RenderCache:
+    """Image cache with LRU eviction; use from a single process."""
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(cache_dir, INDEX_NAME)
+        os.makedirs(cache_dir, exist_ok=True)
+        try:
+            with open(self.index_path) as f:
+                saved = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            saved = {}
+        self.entries = saved.get('entries', {})   # key -> {size, render_secs, last_used, ext}
+        self.totals = saved.get('totals', {'hits': 0, 'misses': 0, 'saved_secs': 0.0})
+        self.run = {'hits': 0, 'misses': 0, 'saved_secs': 0.0}
+        self._script_hashes = {}
+
+    def _code_hash(self, module_name):
+        """Hash of the chart script and every local module it imports."""
+        if module_name not in self._script_hashes:
+            paths = sources(module_name)
+            joined = '|'.join(f"{os.path.basename(p)}:{file_hash(p)}" for p in paths)
+            self._script_hashes[module_name] = hashlib.sha1(joined.encode()).hexdigest()
+        return self._script_hashes[module_name]
+
+    def key(self, data_hash, chart, target, module_name, **extra):
+        """Cache key of a render; `module_name` is the chart script (charts.CHARTS)."""
+        payload = {
+            'data': data_hash, 'chart': chart, 'target': target, 'extra': extra,
+            'script': self._code_hash(module_name), 'params': chart_params(module_name),
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _path(self, key, ext='.png'):
+        return os.path.join(self.cache_dir, f"{key}{ext}")
+
+    # --- LOOKUP / STORE ---
+
+    def fetch(self, key, output_image):
+        """Copy the cached image to `output_image`. Returns True on a hit."""
+        entry = self.entries.get(key)
+        if entry is None or not os.path.exists(self._path(key, entry.get('ext', '.png'))):
+            self.entries.pop(key, None)
+            self._count('misses')
+            return False
+        os.makedirs(os.path.dirname(os.path.abspath(output_image)), exist_ok=True)
+        shutil.copyfile(self._path(key, entry.get('ext', '.png')), output_image)
+        entry['last_used'] = time.time()
+        self._count('hits')
+        self._count('saved_secs', entry['render_secs'])
+        return True
+
+    def store(self, key, output_image, render_secs):
+        """Add a freshly rendered image, then evict down to the size limit."""
+        if not os.path.exists(output_image):
+            return
+        ext = os.path.splitext(output_image)[1] or '.png'
+        shutil.copyfile(output_image, self._path(key, ext))
+        self.entries[key] = {'size': os.path.getsize(output_image), 'render_secs': render_secs,
+                             'last_used': time.time(), 'ext': ext}
+        self.evict()
+
+    def evict(self):
+        total = sum(e['size'] for e in self.entries.values())
+        for key, entry in sorted(self.entries.items(), key=lambda kv: kv[1]['last_used']):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(self._path(key, entry.get('ext', '.png')))
+            except FileNotFoundError:
+                pass
+            total -= entry['size']
+            del self.entries[key]
+
+    def clear(self):
+        for key, entry in self.entries.items():
+            try:
+                os.remove(self._path(key, entry.get('ext', '.png')))
+            except FileNotFoundError:
+                pass
+        self.entries = {}
+        self.save()
+
+    def save(self):
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'entries': self.entries, 'totals': self.totals}, f)
+        os.replace(tmp_path, self.index_path)
+
+    # --- STATS ---
+
+    def _count(self, name, amount=1):
+        self.run[name] += amount
+        self.totals[name] += amount
+
+    def stats(self):
+        size = sum(e['size'] for e in self.entries.values())
+        return {**self.run, 'entries': len(self.entries), 'bytes': size, 'totals': dict(self.totals)}
+
+    def report(self):
+        s = self.stats()
+        lookups = s['hits'] + s['misses']
+        rate = 100 * s['hits'] / lookups if lookups else 0.0
+        t = s['totals']
+        return (f"Render cache: {s['hits']} hits / {s['misses']} misses ({rate:.0f}% hit rate), "
+                f"{s['saved_secs']:.1f}s render time saved; "
+                f"{s['entries']} images, {s['bytes'] / 2**20:.1f} MB of {self.max_bytes / 2**20:.0f} MB "
+                f"(all time: {t['hits']} hits, {t['misses']} misses, {t['saved_secs']:.1f}s saved)")
+
+
+# --- MAIN ---
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or clear the render cache.")
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    parser.add_argument('--max-mb', type=float, help='Evict down to this size now')
+    parser.add_argument('--clear', action='store_true')
+    args = parser.parse_args(argv)
+
+    cache = RenderCache(args.cache_dir)
+    if args.clear:
+        cache.clear()
+    if args.max_mb is not None:
+        cache.max_bytes = int(args.max_mb * 2**20)
+        cache.evict()
+        cache.save()
+    print(cache.report())
+
+
+if __name__ == '__main__':
+    main()
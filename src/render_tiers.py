@@ -0,0 +1,126 @@
+"""
+Render tiers: how a chart is drawn and written to disk.
+
+    preview   PNG at 72 dpi, for a quick look (a fraction of a second)
+    final     PNG at 300 dpi, for print (what every chart used to write)
+    svg, pdf  vector output; dense data layers are rasterized (see below)
+
+The chart scripts call save() instead of fig.savefig(). It writes the
+figure in the active tier (SCOUT_TIER, default 'final', or use() around the
+render) and logs the savefig time and file size of the files it writes.
+Per-tier drawing settings come from setting(); previews evaluate the
+heatmap KDE on a coarser grid. The runners take --tier and name their files with output_path(): previews
+get a '_preview' suffix, vector tiers their own extension.
+
+A vector file stores every mark, so a season pass map with tens of
+thousands of semi-transparent lines is slow to open and several MB large.
+For svg / pdf, collections with at least RASTERIZE_MARKS marks (line
+segments, markers, arrows) or RASTERIZE_VERTICES vertices (KDE contours) are
+drawn as an embedded image at the tier's dpi. The image costs about the same
+whatever is on it, so below those sizes the vectors are smaller (see
+benchmarks/bench_render_tiers.py). Pitch markings, text and legends stay
+vector.
+
+Usage:
+    SCOUT_TIER=preview python src/07_carry_map.py
+    python src/scout.py carry --team Home --tier svg
+    python src/render_all.py --tier preview
+"""
+import collections
+import contextlib
+import os
+import time
+
+import instrument
+
+# --- CONFIGURATION ---
+# suffix keeps previews from overwriting the final PNGs; a vector tier's
+# dpi is the resolution of its rasterized layers. kde_gridsize is the
+# heatmap's KDE evaluation grid (seaborn's default is 200 x 200).
+TIERS = {
+    'preview': {'format': 'png', 'dpi': 72, 'suffix': '_preview', 'kde_gridsize': 100},
+    'final': {'format': 'png', 'dpi': 300, 'suffix': '', 'kde_gridsize': 200},
+    'svg': {'format': 'svg', 'dpi': 150, 'suffix': '', 'kde_gridsize': 200},
+    'pdf': {'format': 'pdf', 'dpi': 150, 'suffix': '', 'kde_gridsize': 200},
+}
+DEFAULT_TIER = 'final'
+RASTERIZE_MARKS = 5000
+RASTERIZE_VERTICES = 20000
+LOG_SIZE = 1000   # Records kept in LOG (a chart server's workers save for hours)
+
+TIER = os.environ.get('SCOUT_TIER', DEFAULT_TIER)
+# One record per file written (the latest LOG_SIZE): tier, path, savefig secs, bytes, rasterized layers
+LOG = collections.deque(maxlen=LOG_SIZE)
+
+
+def _check(tier):
+    if tier not in TIERS:
+        raise ValueError(f"Unknown render tier {tier!r} (choose from {', '.join(TIERS)})")
+    return tier
+
+
+@contextlib.contextmanager
+def use(tier):
+    """Make `tier` the active tier inside the block."""
+    global TIER
+    previous, TIER = TIER, _check(tier)
+    try:
+        yield
+    finally:
+        TIER = previous
+
+
+def setting(name, tier=None):
+    """A per-tier chart setting, e.g. setting('kde_gridsize'), for the active tier."""
+    return TIERS[_check(tier or TIER)][name]
+
+
+def output_path(path, tier=None):
+    """`path` with the tier's suffix and the extension of its format."""
+    spec = TIERS[_check(tier or TIER)]
+    base = os.path.splitext(path)[0]
+    if not base.endswith(spec['suffix']):
+        base += spec['suffix']
+    return base + '.' + spec['format']
+
+
+def dense_layers(fig):
+    """Collections with enough marks or vertices to be worth rasterizing."""
+    from matplotlib.collections import Collection
+    dense = []
+    for artist in fig.findobj(Collection):
+        # A scatter is one marker path drawn at many offsets
+        paths = artist.get_paths()
+        marks = max(len(paths), len(artist.get_offsets()))
+        if marks >= RASTERIZE_MARKS or sum(len(p.vertices) for p in paths) >= RASTERIZE_VERTICES:
+            dense.append(artist)
+    return dense
+
+
+def save(fig, output_image, tier=None, **savefig_kwargs):
+    """
+    fig.savefig() in the active tier (or `tier`); the tier sets the format
+    and dpi. Returns the path written, whose extension follows the format.
+    """
+    tier = _check(tier or TIER)
+    spec = TIERS[tier]
+    output_image = output_path(output_image, tier)
+
+    # Vector tiers: dense layers become images, only for this save
+    dense = [] if spec['format'] == 'png' else [a for a in dense_layers(fig) if not a.get_rasterized()]
+    for artist in dense:
+        artist.set_rasterized(True)
+    try:
+        with instrument.stage('savefig'):
+            start = time.perf_counter()
+            fig.savefig(output_image, format=spec['format'], dpi=spec['dpi'], **savefig_kwargs)
+            secs = time.perf_counter() - start
+            size = os.path.getsize(output_image)
+            instrument.count(bytes_written=size)
+    finally:
+        for artist in dense:
+            artist.set_rasterized(False)
+
+    LOG.append({'tier': tier, 'path': output_image, 'savefig_secs': secs, 'bytes': size,
+                'rasterized': len(dense)})
+    return output_image
@@ -0,0 +1,183 @@
+"""
+Fast-start command line for the charts, for job queues and scripts.
+
+Only argparse and the chart registry (charts.py) load at start-up. The chosen
+chart's script, and with it pandas / matplotlib, is imported once the
+arguments are parsed, and only if it has to be drawn; the scripts import
+mplsoccer and scipy inside the functions that draw. Matplotlib always runs on
+the headless Agg backend. A chart already in the render cache (see
+render_cache.py) is copied without importing its script, loading the events
+or drawing anything: the default target and the cache key come from the
+script's source (charts.constants()).
+
+Usage:
+    python src/scout.py heatmap --team Home
+    python src/scout.py radar --player H8 --csv data/full_match_data.csv
+    python src/scout.py carry --team Home --tier preview      # see render_tiers.py
+    python src/scout.py all --workers 4                       # render_all.py
+    python src/scout.py season xt --source data/season --team Home
+    python src/scout.py --profile-startup shots --team Away
+
+--profile-startup re-runs the command under `python -X importtime` and
+prints the slowest imports.
+"""
+import argparse
+import importlib
+import os
+import subprocess
+import sys
+import time
+
+import instrument
+import render_tiers
+from charts import CHARTS, TITLES, constants
+
+# --- CONFIGURATION ---
+CSV_FILE = 'data/full_match_data.csv'
+OUTPUT_DIR = 'output'
+PROFILE_TOP = 15  # Imports listed by --profile-startup
+
+# Default target of each scope, read from the chart script's configuration
+SCOPE_DEFAULTS = {'team': 'TEAM_NAME', 'player': 'TARGET_PLAYER'}
+
+# Set before anything imports matplotlib
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+
+# --- CHARTS ---
+
+def run_chart(chart, csv_path=CSV_FILE, target=None, output_image=None, use_cache=True, tier=None):
+    """
+    Render one chart in `tier` (default: the active render tier). Returns
+    (output path or None, status) with status 'cached', 'rendered' or 'no data'.
+    """
+    tier = tier or render_tiers.TIER
+    module_name, scope = CHARTS[chart]
+    if scope != 'match' and target is None:
+        target = constants(module_name)[SCOPE_DEFAULTS[scope]]
+    if output_image is None:
+        suffix = f"_{target}" if target is not None else ''
+        output_image = os.path.join(OUTPUT_DIR, f"{chart}{suffix}")
+    output_image = render_tiers.output_path(output_image, tier)
+
+    # Same key as render_all.py, so either one can reuse the other's images
+    from event_store import data_hash
+    cache = key = None
+    if use_cache:
+        from render_cache import RenderCache
+        cache = RenderCache()
+        key = cache.key(data_hash(csv_path), chart, target, module_name, tier=tier)
+        if cache.fetch(key, output_image):
+            cache.save()
+            return output_image, 'cached'
+
+    from event_store import load_events
+    from possessions import load_index
+    from render_all import render_chart
+    events = load_events(csv_path).join(load_index(csv_path))
+    os.makedirs(os.path.dirname(os.path.abspath(output_image)), exist_ok=True)
+    status, secs = render_chart(events, chart, target, output_image, tier)
+
+    if cache is not None:
+        if status == 'rendered':
+            cache.store(key, output_image, secs)
+        cache.save()
+    return (output_image if status == 'rendered' else None), status
+
+
+# --- STARTUP PROFILE ---
+
+def parse_importtime(stderr):
+    """(module, self seconds, cumulative seconds, depth) per `-X importtime` line."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        self_us, cum_us, name = line[len('import time:'):].split('|')
+        if not self_us.strip().isdigit():
+            continue  # Column header
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        imports.append((name.strip(), int(self_us) / 1e6, int(cum_us) / 1e6, depth))
+    return imports
+
+
+def profile_startup(argv):
+    """Run the command with import timing and report where start-up time goes."""
+    cmd = [sys.executable, '-X', 'importtime', os.path.abspath(__file__), *argv]
+    t0 = time.perf_counter()
+    proc = subprocess.run(cmd, stderr=subprocess.PIPE, text=True)
+    wall_secs = time.perf_counter() - t0
+
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:'):
+            print(line, file=sys.stderr)
+
+    imports = parse_importtime(proc.stderr)
+    # Top-level imports include everything they pulled in, so they add up
+    top_level = [i for i in imports if i[3] == 0]
+    import_secs = sum(i[2] for i in top_level)
+
+    print(f"\nStartup profile: {import_secs:.2f}s importing {len(imports)} modules "
+          f"of {wall_secs:.2f}s wall ({100 * import_secs / wall_secs:.0f}%)")
+    print(f"{'Module':<40} {'Cumulative':>10} {'Self':>8}")
+    for name, self_secs, cum_secs, _ in sorted(top_level, key=lambda i: -i[2])[:PROFILE_TOP]:
+        print(f"{name:<40} {cum_secs:>9.3f}s {self_secs:>7.3f}s")
+    return proc.returncode
+
+
+# --- MAIN ---
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Render scouting charts headlessly.")
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='Report import time per module for this command')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    for chart, (_, scope) in CHARTS.items():
+        sub = commands.add_parser(chart, help=TITLES[chart])
+        sub.add_argument('--csv', default=CSV_FILE)
+        sub.add_argument('--out', help=f"Output image (default: {OUTPUT_DIR}/{chart}_<target>.png)")
+        if scope == 'team':
+            sub.add_argument('--team', dest='target', help="Team (default: the script's TEAM_NAME)")
+        elif scope == 'player':
+            sub.add_argument('--player', dest='target', help="Player (default: the script's TARGET_PLAYER)")
+        sub.add_argument('--no-cache', action='store_true', help='Always render (skip the render cache)')
+        sub.add_argument('--tier', choices=list(render_tiers.TIERS), default=render_tiers.TIER,
+                         help='Output tier (default: %(default)s)')
+
+    # Batch and season modes keep their own options
+    commands.add_parser('all', help='Every chart for every team / player (render_all.py)', add_help=False)
+    commands.add_parser('season', help='Aggregate a chart across many matches (season.py)', add_help=False)
+    return parser
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    parser = build_parser()
+    args, rest = parser.parse_known_args(argv)
+
+    if args.profile_startup:
+        sys.exit(profile_startup([a for a in argv if a != '--profile-startup']))
+
+    if args.command in ('all', 'season'):
+        module = importlib.import_module('render_all' if args.command == 'all' else 'season')
+        return module.main(rest)
+    if rest:
+        parser.error(f"unrecognized arguments: {' '.join(rest)}")
+
+    t0 = time.perf_counter()
+    try:
+        with instrument.trace_run(f"chart-{args.command}", target=getattr(args, 'target', None), csv=args.csv):
+            output_image, status = run_chart(args.command, args.csv, getattr(args, 'target', None),
+                                             args.out, not args.no_cache, args.tier)
+    except FileNotFoundError:
+        print(f"Error: Could not find {args.csv}. Run the generator first.")
+        sys.exit(1)
+    if output_image is None:
+        print(f"No {args.command} data found.")
+        sys.exit(1)
+    print(f"{args.command} chart {status}: {output_image} ({time.perf_counter() - t0:.2f}s)")
+
+
+if __name__ == '__main__':
+    main()
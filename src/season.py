@@ -0,0 +1,192 @@
+"""
+Season-scale aggregation for every chart.
+
+Streams a partitioned dataset (see dataset.py) or a glob of CSVs one match at a
+time. Each chart script's per-match partial is merged into a running total, so
+peak memory depends on a single match rather than the whole season.
+
+Chart scripts take part through optional hooks next to prepare()/render():
+    partial(df, target)   per-match aggregate   (default: prepare)
+    merge(partials)       combine aggregates     (default: concatenate rows)
+    finalize(total, target)                      (default: none)
+
+xT, momentum, radar and the pass network merge fixed-size totals. Shots,
+carries, passes and the KDE heatmap draw one mark per event, so their
+partials are event rows and the default merge concatenates them: memory
+grows with the number of events the chart draws, not with the season. That
+concatenation is capped at MAX_CONCAT_ROWS; beyond it the rows kept are a
+uniform random sample (seeded) of every row seen, and a note says so. For
+season heatmaps, --method hist sums fixed-size grids instead.
+
+Usage:
+    python src/season.py xt --source data/season --team Home
+    python src/season.py heatmap --source "data/*.csv" --team Away --matches match_1 match_2
+    python src/season.py heatmap --source data/season --team Home --method hist
+    python src/season.py pass --source data/season --team Home --tier pdf
+"""
+import argparse
+import functools
+import importlib
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use('Agg')  # Headless: no windows, no plt.show() blocking
+import matplotlib.pyplot as plt
+
+import dataset
+import heatmap_engine
+import instrument
+import render_tiers
+from charts import CHARTS
+from render_cache import RenderCache, source_hash
+
+# --- CONFIGURATION ---
+SOURCE = dataset.DATASET_ROOT
+OUTPUT_DIR = 'output'
+
+# Charts that only look at single rows, so team / player filters can drop
+# rows inside the Parquet scan. The rest need both teams' event sequence.
+ROW_FILTERED = {'heatmap', 'shots', 'radar'}
+# Rows the default (concatenating) merge keeps; beyond this it samples
+MAX_CONCAT_ROWS = 500_000
+SAMPLE_SEED = 2024
+
+
+def concat_partials(partials, max_rows=MAX_CONCAT_ROWS, rng=None):
+    """
+    Default merge: concatenate the partials' rows, keeping at most `max_rows`.
+    Over the cap the result is a uniform sample of every row merged so far;
+    attrs['rows_seen'] counts those rows.
+    """
+    seen = [df.attrs.get('rows_seen', len(df)) for df in partials]
+    total = pd.concat(partials, ignore_index=True)
+    if len(total) > max_rows:
+        # Each partial is a uniform sample of the rows it has seen, so split
+        # the kept rows between them as if drawn from all of those rows at once
+        rng = rng if rng is not None else np.random.default_rng(SAMPLE_SEED)
+        counts = rng.multivariate_hypergeometric(seen, max_rows)
+        offsets = np.cumsum([0] + [len(df) for df in partials])
+        keep = np.concatenate([start + np.sort(rng.choice(stop - start, n, replace=False))
+                               for start, stop, n in zip(offsets[:-1], offsets[1:], counts)])
+        total = total.take(keep).reset_index(drop=True)
+    total.attrs['rows_seen'] = sum(seen)
+    return total
+
+
+def season_data(source, chart, target=None, match_ids=None):
+    """Plot-ready data for `chart` aggregated over every selected match (or None)."""
+    module_name, scope = CHARTS[chart]
+    module = importlib.import_module(module_name)
+    partial_fn = getattr(module, 'partial', module.prepare)
+    merge_fn = getattr(module, 'merge', None) or functools.partial(
+        concat_partials, rng=np.random.default_rng(SAMPLE_SEED))
+    finalize_fn = getattr(module, 'finalize', None)
+
+    scan = {'columns': module.COLUMNS, 'match_ids': match_ids, 'row_filter': chart in ROW_FILTERED}
+    if scope == 'team':
+        scan['teams'] = [target]
+    elif scope == 'player':
+        scan['players'] = [target]
+
+    def match_partial(events):
+        return partial_fn(events) if target is None else partial_fn(events, target)
+
+    with instrument.stage('aggregate'):
+        total = dataset.aggregate(source, match_partial, merge_fn, **scan)
+    if isinstance(total, pd.DataFrame) and total.attrs.get('rows_seen', len(total)) > len(total):
+        print(f"Note: {chart} drawn from a random sample of {len(total):,} of {total.attrs['rows_seen']:,} rows "
+              f"(MAX_CONCAT_ROWS)")
+    if total is None or finalize_fn is None:
+        return total
+    with instrument.stage('finalize'):
+        return finalize_fn(total) if target is None else finalize_fn(total, target)
+
+
+def render_season(source, chart, target=None, output_image=None, match_ids=None, method=None, cache=None,
+                  tier=None):
+    """
+    Aggregate and render one season chart. Returns the output path or None.
+    `method='hist'` draws the heatmap from summed per-match grids (cached in
+    the dataset) instead of a KDE over every event of the season.
+    With a RenderCache, unchanged partitions + parameters skip both the
+    aggregation and the render. `tier` is a render tier (render_tiers.py).
+    """
+    tier = tier or render_tiers.TIER
+    module = importlib.import_module(CHARTS[chart][0])
+    if output_image is None:
+        suffix = f"_{target}" if target is not None else ''
+        output_image = os.path.join(OUTPUT_DIR, f"season_{chart}{suffix}")
+    output_image = render_tiers.output_path(output_image, tier)
+
+    if cache is not None:
+        key = cache.key(source_hash(source, match_ids), chart, target, CHARTS[chart][0], method=method, tier=tier)
+        if cache.fetch(key, output_image):
+            cache.save()
+            return output_image
+    start = time.perf_counter()
+
+    render_kwargs = {}
+    if chart == 'heatmap' and method == 'hist':
+        data = heatmap_engine.season_grid(source, target, module.HIST_BINS, match_ids)
+        data = data if data.any() else None
+        render_kwargs['method'] = 'hist'
+    else:
+        data = season_data(source, chart, target, match_ids)
+    if data is None:
+        if cache is not None:
+            cache.save()
+        return None
+
+    with render_tiers.use(tier):
+        if target is None:
+            fig = module.render(data, output_image, **render_kwargs)
+        else:
+            fig = module.render(data, target, output_image, **render_kwargs)
+    plt.close(fig)
+
+    if cache is not None:
+        cache.store(key, output_image, time.perf_counter() - start)
+        cache.save()
+    return output_image
+
+
+# --- MAIN ---
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a chart aggregated over many matches.")
+    parser.add_argument('chart', choices=list(CHARTS))
+    parser.add_argument('--source', default=SOURCE, help='Dataset directory or CSV glob')
+    parser.add_argument('--team', help='Team for team charts (heatmap, xt, shots, carry, pass)')
+    parser.add_argument('--player', help='Player for the radar chart')
+    parser.add_argument('--matches', nargs='+', help='Only these MatchIDs')
+    parser.add_argument('--out', help='Output image path')
+    parser.add_argument('--method', choices=['kde', 'hist'], help="Heatmap only: 'hist' for the fast binned grid")
+    parser.add_argument('--no-cache', action='store_true', help='Always aggregate and render (skip the render cache)')
+    parser.add_argument('--tier', choices=list(render_tiers.TIERS), default=render_tiers.TIER,
+                        help='Output tier (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    scope = CHARTS[args.chart][1]
+    target = {'team': args.team, 'player': args.player}.get(scope)
+    if scope != 'match' and target is None:
+        parser.error(f"{args.chart} needs --{scope}")
+
+    cache = None if args.no_cache else RenderCache()
+    t0 = time.perf_counter()
+    with instrument.trace_run(f"season-{args.chart}", target=target, source=args.source, method=args.method):
+        output_image = render_season(args.source, args.chart, target, args.out, args.matches, args.method, cache,
+                                     args.tier)
+    if output_image is None:
+        print(f"No {args.chart} data found for {target or 'the selected matches'}.")
+        sys.exit(1)
+    print(f"Season {args.chart} chart saved as {output_image} ({time.perf_counter() - t0:.1f}s)")
+    if cache is not None:
+        print(cache.report())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,368 @@
+"""
+Vectorized, seedable match simulator.
+
+Same match model as 01_generate_data.py (actors, action weights, displacements,
+pass/cross/shot outcomes, progression tags, screen coordinates), but it runs
+a whole batch of matches in lock-step: every step draws one action for every
+live match with NumPy `Generator` calls instead of `random.choices` per event.
+Both periods are simulated. Output is written chunk by chunk, one batch of
+matches at a time, so memory is bounded by the batch size.
+
+Results are reproducible for a given (seed, batch size).
+
+Usage:
+    python src/simulator.py --matches 1000 --seed 7 --format parquet --out data/sim.parquet
+    python src/01_generate_data.py --matches 1000 --seed 7   # same thing
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from progression import carry_progressive, pass_progressive, reception_progressive
+
+# --- CONFIGURATION ---
+HALF_LENGTH_MINS = 45
+PLAYERS_PER_TEAM = 11
+BATCH_SIZE = 200  # Matches simulated together (and written per chunk)
+ATTACKING_X = 80  # Beyond this X the actor picks from final_third_weights (as in 01_generate_data.py)
+
+TEAMS = ['Home', 'Away']
+PLAYERS = [f'H{i}' for i in range(1, 12)] + [f'A{i}' for i in range(1, 12)]
+EVENTS = ['Pass', 'Dribble', 'Cross', 'Shot', 'Reception', 'Interception']
+QUALIFIERS = ['Goal', 'Saved', 'Off Target', 'Blocked']
+PROG_METRICS = ['Prog Pass', 'Prog Carry', 'Prog Reception']
+
+# Codes (index into the lists above, -1 = empty)
+PASS, DRIBBLE, CROSS, SHOT, RECEPTION, INTERCEPTION = range(6)
+GOAL = 0
+PROG_PASS, PROG_CARRY, PROG_RECEPTION = range(3)
+EMPTY = -1
+
+# Per-team behaviour, defaults are the weights used by 01_generate_data.py
+DEFAULT_TEAM_PARAMS = {
+    'final_third_weights': [40, 30, 15, 15],   # Pass, Dribble, Cross, Shot (X > ATTACKING_X)
+    'build_up_weights': [80, 20],              # Pass, Dribble (elsewhere)
+    'shot_outcome_weights': [10, 35, 35, 20],  # Goal, Saved, Off Target, Blocked
+    'short_pass_success': 0.90,                # Passes under 15 units
+    'long_pass_success': 0.70,
+    'cross_success': 0.5,                      # Cross reaches a teammate -> shot
+}
+
+
+# --- HELPERS ---
+
+def _param_arrays(home_params=None, away_params=None):
+    """Stack Home/Away params into arrays indexed by team code (0 Home, 1 Away)."""
+    teams = [{**DEFAULT_TEAM_PARAMS, **(p or {})} for p in (home_params, away_params)]
+
+    def cumulative(key):
+        w = np.array([t[key] for t in teams], dtype=np.float64)
+        return np.cumsum(w / w.sum(axis=1, keepdims=True), axis=1)
+
+    return {
+        'final_third_cum': cumulative('final_third_weights'),
+        'build_up_cum': cumulative('build_up_weights'),
+        'shot_outcome_cum': cumulative('shot_outcome_weights'),
+        'short_pass_success': np.array([t['short_pass_success'] for t in teams]),
+        'long_pass_success': np.array([t['long_pass_success'] for t in teams]),
+        'cross_success': np.array([t['cross_success'] for t in teams]),
+    }
+
+
+def _sample(cum, u):
+    """Category index for uniforms `u` given per-row cumulative probabilities."""
+    return (u[:, None] >= cum[:, :-1]).sum(axis=1)
+
+
+def _screen_coords(team, x, y):
+    """Home: 0->100 is Left->Right. Away is inverted for the screen."""
+    away = team == 1
+    return np.where(away, 100 - x, x), np.where(away, 100 - y, y)
+
+
+# --- SIMULATION ENGINE ---
+
+def simulate_batch(rng, n_matches, home_params=None, away_params=None, record_events=True):
+    """
+    Simulate `n_matches` full matches (two periods) in lock-step.
+
+    Returns (events, goals): `events` is a dict of NumPy columns (None when
+    record_events=False) sorted by match then event order, and `goals` is an
+    (n_matches, 2) array of Home/Away goals.
+    """
+    params = _param_arrays(home_params, away_params)
+    n = n_matches
+
+    mins = np.zeros(n, dtype=np.int32)
+    secs = np.zeros(n, dtype=np.int32)
+    period = np.ones(n, dtype=np.int8)
+    poss = np.zeros(n, dtype=np.int8)  # 0 = Home, 1 = Away
+    cx = np.full(n, 50.0)  # Start at center spot
+    cy = np.full(n, 50.0)
+    force_shot = np.zeros(n, dtype=bool)
+    goals = np.zeros((n, 2), dtype=np.int32)
+    active = np.ones(n, dtype=bool)
+
+    blocks = []
+    step = 0
+    while True:
+        # --- PERIOD MANAGEMENT ---
+        # Second half kicks off with Away at the center spot
+        half_time = active & (period == 1) & (mins >= HALF_LENGTH_MINS)
+        period[half_time] = 2
+        mins[half_time] = HALF_LENGTH_MINS
+        secs[half_time] = 0
+        poss[half_time] = 1
+        cx[half_time], cy[half_time] = 50.0, 50.0
+        force_shot[half_time] = False
+        active &= ~((period == 2) & (mins >= 2 * HALF_LENGTH_MINS))
+
+        idx = np.flatnonzero(active)
+        k = idx.size
+        if k == 0:
+            break
+
+        team = poss[idx]
+        x, y = cx[idx], cy[idx]
+
+        # --- 1. DETERMINE ACTOR ---
+        # GK (index 0) is not picked once the ball is beyond X=30
+        actor = np.where(x > 30, rng.integers(1, PLAYERS_PER_TEAM, k), rng.integers(0, PLAYERS_PER_TEAM, k))
+
+        # --- 2. DETERMINE NEXT ACTION ---
+        u = rng.random(k)
+        action = np.where(
+            x > ATTACKING_X,
+            _sample(params['final_third_cum'][team], u),
+            _sample(params['build_up_cum'][team], u),
+        )
+        # A connected cross leads straight to a shot
+        action[force_shot[idx]] = SHOT
+        force_shot[idx] = False
+
+        # --- 3. EXECUTE ACTION ---
+        event_secs = rng.integers(1, 5, k)
+        dest_x = np.clip(x + rng.integers(-5, 21, k), 0, 100)
+        dest_y = np.clip(y + rng.integers(-25, 26, k), 0, 100)
+
+        row_y = y.copy()
+        qualifier = np.full(k, EMPTY, dtype=np.int8)
+        prog = np.full(k, EMPTY, dtype=np.int8)
+        new_x, new_y, new_team = x.copy(), y.copy(), team.copy()
+        dt = np.zeros(k, dtype=np.int32)
+
+        # -- A. DRIBBLE --
+        is_dribble = action == DRIBBLE
+        prog[is_dribble & carry_progressive(x, dest_x)] = PROG_CARRY
+        new_x[is_dribble], new_y[is_dribble] = dest_x[is_dribble], dest_y[is_dribble]
+        dt[is_dribble] = event_secs[is_dribble]
+
+        # -- B. PASS --
+        is_pass = action == PASS
+        pass_dist = np.hypot(dest_x - x, dest_y - y)
+        success_chance = np.where(
+            pass_dist < 15, params['short_pass_success'][team], params['long_pass_success'][team]
+        )
+        is_success = rng.random(k) < success_chance
+        prog[is_pass & pass_progressive(x, dest_x, dest_y)] = PROG_PASS
+
+        completed = is_pass & is_success
+        new_x[completed], new_y[completed] = dest_x[completed], dest_y[completed]
+        dt[completed] = 3  # Flight time + reception
+
+        # -- D. TURNOVER (Interception) --
+        # The defender's X/Y are the attacker's destination seen from the other end
+        lost = is_pass & ~is_success
+        new_x[lost], new_y[lost] = 100 - dest_x[lost], 100 - dest_y[lost]
+        new_team[lost] = 1 - team[lost]
+        dt[lost] = 4
+
+        # -- E. CROSS --
+        is_cross = action == CROSS
+        row_y[is_cross] = np.where(rng.random(k) < 0.5, 5.0, 95.0)[is_cross]  # Move to wing first
+        connected = is_cross & (rng.random(k) < params['cross_success'][team])
+        cleared = is_cross & ~connected
+        new_x[connected], new_y[connected] = 95.0, 50.0
+        dt[connected] = 2
+        force_shot[idx[connected]] = True
+        new_x[cleared], new_y[cleared] = 15.0, 50.0  # Box clearance area
+        new_team[cleared] = 1 - team[cleared]
+        dt[cleared] = 3
+
+        # -- F. SHOT --
+        is_shot = action == SHOT
+        outcome = _sample(params['shot_outcome_cum'][team], rng.random(k))
+        qualifier[is_shot] = outcome[is_shot]
+        scored = is_shot & (outcome == GOAL)
+        np.add.at(goals, (idx[scored], team[scored]), 1)
+        new_team[is_shot] = 1 - team[is_shot]
+        new_x[is_shot] = np.where(scored[is_shot], 50.0, 5.0)
+        new_y[is_shot] = 50.0
+        dt[is_shot] = 15  # Celebration / Goal kick setup
+
+        # --- LOG EVENTS ---
+        if record_events:
+            sx, sy = _screen_coords(team, x, row_y)
+            blocks.append({
+                'match': idx, 'seq': np.full(k, 2 * step), 'period': period[idx],
+                'team': team, 'player': team * PLAYERS_PER_TEAM + actor, 'event': action,
+                'qualifier': qualifier, 'prog': prog, 'mins': mins[idx], 'secs': secs[idx],
+                'x': x, 'y': row_y, 'sx': sx, 'sy': sy,
+            })
+
+            # Reception or Interception, logged 2 seconds after the pass
+            second = np.flatnonzero(is_pass)
+            if second.size:
+                ok = is_success[second]
+                t2 = np.where(ok, team[second], 1 - team[second])
+
+                receiver = rng.integers(0, PLAYERS_PER_TEAM - 1, second.size)
+                receiver += receiver >= actor[second]  # Anyone but the passer
+                player2 = np.where(ok, receiver, rng.integers(0, PLAYERS_PER_TEAM, second.size))
+
+                x2 = np.where(ok, dest_x[second], 100 - dest_x[second])
+                y2 = np.where(ok, dest_y[second], 100 - dest_y[second])
+                # Interception screen coords use the attacker's destination (as in the generator)
+                sx2, sy2 = _screen_coords(t2, np.where(ok, x2, dest_x[second]), np.where(ok, y2, dest_y[second]))
+
+                rec_prog = reception_progressive(prog[second] == PROG_PASS, dest_x[second], pass_dist[second])
+                blocks.append({
+                    'match': idx[second], 'seq': np.full(second.size, 2 * step + 1), 'period': period[idx[second]],
+                    'team': t2, 'player': t2 * PLAYERS_PER_TEAM + player2,
+                    'event': np.where(ok, RECEPTION, INTERCEPTION),
+                    'qualifier': np.full(second.size, EMPTY, dtype=np.int8),
+                    'prog': np.where(ok & rec_prog, PROG_RECEPTION, EMPTY).astype(np.int8),
+                    'mins': mins[idx[second]], 'secs': secs[idx[second]] + 2,
+                    'x': x2, 'y': y2, 'sx': sx2, 'sy': sy2,
+                })
+
+        # --- UPDATE STATE & TIME MANAGEMENT ---
+        poss[idx], cx[idx], cy[idx] = new_team, new_x, new_y
+        secs[idx] += dt
+        rollover = idx[secs[idx] >= 60]
+        mins[rollover] += 1
+        secs[rollover] -= 60
+        step += 1
+
+    if not record_events:
+        return None, goals
+
+    events = {key: np.concatenate([b[key] for b in blocks]) for key in blocks[0]}
+    order = np.lexsort((events['seq'], events['match']))
+    return {key: col[order] for key, col in events.items()}, goals
+
+
+def to_frame(events, match_ids):
+    """Build a DataFrame with the event_store schema from simulated columns."""
+    def categorical(codes, categories):
+        return pd.Categorical.from_codes(codes.astype(np.int32), categories=categories)
+
+    return pd.DataFrame({
+        'MatchID': categorical(events['match'], match_ids),
+        'Period': events['period'].astype(np.int8),
+        'Team': categorical(events['team'], TEAMS),
+        'Player': categorical(events['player'], PLAYERS),
+        'Event': categorical(events['event'], EVENTS),
+        'Qualifier': categorical(events['qualifier'], QUALIFIERS),
+        'Prog_Metric': categorical(events['prog'], PROG_METRICS),
+        'Mins': events['mins'].astype(np.int16),
+        'Secs': events['secs'].astype(np.int8),
+        'X': events['x'].astype(np.float32),
+        'Y': events['y'].astype(np.float32),
+        'ScreenX': events['sx'].astype(np.float32),
+        'ScreenY': events['sy'].astype(np.float32),
+    })
+
+
+def iter_chunks(n_matches, seed=None, batch_size=BATCH_SIZE, home_params=None, away_params=None):
+    """Yield one DataFrame per batch of simulated matches."""
+    seed_seq = np.random.SeedSequence(seed)
+    prefix = f"sim_{seed_seq.entropy % 10**8:08d}"
+
+    # One independent stream per batch, derived deterministically from the seed
+    starts = range(0, n_matches, batch_size)
+    for first, batch_seed in zip(starts, seed_seq.spawn(len(starts))):
+        size = min(batch_size, n_matches - first)
+        rng = np.random.default_rng(batch_seed)
+        events, _ = simulate_batch(rng, size, home_params, away_params)
+        match_ids = [f"{prefix}_{first + i:06d}" for i in range(size)]
+        yield to_frame(events, match_ids)
+
+
+# --- OUTPUT ---
+
+def _arrow_schema():
+    """Fixed Parquet schema so every chunk appends to the same file."""
+    dictionary = pa.dictionary(pa.int32(), pa.string())
+    types = {
+        'MatchID': dictionary, 'Period': pa.int8(), 'Team': dictionary, 'Player': dictionary,
+        'Event': dictionary, 'Qualifier': dictionary, 'Prog_Metric': dictionary,
+        'Mins': pa.int16(), 'Secs': pa.int8(), 'X': pa.float32(), 'Y': pa.float32(),
+        'ScreenX': pa.float32(), 'ScreenY': pa.float32(),
+    }
+    return pa.schema(list(types.items()))
+
+
+def write_events(n_matches, out, fmt='csv', seed=None, batch_size=BATCH_SIZE):
+    """
+    Simulate and stream matches to `out` ('csv', 'parquet' or 'dataset' for a
+    partitioned directory, see dataset.py). Returns the number of events written.
+    """
+    total = 0
+    writer = None
+    if os.path.dirname(out):
+        os.makedirs(os.path.dirname(out), exist_ok=True)
+
+    try:
+        for chunk_no, chunk in enumerate(iter_chunks(n_matches, seed, batch_size)):
+            if fmt == 'csv':
+                chunk.to_csv(out, mode='w' if chunk_no == 0 else 'a', header=chunk_no == 0, index=False)
+            elif fmt == 'parquet':
+                schema = _arrow_schema()
+                if writer is None:
+                    writer = pq.ParquetWriter(out, schema)
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            elif fmt == 'dataset':
+                import dataset
+                dataset.write_partitions(chunk, out)
+            else:
+                raise ValueError(f"Unknown output format: {fmt}")
+            total += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return total
+
+
+# --- MAIN ---
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate many matches (both periods) with NumPy.")
+    parser.add_argument('--matches', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--format', choices=['csv', 'parquet', 'dataset'], default='csv')
+    parser.add_argument('--out', default=None,
+                        help='Output path (default: data/sim_matches.csv|.parquet or data/season)')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    out = args.out or {
+        'csv': 'data/sim_matches.csv',
+        'parquet': 'data/sim_matches.parquet',
+        'dataset': 'data/season',
+    }[args.format]
+
+    t0 = time.perf_counter()
+    total = write_events(args.matches, out, args.format, args.seed, args.batch_size)
+    secs = time.perf_counter() - t0
+    print(f"Simulated {args.matches} matches, {total:,} events in {secs:.2f}s "
+          f"({total / secs:,.0f} events/s) -> {out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,322 @@
+"""
+Spatial index over event coordinates for zone and region queries.
+
+Events are bucketed into a regular grid of CELL x CELL Opta units. Rows are
+sorted by cell (CSR layout: `offsets[c]:offsets[c + 1]` are the rows of cell
+c, with their X / Y stored alongside), so a query only tests the events in
+the cells its bounding box touches instead of comparing every event:
+
+    index = SpatialIndex(df['X'], df['Y'])
+    index.rect(66.7, 83.3, 33.3, 66.7)    # row positions, ascending
+    index.radius(88.5, 50, 12)
+    index.polygon([(83, 21.1), (100, 21.1), (100, 78.9), (83, 78.9)])
+    index.zone(14)                        # Opta 18-zone grid
+    index.region('box')
+
+Zones follow the Opta 18-zone layout: six vertical strips of 16.7 along the
+pitch, three channels across, numbered up each strip from the defending end,
+so zone 14 is X 66.7-83.3, Y 33.3-66.7. Rectangles are inclusive on all sides;
+zone edges belong to the zone further up the pitch / higher channel.
+
+Indexes are cached next to each dataset partition (and per CSV in the event
+store cache), and query() runs a region query across a whole season.
+
+Usage:
+    python src/spatial_index.py --source data/season --region zone:14 --event Reception
+    python src/spatial_index.py --source data/full_match_data.csv --region radius:88.5,50,12 --compare-scan
+"""
+import argparse
+import glob
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import dataset
+from event_store import cache_dir_for, data_hash, load_events
+
+# --- CONFIGURATION ---
+CELL = 5.0                                   # Bucket size in Opta units (20 x 20 grid)
+ZONE_X = np.linspace(0, 100, 7)              # 6 strips along the pitch
+ZONE_Y = np.linspace(0, 100, 4)              # 3 channels across
+# Penalty box as the generator tags it: X >= BOX_X, BOX_Y_MIN < Y < BOX_Y_MAX.
+# progression.py's box thresholds default to these too.
+BOX_X, BOX_Y_MIN, BOX_Y_MAX = 83.0, 21.0, 79.0
+# Named rectangles (x0, x1, y0, y1), inclusive
+REGIONS = {
+    # Open across the pitch: the nearest floats inside BOX_Y_MIN / BOX_Y_MAX
+    'box': (BOX_X, 100.0, np.nextafter(BOX_Y_MIN, 100), np.nextafter(BOX_Y_MAX, 0)),
+    'six_yard_box': (94.2, 100.0, 36.8, 63.2),
+    'final_third': (100 * 2 / 3, 100.0, 0.0, 100.0),
+    'middle_third': (100 / 3, 100 * 2 / 3, 0.0, 100.0),
+    'defensive_third': (0.0, 100 / 3, 0.0, 100.0),
+}
+
+
+# --- VECTORISED HELPERS ---
+
+def zone_of(x, y):
+    """Opta zone (1-18) of each point; 0 where X or Y is missing."""
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    col = np.clip(np.searchsorted(ZONE_X[1:-1], x, side='right'), 0, 5)
+    row = np.clip(np.searchsorted(ZONE_Y[1:-1], y, side='right'), 0, 2)
+    zones = col * 3 + row + 1
+    return np.where(np.isnan(x) | np.isnan(y), 0, zones)
+
+
+def zone_bounds(zone):
+    """(x0, x1, y0, y1) of an Opta zone."""
+    if not 1 <= zone <= 18:
+        raise ValueError(f"Opta zones are numbered 1-18, got {zone}")
+    col, row = divmod(zone - 1, 3)
+    return ZONE_X[col], ZONE_X[col + 1], ZONE_Y[row], ZONE_Y[row + 1]
+
+
+def in_rect(x, y, x0, x1, y0, y1):
+    x = np.asarray(x)
+    y = np.asarray(y)
+    return (x >= x0) & (x <= x1) & (y >= y0) & (y <= y1)
+
+
+def in_region(x, y, name):
+    """Mask of the points inside one of the named REGIONS."""
+    return in_rect(x, y, *REGIONS[name])
+
+
+def in_polygon(x, y, vertices):
+    """Even-odd rule point-in-polygon test, vectorised over the points."""
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    vx, vy = np.asarray(vertices, dtype='float64').T
+    inside = np.zeros(len(x), dtype=bool)
+    for i in range(len(vx)):
+        x1, y1, x2, y2 = vx[i - 1], vy[i - 1], vx[i], vy[i]
+        crosses = (y1 > y) != (y2 > y)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x_cross = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+        inside ^= crosses & (x < x_cross)
+    return inside
+
+
+# --- INDEX ---
+
+class SpatialIndex:
+    """Grid-bucket index over one set of (X, Y) points (rows without X / Y are left out)."""
+
+    def __init__(self, x=None, y=None, cell=CELL):
+        self.cell = cell
+        self.n_side = int(np.ceil(100 / cell))
+        if x is None:
+            return  # Filled in by load()
+        x = np.asarray(x, dtype='float32')
+        y = np.asarray(y, dtype='float32')
+        valid = np.flatnonzero(~(np.isnan(x) | np.isnan(y)))
+        cells = self._cell_ids(x[valid], y[valid])
+        order = np.argsort(cells, kind='stable')
+        self.rows = valid[order]
+        self.xs = x[self.rows]
+        self.ys = y[self.rows]
+        self.offsets = np.zeros(self.n_side ** 2 + 1, dtype='int64')
+        np.cumsum(np.bincount(cells, minlength=self.n_side ** 2), out=self.offsets[1:])
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _axis_cell(self, v):
+        # Points off the 0-100 pitch go to the edge cells; queries still test them exactly
+        return np.clip((np.asarray(v) // self.cell).astype('int64'), 0, self.n_side - 1)
+
+    def _cell_ids(self, x, y):
+        return self._axis_cell(x) * self.n_side + self._axis_cell(y)
+
+    def _candidates(self, x0, x1, y0, y1):
+        """Positions (into rows / xs / ys) of every point in the cells the box touches."""
+        if x0 > x1 or y0 > y1:
+            return np.empty(0, dtype='int64')  # Empty box, e.g. a negative radius
+        cx0, cx1 = self._axis_cell([x0, x1])
+        cy0, cy1 = self._axis_cell([y0, y1])
+        # Cells are numbered column by column, so each column's span is one slice
+        starts = self.offsets[np.arange(cx0, cx1 + 1) * self.n_side + cy0]
+        ends = self.offsets[np.arange(cx0, cx1 + 1) * self.n_side + cy1 + 1]
+        if len(starts) == 1:
+            return np.arange(starts[0], ends[0])
+        return np.concatenate([np.arange(s, e) for s, e in zip(starts, ends)])
+
+    def _result(self, positions):
+        return np.sort(self.rows[positions])
+
+    # --- QUERIES ---
+
+    def rect(self, x0, x1, y0, y1):
+        """Rows with x0 <= X <= x1 and y0 <= Y <= y1."""
+        pos = self._candidates(x0, x1, y0, y1)
+        return self._result(pos[in_rect(self.xs[pos], self.ys[pos], x0, x1, y0, y1)])
+
+    def radius(self, x, y, r):
+        """Rows within distance r of (x, y)."""
+        pos = self._candidates(x - r, x + r, y - r, y + r)
+        dx = self.xs[pos] - x
+        dy = self.ys[pos] - y
+        return self._result(pos[dx * dx + dy * dy <= r * r])
+
+    def polygon(self, vertices):
+        """Rows inside the polygon [(x, y), ...]."""
+        vx, vy = np.asarray(vertices, dtype='float64').T
+        pos = self._candidates(vx.min(), vx.max(), vy.min(), vy.max())
+        return self._result(pos[in_polygon(self.xs[pos], self.ys[pos], vertices)])
+
+    def zone(self, zone):
+        """Rows in an Opta zone (1-18)."""
+        pos = self._candidates(*zone_bounds(zone))
+        return self._result(pos[zone_of(self.xs[pos], self.ys[pos]) == zone])
+
+    def region(self, name):
+        return self.rect(*REGIONS[name])
+
+    def zone_counts(self):
+        """Events per zone (index 0 unused), from the buckets' points."""
+        return np.bincount(zone_of(self.xs, self.ys), minlength=19)
+
+    # --- PERSISTENCE ---
+
+    def save(self, path):
+        with open(path, 'wb') as f:  # np.savez would append '.npz' to the name
+            np.savez(f, rows=self.rows, xs=self.xs, ys=self.ys, offsets=self.offsets, cell=self.cell)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            index = cls(cell=float(data['cell']))
+            index.rows, index.xs, index.ys, index.offsets = data['rows'], data['xs'], data['ys'], data['offsets']
+        return index
+
+
+def match_index(root, match_id, manifest=None, cell=CELL):
+    """Index of one dataset partition, cached next to it."""
+    manifest = manifest or dataset.read_manifest(root)
+    partition = os.path.join(root, manifest[match_id]['file'])
+    cache_path = os.path.join(os.path.dirname(partition), f"spatial-{cell:g}.npz")
+    if os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(partition):
+        return SpatialIndex.load(cache_path)
+
+    events = dataset.read_match(root, match_id, columns=['X', 'Y'], manifest=manifest)
+    index = SpatialIndex(events['X'], events['Y'], cell)
+    index.save(cache_path)
+    return index
+
+
+def load_spatial(csv_path, cell=CELL):
+    """Index of every row of the CSV (aligned with load_events()), cached in the event store."""
+    cache_path = os.path.join(cache_dir_for(csv_path), f"spatial-{cell:g}-{data_hash(csv_path)[:12]}.npz")
+    if os.path.exists(cache_path):
+        return SpatialIndex.load(cache_path)
+    events = load_events(csv_path, columns=['X', 'Y'])
+    index = SpatialIndex(events['X'], events['Y'], cell)
+    index.save(cache_path)
+    return index
+
+
+# --- SEASON QUERIES ---
+
+def parse_region(spec):
+    """
+    A query function from text: 'zone:14', 'rect:x0,x1,y0,y1',
+    'radius:x,y,r', 'polygon:x1,y1,x2,y2,...' or a REGIONS name.
+    """
+    kind, _, args = spec.partition(':')
+    values = [float(v) for v in args.split(',')] if args else []
+    if kind == 'zone':
+        return lambda index: index.zone(int(values[0]))
+    if kind == 'rect':
+        return lambda index: index.rect(*values)
+    if kind == 'radius':
+        return lambda index: index.radius(*values)
+    if kind == 'polygon':
+        vertices = list(zip(values[0::2], values[1::2]))
+        return lambda index: index.polygon(vertices)
+    if kind in REGIONS:
+        return lambda index: index.region(kind)
+    raise ValueError(f"Unknown region: {spec!r}")
+
+
+def query(source, region, columns=None, match_ids=None, teams=None, events=None):
+    """
+    Events inside `region` (parse_region() text, or a function of a
+    SpatialIndex returning rows) from a dataset directory or a CSV glob.
+    Partitions without a hit are never read.
+    """
+    select = parse_region(region) if isinstance(region, str) else region
+    read_columns = list(dict.fromkeys(['MatchID', 'Team', 'Event', 'X', 'Y', *(columns or [])]))
+
+    frames = []
+    if dataset.is_dataset(source):
+        manifest = dataset.read_manifest(source)
+        tables = []
+        for match_id in dataset.select_matches(source, match_ids, teams):
+            rows = select(match_index(source, match_id, manifest))
+            if len(rows):
+                table = pq.read_table(os.path.join(source, manifest[match_id]['file']), columns=read_columns)
+                tables.append(table.take(rows))
+        if tables:
+            # One conversion for the whole season rather than one per match
+            frames.append(pa.concat_tables(tables).to_pandas())
+    else:
+        for path in sorted(glob.glob(source)):
+            rows = select(load_spatial(path))
+            if len(rows):
+                frames.append(load_events(path, columns=read_columns).iloc[rows])
+
+    if not frames:
+        return pd.DataFrame(columns=columns or read_columns)
+    df = pd.concat(frames, ignore_index=True)
+    if match_ids is not None:
+        df = df[df['MatchID'].isin(match_ids)]
+    if teams is not None:
+        df = df[df['Team'].isin(teams)]
+    if events is not None:
+        df = df[df['Event'].isin(events)]
+    return df[columns].reset_index(drop=True) if columns else df.reset_index(drop=True)
+
+
+# --- MAIN ---
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Events inside a pitch region across a season.")
+    parser.add_argument('--source', default=dataset.DATASET_ROOT, help='Dataset directory or CSV glob')
+    parser.add_argument('--region', required=True, help="zone:14, rect:x0,x1,y0,y1, radius:x,y,r, polygon:..., "
+                                                        f"or one of {', '.join(REGIONS)}")
+    parser.add_argument('--event', nargs='+', help='Only these event types')
+    parser.add_argument('--team', nargs='+')
+    parser.add_argument('--compare-scan', action='store_true', help='Check against a full scan and time both')
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    df = query(args.source, args.region, teams=args.team, events=args.event)
+    query_secs = time.perf_counter() - t0
+    print(f"{len(df):,} events in {args.region} ({query_secs * 1e3:.1f} ms)")
+    if not df.empty:
+        print(df.groupby(['Team', 'Event'], observed=True).size().rename('Events').to_string())
+
+    if args.compare_scan:
+        # Same answer the slow way: load everything and test every event
+        select = parse_region(args.region)
+        t0 = time.perf_counter()
+        expected = 0
+        for _, events in dataset.iter_matches(args.source, columns=['Team', 'Event', 'X', 'Y']):
+            rows = select(SpatialIndex(events['X'], events['Y'], cell=100.0))  # One bucket: a full scan
+            hits = events.iloc[rows]
+            if args.team:
+                hits = hits[hits['Team'].isin(args.team)]
+            if args.event:
+                hits = hits[hits['Event'].isin(args.event)]
+            expected += len(hits)
+        print(f"Full scan: {expected:,} events ({(time.perf_counter() - t0) * 1e3:.1f} ms)")
+        assert expected == len(df), "index and full scan disagree"
+
+
+if __name__ == '__main__':
+    main()
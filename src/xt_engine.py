@@ -0,0 +1,91 @@
+"""
+Vectorized Expected Threat (xT) attribution.
+
+Replaces the row-by-row `df.iloc[i]` / `df.iloc[i+1]` loop that used to live in
+04_player_xt.py. Every step is a whole-column NumPy/pandas operation, both teams
+are handled at once and any number of matches can be passed in one DataFrame.
+"""
+import numpy as np
+import pandas as pd
+
+from possessions import continuation_mask
+from xt_model import default_surface, lookup
+
+# Events credited to each xT bucket
+PASS_EVENTS = ['Pass', 'Cross']
+CARRY_EVENTS = ['Dribble']
+
+
+# --- THREAT SURFACE ---
+
+DEFAULT_SURFACE = default_surface()
+
+
+def threat_value(x, y, surface=None):
+    """Threat for arrays of coordinates, looked up on the xT grid (see xt_model.py)."""
+    return lookup(DEFAULT_SURFACE if surface is None else surface, x, y)
+
+
+# --- ATTRIBUTION ---
+
+def threat_columns(df, surface=None):
+    """
+    Start threat, end threat (the next event's location), threat added
+    and the continuation mask for every row of `df`. Uses the End_X / End_Y /
+    Kept columns of the possession index when `df` carries them.
+    """
+    start = threat_value(df['X'], df['Y'], surface)
+
+    if 'End_X' in df.columns and 'Kept' in df.columns:
+        kept = df['Kept'].to_numpy()
+        end = np.full(len(df), np.nan)
+        end[kept] = threat_value(df['End_X'].to_numpy()[kept], df['End_Y'].to_numpy()[kept], surface)
+    else:
+        end = np.full(len(df), np.nan)
+        end[:-1] = start[1:]
+        kept = continuation_mask(df)
+        end[~kept] = np.nan
+
+    return pd.DataFrame({
+        'Start_Threat': start,
+        'End_Threat': end,
+        'xT_Added': end - start,
+        'Kept': kept,
+    }, index=df.index)
+
+
+def attribute_xt(df, teams=None, surface=None):
+    """
+    Per-player Pass / Carry xT for every team (or only `teams`) in `df`.
+
+    Rules are the same as the original loop: the next event must be by the
+    same team in the same period, and only positive progression is credited.
+    `surface` is an xT grid from xt_model.py (default: default_surface()).
+    Returns a DataFrame with Team, Player, 'Pass xT', 'Carry xT' and 'Total xT'.
+    """
+    threat = threat_columns(df, surface)
+    xt_added = threat['xT_Added'].to_numpy()
+
+    # NaN end threat (possession lost / end of period) compares False here
+    credited = threat['Kept'].to_numpy() & (xt_added > 0)
+    if teams is not None:
+        credited &= df['Team'].isin(teams).to_numpy()
+
+    gain = xt_added[credited]
+    is_pass = df['Event'].isin(PASS_EVENTS).to_numpy()[credited]
+    is_carry = df['Event'].isin(CARRY_EVENTS).to_numpy()[credited]
+
+    credited_rows = pd.DataFrame({
+        'Team': df['Team'].to_numpy()[credited],
+        'Player': df['Player'].to_numpy()[credited],
+        'Pass xT': np.where(is_pass, gain, 0.0),
+        'Carry xT': np.where(is_carry, gain, 0.0),
+    })
+
+    leaderboard = (
+        credited_rows.groupby(['Team', 'Player'], sort=False, observed=True)
+        [['Pass xT', 'Carry xT']].sum()
+        .reset_index()
+    )
+    leaderboard['Total xT'] = leaderboard['Pass xT'] + leaderboard['Carry xT']
+    return leaderboard
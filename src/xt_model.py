@@ -0,0 +1,151 @@
+"""
+Grid-based Expected Threat (xT) model.
+
+The pitch is split into a 16x12 grid over Opta coordinates and the threat of
+each cell is stored in a NumPy array of shape (12, 16) (rows = Y bins,
+columns = X bins). Looking up an event is a vectorized bin lookup, O(1) per
+event, so the charts no longer evaluate a formula row by row.
+
+Two surfaces are available:
+  * default_surface() - the closed-form threat from 04_player_xt.py sampled at
+                        each cell centre (no data needed)
+  * fit_surface(df)   - Karun Singh style xT fitted by value iteration from
+                        the events themselves (shots, goals and ball moves).
+                        fitted_surface(csv) caches the result next to the
+                        event cache, keyed on the CSV content hash.
+
+Usage:
+    python src/xt_model.py --csv data/full_match_data.csv
+"""
+import argparse
+import os
+
+import numpy as np
+
+# --- CONFIGURATION ---
+N_X_BINS = 16
+N_Y_BINS = 12
+X_EDGES = np.linspace(0, 100, N_X_BINS + 1)
+Y_EDGES = np.linspace(0, 100, N_Y_BINS + 1)
+
+MOVE_EVENTS = ['Pass', 'Cross', 'Dribble']
+MAX_ITERATIONS = 100
+TOLERANCE = 1e-6
+
+
+# --- LOOKUP ---
+
+def bin_index(x, y):
+    """Column / row index of each (x, y); values outside 0-100 go to the edge bins."""
+    ix = np.digitize(np.asarray(x, dtype=np.float64), X_EDGES[1:-1])
+    iy = np.digitize(np.asarray(y, dtype=np.float64), Y_EDGES[1:-1])
+    return ix, iy
+
+
+def lookup(surface, x, y):
+    """Threat of every (x, y). NaN coordinates give NaN threat."""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    ix, iy = bin_index(x, y)
+    values = surface[np.clip(iy, 0, N_Y_BINS - 1), np.clip(ix, 0, N_X_BINS - 1)]
+    return np.where(np.isnan(x) | np.isnan(y), np.nan, values)
+
+
+# --- SURFACES ---
+
+def default_surface():
+    """
+    Closed-form threat at each cell centre.
+    X is always 0-100 towards the opponent goal, so no flip is needed for Away.
+    """
+    x_centres = (X_EDGES[:-1] + X_EDGES[1:]) / 2
+    y_centres = (Y_EDGES[:-1] + Y_EDGES[1:]) / 2
+    x, y = np.meshgrid(x_centres, y_centres)
+
+    # 1. Distance Threat (Squaring rewards the final third heavily)
+    x_factor = (x / 100.0) ** 2
+
+    # 2. Centrality Threat (y=50 is center, wings are penalised)
+    y_factor = 1 - (np.abs(y - 50) / 50) * 0.3
+
+    return x_factor * y_factor
+
+
+def fit_surface(df, max_iterations=MAX_ITERATIONS, tol=TOLERANCE):
+    """
+    Fit xT by value iteration:
+
+        xT(c) = P(shot|c) * P(goal|shot,c) + P(move|c) * sum_c' T(c -> c') * xT(c')
+
+    A move (Pass / Cross / Dribble) ends where the next event happens when the
+    same team keeps the ball; otherwise it counts as a move that went nowhere.
+    """
+    from possessions import continuation_mask
+
+    n_cells = N_X_BINS * N_Y_BINS
+    ix, iy = bin_index(df['X'], df['Y'])
+    cell = iy * N_X_BINS + ix
+
+    event = df['Event']
+    is_shot = (event == 'Shot').to_numpy()
+    is_goal = is_shot & (df['Qualifier'] == 'Goal').to_numpy()
+    is_move = event.isin(MOVE_EVENTS).to_numpy()
+
+    shots = np.bincount(cell[is_shot], minlength=n_cells).astype(np.float64)
+    goals = np.bincount(cell[is_goal], minlength=n_cells).astype(np.float64)
+    moves = np.bincount(cell[is_move], minlength=n_cells).astype(np.float64)
+    actions = shots + moves
+
+    # Successful moves: start cell -> cell of the next event by the same team
+    kept = continuation_mask(df) & is_move
+    start = np.flatnonzero(kept)
+    transitions = np.zeros((n_cells, n_cells))
+    np.add.at(transitions, (cell[start], cell[start + 1]), 1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        shot_prob = np.nan_to_num(shots / actions)
+        move_prob = np.nan_to_num(moves / actions)
+        goal_prob = np.nan_to_num(goals / shots)
+        transitions = np.nan_to_num(transitions / moves[:, None])
+
+    scoring = shot_prob * goal_prob
+    xt = np.zeros(n_cells)
+    for _ in range(max_iterations):
+        updated = scoring + move_prob * (transitions @ xt)
+        converged = np.max(np.abs(updated - xt)) < tol
+        xt = updated
+        if converged:
+            break
+
+    return xt.reshape(N_Y_BINS, N_X_BINS)
+
+
+def fitted_surface(csv_path):
+    """Surface fitted from `csv_path`, cached on disk until the CSV changes."""
+    from event_store import cache_dir_for, data_hash, load_events
+
+    cache_path = os.path.join(cache_dir_for(csv_path), f"xt_surface-{data_hash(csv_path)[:12]}.npy")
+    if os.path.exists(cache_path):
+        return np.load(cache_path)
+
+    df = load_events(csv_path, columns=['MatchID', 'Period', 'Team', 'Event', 'Qualifier', 'X', 'Y'])
+    surface = fit_surface(df)
+    np.save(cache_path, surface)
+    return surface
+
+
+# --- MAIN ---
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fit and cache the xT grid from match data.")
+    parser.add_argument('--csv', default='data/full_match_data.csv')
+    args = parser.parse_args(argv)
+
+    surface = fitted_surface(args.csv)
+    np.set_printoptions(precision=3, suppress=True, linewidth=160)
+    print(f"xT surface ({N_Y_BINS} x {N_X_BINS}) fitted from {args.csv}:")
+    print(surface[::-1])  # Top row = Y near 100
+
+
+if __name__ == '__main__':
+    main()